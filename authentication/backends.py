@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from utils.cache import shared_cache
+
+# How long a resolved user is reused, in seconds
+USER_CACHE_TTL = 5 * 60
+
+
+def _cache_key(user_id) -> str:
+    return f"jwt-user:{user_id}"
+
+
+def served_from_cache(user) -> bool:
+    """
+    Whether ``user`` was loaded from the cache by CachedJWTAuthentication,
+    so its fields may predate changes made since it was cached.
+    """
+    return getattr(user, "_served_from_cache", False)
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Forget a cached user now and again once the transaction commits, so a
+    request that read the old row meanwhile cannot leave it cached.
+    """
+
+    cache = shared_cache()
+    if cache is None:
+        return
+
+    def forget():
+        cache.delete(_cache_key(user_id))
+
+    forget()
+    transaction.on_commit(forget)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through Django's cache
+    instead of loading it on every request.
+
+    There is one entry per user, shared by all of their tokens, and User
+    signals drop it on every save or delete. Cached users go through the
+    same active and revoked-token checks as freshly loaded ones. With a
+    process-local cache, where other workers would not see the signals'
+    deletes, the user is loaded every time.
+    """
+
+    def get_user(self, validated_token):
+        cache = shared_cache()
+        if cache is None:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = None if user_id is None else cache.get(_cache_key(user_id))
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(_cache_key(user_id), user, USER_CACHE_TTL)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+        user._served_from_cache = True
+        return user
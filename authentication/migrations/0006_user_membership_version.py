@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_remove_otp_created_at_remove_user_organization_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='membership_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.http import Http404
+
+from .models import Membership
+
+
+def resolve_membership(request, organization_uuid):
+    """
+    Return the caller's membership of an organization, with the
+    organization loaded, or None if they are not a member or it does not
+    exist.
+
+    The lookup is one joined query, memoized on the request so that
+    permissions, querysets and serializers share it.
+    """
+    resolved = request.__dict__.setdefault("_organization_memberships", {})
+    key = str(organization_uuid)
+    if key not in resolved:
+        resolved[key] = (
+            Membership.objects.select_related("organization")
+            .filter(user=request.user, organization__uuid=organization_uuid)
+            .first()
+        )
+    return resolved[key]
+
+
+class OrganizationScopedMixin:
+    """
+    For views nested under an organization's URL.
+
+    The organization comes from the caller's membership, so a caller who
+    is not a member sees a 404 and no separate Organization lookup is made.
+    """
+
+    organization_url_kwarg = "org_uuid"
+
+    def get_membership(self):
+        return resolve_membership(
+            self.request, self.kwargs[self.organization_url_kwarg]
+        )
+
+    def get_organization(self):
+        membership = self.get_membership()
+        if membership is None:
+            raise Http404("Organization not found")
+        return membership.organization
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["organization"] = self.get_organization()
+        return context
@@ -45,6 +45,9 @@ class User(AbstractBaseUser, PermissionsMixin, TrackObjectStateMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
+    # Bumped whenever the user's memberships change; tokens carrying an
+    # older value have outdated organization claims
+    membership_version = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
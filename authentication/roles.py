@@ -0,0 +1,175 @@
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from utils.cache import TTLCache, shared_cache
+
+from .backends import invalidate_user, served_from_cache
+from .models import Membership, User
+
+# How long a role stays in the shared cache, in seconds
+ROLE_CACHE_TTL = 5 * 60
+# The per-process copy only hears about changes made in its own process,
+# so it is kept just long enough to absorb bursts of requests.
+LOCAL_ROLE_CACHE_TTL = 10
+LOCAL_ROLE_CACHE_SIZE = 10_000
+# Cached in place of a role so outsiders are not looked up every time
+NOT_A_MEMBER = ""
+
+# Access token claims: organization UUID to role code, and the user's
+# membership_version when they were issued
+ROLES_CLAIM = "org_roles"
+ROLES_VERSION_CLAIM = "org_roles_v"
+ROLE_CODES = {"owner": "o", "admin": "a", "member": "m"}
+CODE_ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+_local_roles = TTLCache(maxsize=LOCAL_ROLE_CACHE_SIZE)
+
+
+def _cache_key(user_id, organization_id) -> str:
+    return f"membership-role:{user_id}:{organization_id}"
+
+
+def _version_key(user_id) -> str:
+    return f"membership-version:{user_id}"
+
+
+def get_membership_version(user_id) -> Optional[int]:
+    """
+    Return a user's current ``membership_version``, or None if there is no
+    such user.
+
+    The version is read from Django's cache when all processes share it,
+    and otherwise from the database; a cached User row may be older.
+    """
+    key = _version_key(user_id)
+    cache = shared_cache()
+    version = None if cache is None else cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id)
+            .values_list("membership_version", flat=True)
+            .first()
+        )
+        if cache is not None and version is not None:
+            cache.set(key, version, ROLE_CACHE_TTL)
+    return version
+
+
+def get_role(user_id, organization_id) -> Optional[str]:
+    """
+    Return a user's role in an organization, or None if they are not a
+    member.
+
+    Roles are read from a per-process LRU, then Django's cache when all
+    processes share it, and only then the database. Membership signals keep
+    both caches current.
+    """
+    key = _cache_key(user_id, organization_id)
+    role = _local_roles.get(key)
+    if role is None:
+        cache = shared_cache()
+        role = None if cache is None else cache.get(key)
+        if role is None:
+            role = (
+                Membership.objects.filter(
+                    user_id=user_id, organization_id=organization_id
+                )
+                .values_list("role", flat=True)
+                .first()
+            ) or NOT_A_MEMBER
+            if cache is not None:
+                cache.set(key, role, ROLE_CACHE_TTL)
+        _local_roles.set(key, role, LOCAL_ROLE_CACHE_TTL)
+    return role or None
+
+
+def invalidate_role(user_id, organization_id) -> None:
+    """
+    Forget a cached role now and again once the transaction commits, so a
+    request that read the old row meanwhile cannot leave it cached.
+    """
+
+    key = _cache_key(user_id, organization_id)
+    cache = shared_cache()
+
+    def forget():
+        _local_roles.delete(key)
+        if cache is not None:
+            cache.delete(key)
+
+    forget()
+    transaction.on_commit(forget)
+
+
+def bump_membership_version(user_id) -> None:
+    """
+    Mark the organization claims in a user's existing tokens as outdated.
+    """
+    User.objects.filter(pk=user_id).update(
+        membership_version=F("membership_version") + 1
+    )
+    # The update sends no signal, so the cached version and user are
+    # dropped here, now and again once the transaction commits.
+    invalidate_user(user_id)
+    cache = shared_cache()
+    if cache is None:
+        return
+
+    def forget():
+        cache.delete(_version_key(user_id))
+
+    forget()
+    transaction.on_commit(forget)
+
+
+def organization_claims(user: User) -> Dict[str, object]:
+    """
+    Build the token claims mapping each of the user's organizations to
+    their role, stamped with ``membership_version``.
+
+    Returns no claims for users in more than
+    ``JWT_MAX_CLAIMED_ORGANIZATIONS`` organizations, to keep tokens small.
+    """
+    limit = settings.AUTH_CONFIG.JWT_MAX_CLAIMED_ORGANIZATIONS
+    # The version is read before the memberships, so a change committed in
+    # between leaves the claims stamped with the older version.
+    version = user.membership_version
+    memberships = Membership.objects.filter(user=user).values_list(
+        "organization_id", "role"
+    )[: limit + 1]
+    roles = {
+        str(organization_id): ROLE_CODES[role]
+        for organization_id, role in memberships
+    }
+    if len(roles) > limit:
+        return {}
+    return {ROLES_CLAIM: roles, ROLES_VERSION_CLAIM: version}
+
+
+def claimed_role(request, organization_id) -> Tuple[bool, Optional[str]]:
+    """
+    Read the caller's role from the organization claims of their token.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the claims are present and
+            current, and the role they give (None for non-members)
+    """
+    token = getattr(request, "auth", None)
+    if token is None or not hasattr(token, "get"):
+        return False, None
+    version = token.get(ROLES_VERSION_CLAIM)
+    if version is None:
+        return False, None
+    # A user loaded in this request carries the current version already;
+    # a cached copy may predate the last membership change.
+    if served_from_cache(request.user):
+        current = get_membership_version(request.user.pk)
+    else:
+        current = request.user.membership_version
+    if version != current:
+        return False, None
+    code = token.get(ROLES_CLAIM, {}).get(str(organization_id))
+    return True, CODE_ROLES.get(code)
@@ -1,16 +1,31 @@
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from authentication.exceptions import InvalidOTP
 
 from .models import Membership, Organization, User
+from .roles import organization_claims
 from .utils import verify_otp
 
 # from utils.serializers import BaseSerializer
 
 
+def user_memberships_prefetch(prefix=""):
+    """
+    Prefetch the memberships and organizations read by
+    ``UserModelSerializer.get_organizations``, for users reached through
+    ``prefix`` (e.g. ``"user__"`` from a Membership queryset).
+    """
+    return Prefetch(
+        f"{prefix}memberships",
+        queryset=Membership.objects.select_related("organization"),
+    )
+
+
 class UserModelSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(required=True, allow_blank=False)
     last_name = serializers.CharField(required=True, allow_blank=False)
@@ -22,6 +37,8 @@ class UserModelSerializer(serializers.ModelSerializer):
         extra_kwargs = {"password": {"write_only": True, "min_length": 8}}
     
     def get_organizations(self, obj):
+        # Served from the prefetch cache when the view used
+        # user_memberships_prefetch; otherwise one query per user.
         memberships = obj.memberships.all()
         return [
             {
@@ -155,6 +172,15 @@ class OTPVerifySerializer(serializers.Serializer):
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = "email"
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Copied into every access token minted from this refresh token.
+        if settings.AUTH_CONFIG.JWT_ORGANIZATION_CLAIMS:
+            for claim, value in organization_claims(user).items():
+                token[claim] = value
+        return token
+
     def validate(self, attrs):
         credentials = {
             "email": attrs.get("email"),
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_user
+from .models import Membership, User
+from .roles import bump_membership_version, invalidate_role
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def forget_cached_role(sender, instance, **kwargs):
+    # QuerySet.update() and bulk_create() send no signals; cached roles
+    # then expire after ROLE_CACHE_TTL, and token claims with the token.
+    invalidate_role(instance.user_id, instance.organization_id)
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def outdate_organization_claims(sender, instance, **kwargs):
+    bump_membership_version(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
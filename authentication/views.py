@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from django.db.models import prefetch_related_objects
 from rest_framework import status
 from rest_framework.generics import (
     CreateAPIView,
@@ -10,6 +10,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from .mixins import OrganizationScopedMixin
 from .models import Membership, Organization, User
 from .serializers import (
     CustomTokenObtainPairSerializer,
@@ -19,6 +20,7 @@ from .serializers import (
     OrganizationSerializer,
     OTPVerifySerializer,
     UserModelSerializer,
+    user_memberships_prefetch,
 )
 from .utils import create_otp, send_otp
 from utils.permissions import IsOrganizationOwnerOrAdmin
@@ -55,33 +57,33 @@ class OrganizationListCreateView(ListCreateAPIView):
         return {"request": self.request}
 
 
-class MemberListCreateView(ListCreateAPIView):
+def members_queryset(organization):
+    """
+    Memberships of an organization with everything MemberSerializer reads,
+    in a constant number of queries however many members there are.
+    """
+    return (
+        Membership.objects.filter(organization=organization)
+        .select_related("user")
+        .prefetch_related(user_memberships_prefetch("user__"))
+    )
+
+
+class MemberListCreateView(OrganizationScopedMixin, ListCreateAPIView):
     serializer_class = MemberSerializer
     permission_classes = [IsAuthenticated, IsOrganizationOwnerOrAdmin]
 
     def get_queryset(self):
-        organization = get_object_or_404(
-            Organization, uuid=self.kwargs["org_uuid"]
-        )
-        return Membership.objects.filter(organization=organization)
+        return members_queryset(self.get_organization())
 
-    def get_serializer_context(self):
-        organization = get_object_or_404(
-            Organization, uuid=self.kwargs["org_uuid"]
-        )
-        return {"organization": organization}
 
-
-class MemberDetailView(RetrieveUpdateDestroyAPIView):
+class MemberDetailView(OrganizationScopedMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = MemberSerializer
     permission_classes = [IsAuthenticated, IsOrganizationOwnerOrAdmin]
     lookup_field = "uuid"
 
     def get_queryset(self):
-        organization = get_object_or_404(
-            Organization, uuid=self.kwargs["org_uuid"]
-        )
-        return Membership.objects.filter(organization=organization)
+        return members_queryset(self.get_organization())
 
 
 class UserDetailView(GenericAPIView):
@@ -91,6 +93,7 @@ class UserDetailView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
+        prefetch_related_objects([request.user], user_memberships_prefetch())
         serializer = self.get_serializer(request.user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -107,6 +110,7 @@ class UserUpdateView(GenericAPIView):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        prefetch_related_objects([request.user], user_memberships_prefetch())
         return Response(serializer.data, status=status.HTTP_200_OK)
 class OldVerifyOTPView(GenericAPIView):
     """Generic View for verifying OTP and updating
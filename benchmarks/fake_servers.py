@@ -0,0 +1,216 @@
+import hashlib
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+PUBLIC_ID_FIELD = re.compile(rb'name="public_id"\r\n\r\n([^\r\n]*)\r\n')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so the clients' connection pools behave as in production.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm adds a delayed-ACK stall to every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def respond(self, status, body=b"", content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class _FakeServer:
+    """
+    Run a handler on an ephemeral localhost port in a daemon thread.
+
+    Objects are kept in ``store`` for the life of the server.
+    """
+
+    handler_class = _Handler
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self.server.daemon_threads = True
+        self.server.store = {}
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class _S3Handler(_Handler):
+    def parse(self):
+        url = urlsplit(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        return bucket, unquote(key), parse_qs(url.query, True)
+
+    def etag(self, data):
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+    def xml(self, status, root, children):
+        element = ElementTree.Element(root, xmlns=S3_NAMESPACE)
+        for name, value in children.items():
+            ElementTree.SubElement(element, name).text = value
+        body = ElementTree.tostring(element, xml_declaration=True)
+        self.respond(status, body, "application/xml")
+
+    def do_HEAD(self):
+        bucket, key, _ = self.parse()
+        data = self.store.get((bucket, key))
+        if data is None:
+            self.respond(404)
+            return
+        self.respond(200, headers={"ETag": self.etag(data)})
+
+    def do_PUT(self):
+        bucket, key, query = self.parse()
+        data = self.read_body()
+        if "uploadId" in query:
+            part = int(query["partNumber"][0])
+            upload_id = query["uploadId"][0]
+            with self.server.lock:
+                self.server.uploads[upload_id][part] = data
+        else:
+            self.store[(bucket, key)] = data
+        self.respond(200, headers={"ETag": self.etag(data)})
+
+    def do_POST(self):
+        bucket, key, query = self.parse()
+        body = self.read_body()
+        if "delete" in query:
+            root = ElementTree.fromstring(body)
+            for element in root.iter(f"{{{S3_NAMESPACE}}}Key"):
+                self.store.pop((bucket, element.text), None)
+            self.xml(200, "DeleteResult", {})
+        elif "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with self.server.lock:
+                self.server.uploads[upload_id] = {}
+            self.xml(
+                200,
+                "InitiateMultipartUploadResult",
+                {"Bucket": bucket, "Key": key, "UploadId": upload_id},
+            )
+        else:
+            with self.server.lock:
+                parts = self.server.uploads.pop(query["uploadId"][0])
+            data = b"".join(parts[number] for number in sorted(parts))
+            self.store[(bucket, key)] = data
+            self.xml(
+                200,
+                "CompleteMultipartUploadResult",
+                {"Bucket": bucket, "Key": key, "ETag": self.etag(data)},
+            )
+
+    def do_DELETE(self):
+        bucket, key, query = self.parse()
+        if "uploadId" in query:
+            with self.server.lock:
+                self.server.uploads.pop(query["uploadId"][0], None)
+        else:
+            self.store.pop((bucket, key), None)
+        self.respond(204)
+
+
+class FakeS3Server(_FakeServer):
+    """
+    Path-style S3 endpoint covering what the image service calls: object
+    PUT/HEAD/DELETE, multipart uploads and ``DeleteObjects``.
+
+    Point a boto3 client at ``url`` with path addressing and checksums
+    only ``when_required``; request signatures are not checked.
+    """
+
+    handler_class = _S3Handler
+
+    def __init__(self):
+        super().__init__()
+        self.server.uploads = {}
+
+
+class _CloudinaryHandler(_Handler):
+    def do_POST(self):
+        # /v1_1/<cloud>/image/upload, a multipart form
+        body = self.read_body()
+        match = PUBLIC_ID_FIELD.search(body)
+        public_id = match.group(1).decode() if match else uuid.uuid4().hex
+        self.store[public_id] = len(body)
+        self.json(
+            {
+                "public_id": public_id,
+                "version": 1,
+                "resource_type": "image",
+                "type": "upload",
+                "bytes": len(body),
+                "secure_url": (
+                    "https://res.cloudinary.com/benchmark/image/upload/"
+                    f"v1/{public_id}"
+                ),
+            }
+        )
+
+    def do_DELETE(self):
+        # /v1_1/<cloud>/resources/image/upload, with the IDs as JSON
+        body = self.read_body()
+        public_ids = json.loads(body).get("public_ids", []) if body else []
+        deleted = {
+            public_id: (
+                "deleted"
+                if self.store.pop(public_id, None) is not None
+                else "not_found"
+            )
+            for public_id in public_ids
+        }
+        self.json({"deleted": deleted, "partial": False})
+
+    def json(self, payload):
+        self.respond(200, json.dumps(payload).encode(), "application/json")
+
+
+class FakeCloudinaryServer(_FakeServer):
+    """
+    Cloudinary upload and Admin API stand-in: accepts uploads and
+    ``delete_resources`` calls once ``upload_prefix`` points at ``url``.
+    """
+
+    handler_class = _CloudinaryHandler
@@ -0,0 +1,297 @@
+import io
+import math
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import boto3
+import cloudinary
+from botocore.config import Config
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image as PILImage
+
+from benchmarks.fake_servers import FakeCloudinaryServer, FakeS3Server
+from services.aws_image_service import ImageService as S3ImageService
+from services.image_service import ImageService as CloudinaryImageService
+from services.local_storage_service import upload_file_to_local
+
+OPERATIONS = ("upload", "url", "delete")
+RSS_SAMPLE_INTERVAL = 0.005
+BENCHMARK_BUCKET = "benchmark"
+
+
+def make_payload(size):
+    """
+    Encode an uncompressed PNG of random pixels close to ``size`` bytes,
+    so it passes the services' header checks and does not compress away.
+    """
+    side = max(1, int(math.sqrt(size / 3)))
+    pixels = PILImage.frombytes("RGB", (side, side), os.urandom(side**2 * 3))
+    buffer = io.BytesIO()
+    pixels.save(buffer, format="PNG", compress_level=0)
+    return buffer.getvalue()
+
+
+class S3Backend:
+    name = "s3"
+
+    @contextmanager
+    def running(self):
+        with FakeS3Server() as server:
+            client = boto3.session.Session().client(
+                "s3",
+                aws_access_key_id="benchmark",
+                aws_secret_access_key="benchmark",
+                region_name="us-east-1",
+                endpoint_url=server.url,
+                config=Config(
+                    s3={"addressing_style": "path"},
+                    max_pool_connections=(
+                        settings.MEDIA_CONFIG.IMAGE_STORAGE_MAX_CONNECTIONS
+                    ),
+                    tcp_keepalive=True,
+                    request_checksum_calculation="when_required",
+                    response_checksum_validation="when_required",
+                ),
+            )
+            self.service = S3ImageService(
+                s3_client=client, bucket_name=BENCHMARK_BUCKET
+            )
+            yield
+
+    def upload(self, key, data):
+        image = SimpleUploadedFile(key, data, content_type="image/png")
+        self.service.store_image(image, key)
+
+    def url(self, key):
+        return self.service.get_image_url(key)
+
+    def delete(self, key):
+        failures = self.service.delete_stored_objects([key])
+        if failures:
+            raise RuntimeError(failures[key])
+
+
+class CloudinaryBackend(S3Backend):
+    name = "cloudinary"
+
+    @contextmanager
+    def running(self):
+        with FakeCloudinaryServer() as server:
+            # Builds the shared, pooled connector before it is redirected.
+            self.service = CloudinaryImageService()
+            config = cloudinary.config()
+            overrides = {
+                "upload_prefix": server.url,
+                "cloud_name": "benchmark",
+                "api_key": "benchmark",
+                "api_secret": "benchmark",
+            }
+            saved = {name: getattr(config, name) for name in overrides}
+            cloudinary.config(**overrides)
+            try:
+                yield
+            finally:
+                cloudinary.config(**saved)
+
+
+class LocalBackend:
+    name = "local"
+
+    @contextmanager
+    def running(self):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                yield
+
+    def upload(self, key, data):
+        image = SimpleUploadedFile(key, data, content_type="image/png")
+        if upload_file_to_local(image, key) is None:
+            raise RuntimeError(f"Local upload of {key} failed")
+
+    def url(self, key):
+        return default_storage.url(key)
+
+    def delete(self, key):
+        default_storage.delete(key)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (S3Backend, CloudinaryBackend, LocalBackend)
+}
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of already sorted ``values``.
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return None
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+@contextmanager
+def sampled_rss(result):
+    """
+    Record the highest resident set size seen while the block runs.
+
+    Falls back to the process-lifetime peak where /proc is unavailable.
+    """
+    if current_rss() is None:
+        yield
+        result["peak_rss_bytes"] = peak_rss()
+        return
+
+    peak = [current_rss()]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(RSS_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        sampler.join()
+        result["peak_rss_bytes"] = max(peak[0], current_rss())
+
+
+def measure(operation, keys, concurrency):
+    """
+    Run ``operation`` once per key on ``concurrency`` threads.
+
+    Returns:
+        Tuple[float, List[float], int]: Wall time, sorted latencies of the
+        calls that succeeded and the number that raised
+    """
+
+    def timed(key):
+        start = time.perf_counter()
+        try:
+            operation(key)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        timings = list(executor.map(timed, keys))
+        elapsed = time.perf_counter() - start
+    latencies = sorted(timing for timing in timings if timing is not None)
+    return elapsed, latencies, len(timings) - len(latencies)
+
+
+def run_scenario(backend, data, concurrency, count):
+    """
+    Upload, sign a URL for and delete ``count`` objects of one size.
+
+    Returns:
+        List[Dict[str, object]]: One result per operation
+    """
+    keys = [f"benchmark/{uuid.uuid4().hex}.png" for _ in range(count)]
+    calls = {
+        "upload": lambda key: backend.upload(key, data),
+        "url": backend.url,
+        "delete": backend.delete,
+    }
+    results = []
+    for operation in OPERATIONS:
+        result = {
+            "backend": backend.name,
+            "operation": operation,
+            "size_bytes": len(data),
+            "concurrency": concurrency,
+            "operations": count,
+        }
+        with sampled_rss(result):
+            elapsed, latencies, errors = measure(
+                calls[operation], keys, concurrency
+            )
+        succeeded = len(latencies)
+        result.update(
+            {
+                "errors": errors,
+                "seconds": round(elapsed, 6),
+                "ops_per_second": round(succeeded / elapsed, 2),
+                "p50_ms": _milliseconds(percentile(latencies, 0.5)),
+                "p99_ms": _milliseconds(percentile(latencies, 0.99)),
+            }
+        )
+        if operation == "upload":
+            result["mb_per_second"] = round(
+                succeeded * len(data) / elapsed / 1_000_000, 2
+            )
+        results.append(result)
+    return results
+
+
+def _milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def run_benchmark(backends, sizes, concurrency_levels, count):
+    """
+    Benchmark every combination of backend, file size and concurrency.
+
+    Args:
+        backends (List[str]): Keys of ``BACKENDS``
+        sizes (List[int]): Approximate payload sizes in bytes
+        concurrency_levels (List[int]): Worker thread counts
+        count (int): Objects per scenario
+
+    Returns:
+        Dict[str, object]: Environment details and a ``results`` list,
+        ready to serialise as JSON
+    """
+    payloads = {size: make_payload(size) for size in sizes}
+    results = []
+    for name in backends:
+        backend = BACKENDS[name]()
+        with backend.running():
+            for size in sizes:
+                for concurrency in concurrency_levels:
+                    results.extend(
+                        run_scenario(
+                            backend,
+                            payloads[size],
+                            concurrency,
+                            count,
+                        )
+                    )
+    return {
+        "benchmark": "storage",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 import os
 from datetime import timedelta
 from pathlib import Path
-from typing import Literal
+from typing import List, Literal, Optional
 
 import environ
 from pydantic_settings import BaseSettings
@@ -123,6 +123,12 @@ WSGI_APPLICATION = "config.wsgi.application"
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
 
+# Cache, e.g. CACHE_URL=redis://redis:6379/1 (needs the backend's client
+# library). Users and roles are only cached when every process shares it,
+# which the local-memory default does not.
+CACHES = {"default": env.cache_url("CACHE_URL", default="locmemcache://")}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -180,7 +186,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.backends.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
 }
@@ -198,6 +204,17 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = "authentication.User"
 
 
+class AuthConfig(BaseSettings):
+    # Embed the caller's organization roles in access tokens, so
+    # organization permission checks need no database lookup
+    JWT_ORGANIZATION_CLAIMS: bool = False
+    # Users in more organizations than this get tokens without the claims
+    JWT_MAX_CLAIMED_ORGANIZATIONS: int = 50
+
+
+AUTH_CONFIG = AuthConfig()
+
+
 class EmailConfig(BaseSettings):
     EMAIL_BACKEND: str
     EMAIL_HOST: str
@@ -271,3 +288,68 @@ class CloudinaryConfig(BaseSettings):
 
 
 CLOUDINARY_CONFIG = CloudinaryConfig()
+
+
+class MediaConfig(BaseSettings):
+    # Size of the process-wide thread pool shared by all upload requests
+    IMAGE_UPLOAD_MAX_WORKERS: int = 16
+    # Connections each pooled storage client keeps open per host
+    IMAGE_STORAGE_MAX_CONNECTIONS: int = 32
+    # Maximum number of uploads a single request may have in flight
+    IMAGE_UPLOAD_CONCURRENCY: int = 4
+    # Backend that stores images and serves them back; "local" keeps them
+    # under MEDIA_ROOT and needs FILE_UPLOAD_STORAGE=local
+    IMAGE_STORAGE_BACKEND: Literal["cloudinary", "local", "s3"] = (
+        "cloudinary"
+    )
+    # Stream multipart image uploads straight into S3 while parsing; only
+    # takes effect with the s3 backend
+    IMAGE_STREAMING_UPLOADS: bool = False
+    # Lifetime of presigned direct-to-storage upload policies, in seconds
+    IMAGE_PRESIGNED_UPLOAD_EXPIRY: int = 900
+    # How long a presigned upload may wait to be confirmed, in seconds
+    IMAGE_UPLOAD_TOKEN_MAX_AGE: int = 24 * 60 * 60
+    # How long a resumable upload may take before it is discarded, in seconds
+    IMAGE_RESUMABLE_UPLOAD_EXPIRY: int = 24 * 60 * 60
+    # Where backends without multipart uploads stage resumable uploads;
+    # defaults to a folder in the system temp directory
+    IMAGE_RESUMABLE_UPLOAD_DIR: Optional[str] = None
+    # Number of generated image URLs kept per process
+    IMAGE_URL_CACHE_SIZE: int = 10_000
+    # Cached URLs are refreshed this many seconds before they expire
+    IMAGE_URL_CACHE_MARGIN: int = 300
+    # Processes used for CPU-bound work such as resizing
+    IMAGE_PROCESSING_WORKERS: int = 2
+    # Front proxy that sends locally stored media for Django ("nginx" uses
+    # X-Accel-Redirect, "apache" X-Sendfile); unset streams it from Python
+    IMAGE_SENDFILE_BACKEND: Optional[Literal["nginx", "apache"]] = None
+    # Internal proxy location mapped onto MEDIA_ROOT, for X-Accel-Redirect
+    IMAGE_SENDFILE_PREFIX: str = "/protected-media/"
+    # How long browsers may reuse served media before revalidating, in seconds
+    IMAGE_MEDIA_MAX_AGE: int = 24 * 60 * 60
+    # Default storage limits per user and per organization; None is
+    # unlimited. A StorageUsage row's own quota takes precedence.
+    IMAGE_USER_BYTE_QUOTA: Optional[int] = None
+    IMAGE_USER_IMAGE_QUOTA: Optional[int] = None
+    IMAGE_ORGANIZATION_BYTE_QUOTA: Optional[int] = None
+    IMAGE_ORGANIZATION_IMAGE_QUOTA: Optional[int] = None
+    # Dotted path of the KeyLayout deciding where new images are stored
+    IMAGE_KEY_LAYOUT: str = "services.key_layouts.ShardedKeyLayout"
+    # Widths, in pixels, of the resized variants generated on upload
+    IMAGE_VARIANT_WIDTHS: List[int] = [160, 480, 1080]
+    # Largest accepted image, in pixels per frame
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    # Most frames accepted in an animated image
+    IMAGE_MAX_FRAMES: int = 500
+    # Largest Hamming distance between perceptual hashes at which an upload
+    # is flagged as a near duplicate of an earlier image; None disables it
+    IMAGE_NEAR_DUPLICATE_DISTANCE: Optional[int] = 6
+    # Re-encode uploads to this format on ingest; None stores them as sent
+    IMAGE_TRANSCODE_FORMAT: Optional[Literal["webp", "avif"]] = None
+    # Encoder quality used when re-encoding
+    IMAGE_TRANSCODE_QUALITY: int = 80
+    # Lower the quality until re-encoded images fit in this many bytes
+    IMAGE_TRANSCODE_MAX_BYTES: Optional[int] = None
+
+
+MEDIA_CONFIG = MediaConfig()
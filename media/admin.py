@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 from config.admin import admin_site
-from media.features.image.models import Image
+from media.features.image.models import Image, StorageUsage, StoredImage
+from services.image_backends import get_image_service
 
 
 class ImagesAdmin(admin.ModelAdmin):
@@ -25,6 +26,14 @@ class ImagesAdmin(admin.ModelAdmin):
     ]
     ordering = ["-created"]
 
+    # Deletes go through the image service so stored content and storage
+    # usage are released like they are for API deletes.
+    def delete_model(self, request, obj):
+        get_image_service().delete_image_records([obj])
+
+    def delete_queryset(self, request, queryset):
+        get_image_service().delete_image_records(list(queryset))
+
     # def has_add_permission(self, request):
     #     # Disable manual addition of Images through
     # the admin interface, since uploads are managed via API.
@@ -32,3 +41,57 @@ class ImagesAdmin(admin.ModelAdmin):
 
 
 admin_site.register(Image, ImagesAdmin)
+
+
+class StoredImagesAdmin(admin.ModelAdmin):
+    list_display = [
+        "image_key",
+        "storage_backend",
+        "reference_count",
+        "original_byte_size",
+        "byte_size",
+        "created",
+    ]
+    search_fields = [
+        "image_key",
+        "content_hash",
+    ]
+    readonly_fields = [
+        "uuid",
+        "storage_backend",
+        "content_hash",
+        "image_key",
+        "original_byte_size",
+        "byte_size",
+        "reference_count",
+    ]
+    ordering = ["-created"]
+
+
+admin_site.register(StoredImage, StoredImagesAdmin)
+
+
+class StorageUsageAdmin(admin.ModelAdmin):
+    list_display = [
+        "user",
+        "organization",
+        "byte_count",
+        "image_count",
+        "byte_quota",
+        "image_quota",
+    ]
+    search_fields = [
+        "user__email",
+        "organization__name",
+    ]
+    # Counters are maintained by uploads and recompute_storage_usage.
+    readonly_fields = [
+        "uuid",
+        "user",
+        "organization",
+        "byte_count",
+        "image_count",
+    ]
+
+
+admin_site.register(StorageUsage, StorageUsageAdmin)
@@ -1,15 +1,64 @@
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from media.features.image.models import Image
+from authentication.models import Membership
+from media.features.image.models import Image, ResumableUpload
 from media.features.image.serializers import (
+    ConfirmUploadSerializer,
+    GetImagesSerializer,
+    ImageBulkDeleteSerializer,
+    ImageBulkUpdateSerializer,
+    ImageListSerializer,
     ImageSerializer,
     ImageUploadSerializer,
+    ImageURLBatchSerializer,
+    PresignUploadSerializer,
+    ResumableUploadSerializer,
 )
-from services.image_service import ImageService
+from media.features.image.upload_handlers import S3MultipartUploadHandler
+from services.base_image_service import MAX_IMAGE_SIZE
+from services.image_backends import get_image_service
+from services.local_storage_service import serve_local_file
+
+# ``<stem>_480w.webp``: the width a variant key was rendered at
+VARIANT_WIDTH = re.compile(r"_(\d+)w(?:\.[^./]*)?$")
+
+
+def batch_status(results):
+    """
+    Pick the response status for a list of per-item results.
+    """
+    failed = sum("error" in result for result in results)
+    if failed == 0:
+        return status.HTTP_201_CREATED
+    if failed < len(results):
+        return status.HTTP_207_MULTI_STATUS
+    return status.HTTP_400_BAD_REQUEST
+
+
+def describe_upload(response, upload):
+    """
+    Report a resumable upload's progress in the body and tus-style headers.
+    """
+    expires = upload.created.timestamp() + (
+        settings.MEDIA_CONFIG.IMAGE_RESUMABLE_UPLOAD_EXPIRY
+    )
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.length)
+    response["Upload-Expires"] = http_date(expires)
+    add_never_cache_headers(response)
+    return response
 
 
 class ImageUploadView(APIView):
@@ -22,7 +71,25 @@ class ImageUploadView(APIView):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.image_service = ImageService()
+        self.image_service = get_image_service()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        # Runs after authentication and permission checks but before the
+        # body is parsed, so only authorised uploads reach S3.
+        if (
+            settings.MEDIA_CONFIG.IMAGE_STREAMING_UPLOADS
+            and self.image_service.storage_backend == "s3"
+        ):
+            request.upload_handlers = [
+                S3MultipartUploadHandler(
+                    request,
+                    image_service=self.image_service,
+                    owner_id=request.user.uuid,
+                ),
+                *request.upload_handlers,
+            ]
 
     def post(self, request):
         """
@@ -42,19 +109,376 @@ class ImageUploadView(APIView):
                 serializer.validated_data["images"],
                 uploaded_by=request.user,
             )
-            return Response(uploaded_images, status=status.HTTP_201_CREATED)
         except ValueError as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        return Response(uploaded_images, status=batch_status(uploaded_images))
+
+
+class ResumableUploadView(APIView):
+    """
+    Start an upload that is sent in chunks and survives dropped connections.
+
+    The client then PATCHes chunks to the returned ``Location`` with
+    ``Upload-Offset`` set to the bytes already received, checks progress
+    with HEAD after a failure, and POSTs to ``complete/`` once every byte
+    has arrived.
+    """
+
+    serializer_class = ResumableUploadSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            upload = self.image_service.create_resumable_upload(
+                **serializer.validated_data, uploaded_by=request.user
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = Response(
+            {"uuid": str(upload.uuid), "offset": 0, "length": upload.length},
+            status=status.HTTP_201_CREATED,
+        )
+        response["Location"] = reverse(
+            "resumable_upload", kwargs={"upload_id": upload.uuid}
+        )
+        return describe_upload(response, upload)
+
+
+class ResumableUploadDetailView(APIView):
+    """
+    Report, extend or cancel a resumable upload.
+    """
+
+    chunk_content_type = "application/offset+octet-stream"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def head(self, request, upload_id):
+        try:
+            upload = self.image_service.get_resumable_upload(
+                upload_id, request.user
+            )
+        except ResumableUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return describe_upload(Response(status=status.HTTP_200_OK), upload)
+
+    def patch(self, request, upload_id):
+        if request.content_type != self.chunk_content_type:
+            return Response(
+                {"error": f"Chunks must be sent as {self.chunk_content_type}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            size = int(request.headers.get("Content-Length") or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Upload-Offset and Content-Length are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if size > MAX_IMAGE_SIZE:
+            return Response(
+                {"error": "Image file too large"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        # Read the raw body once; DRF's parsers would buffer it again.
+        data = request.stream.read(size) if size else b""
+        if len(data) != size:
+            return Response(
+                {"error": "Chunk was cut short"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            upload = self.image_service.append_resumable_upload(
+                upload_id, request.user, offset, data
+            )
+        except ResumableUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return describe_upload(
+            Response(status=status.HTTP_204_NO_CONTENT), upload
+        )
+
+    def delete(self, request, upload_id):
+        try:
+            self.image_service.abort_resumable_upload(upload_id, request.user)
+        except ResumableUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CompleteResumableUploadView(APIView):
+    """
+    Create the Image for a resumable upload once every byte has arrived.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request, upload_id):
+        try:
+            result = self.image_service.complete_resumable_upload(
+                upload_id, request.user
+            )
+        except ResumableUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(result, status=batch_status([result]))
+
+
+class PresignedUploadView(APIView):
+    """
+    Issue presigned parameters so clients upload straight to storage.
+    """
+
+    serializer_class = PresignUploadSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            uploads = self.image_service.presign_uploads(
+                serializer.validated_data["files"], uploaded_by=request.user
+            )
+        except NotImplementedError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(uploads, status=batch_status(uploads))
+
+
+class ConfirmUploadView(APIView):
+    """
+    Create Image records for files uploaded with presigned parameters.
+    """
+
+    serializer_class = ConfirmUploadSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        confirmed = self.image_service.confirm_uploads(
+            serializer.validated_data["tokens"], uploaded_by=request.user
+        )
+        return Response(confirmed, status=batch_status(confirmed))
+
+
+class ImageListView(APIView):
+    """
+    List the caller's images, newest first, a page at a time.
+    """
+
+    serializer_class = ImageListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def get_uploader_ids(self, request, **kwargs):
+        return [request.user.uuid]
+
+    def get(self, request, **kwargs):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        uploader_ids = self.get_uploader_ids(request, **kwargs)
+        try:
+            images, cursor = self.image_service.list_images(
+                uploader_ids,
+                cursor=serializer.validated_data.get("cursor"),
+                limit=serializer.validated_data["limit"],
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Sign the whole page in one pass instead of once per image.
+        urls = self.image_service.get_image_urls(
+            image.image_key for image in images
+        )
+        results = GetImagesSerializer(
+            images, many=True, context={"image_urls": urls}
+        ).data
+        return Response(
+            {"results": results, "next": cursor}, status=status.HTTP_200_OK
+        )
+
+
+class OrganizationImageListView(ImageListView):
+    """
+    List images uploaded by members of an organization the caller is in.
+    """
+
+    def get_uploader_ids(self, request, org_uuid):
+        members = list(
+            Membership.objects.filter(organization__uuid=org_uuid).values_list(
+                "user_id", flat=True
+            )
+        )
+        if request.user.uuid not in members:
+            raise Http404("Organization not found")
+        return members
+
+
+class ImageURLBatchView(APIView):
+    """
+    Return URLs for many of the caller's images in one call.
+    """
+
+    serializer_class = ImageURLBatchSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        keys = serializer.validated_data["image_keys"]
+        owned = Image.objects.filter(
+            uploaded_by=request.user, image_key__in=keys
+        ).values_list("image_key", flat=True)
+        urls = self.image_service.get_image_urls(
+            owned, expiration=serializer.validated_data["expiration"]
+        )
+        return Response(
+            {"urls": {key: urls.get(key) for key in keys}},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ImageBulkDeleteView(APIView):
+    """
+    Delete many of the caller's images in one call.
+    """
+
+    serializer_class = ImageBulkDeleteSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = self.image_service.delete_images(
+            serializer.validated_data["image_uuids"], user=request.user
+        )
+        failed = sum("error" in result for result in results)
+        if failed == len(results):
+            response_status = status.HTTP_404_NOT_FOUND
+        elif failed or any("failed_keys" in result for result in results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(results, status=response_status)
+
+
+class ImageBulkUpdateView(APIView):
+    """
+    Edit the description or file name of many of the caller's images.
+    """
+
+    serializer_class = ImageBulkUpdateSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = self.image_service.update_images(
+            serializer.validated_data["images"], user=request.user
+        )
+        failed = sum("error" in result for result in results)
+        if failed == len(results):
+            response_status = status.HTTP_404_NOT_FOUND
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(results, status=response_status)
+
+
+class ImageFileView(APIView):
+    """
+    Serve an image stored by the local backend, or one of its variants, to
+    its owner.
+
+    Only the access check runs in Django; the front proxy sends the bytes
+    when ``IMAGE_SENDFILE_BACKEND`` is set. For nginx, map the internal
+    prefix onto MEDIA_ROOT::
+
+        location /protected-media/ {
+            internal;
+            alias /usr/src/app/media/;
+        }
+    """
+
+    def get(self, request, key):
+        if settings.MEDIA_CONFIG.IMAGE_STORAGE_BACKEND != "local":
+            raise Http404("File not found")
+
+        owned = Q(image_key=key)
+        match = VARIANT_WIDTH.search(key)
+        if match:
+            owned |= Q(variants__contains={match.group(1): key})
+        if not Image.objects.filter(owned, uploaded_by=request.user).exists():
+            raise Http404("File not found")
+
+        return serve_local_file(request, key)
+
 
 class GetDeleteImageView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_service = get_image_service()
+
     def get(self, request, image_id):
         try:
-            image = ImageService.get_image(image_id)
+            image = self.image_service.get_image(image_id)
             serializer = ImageSerializer(image)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Image.DoesNotExist:
@@ -64,5 +488,5 @@ class GetDeleteImageView(APIView):
 
     def delete(self, request, image_id):
         # Call the delete_image function with the provided image_id
-        ImageService.delete_image(image_id, request.user)
+        self.image_service.delete_image(image_id, request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
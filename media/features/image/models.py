@@ -12,10 +12,150 @@ class Image(TrackObjectStateMixin):
     image_key = models.CharField(max_length=255, blank=True, null=True)
     original_file_name = models.TextField(blank=True, null=True)
     description = models.CharField(max_length=255, blank=True, null=True)
+    content_hash = models.CharField(
+        max_length=64, blank=True, null=True, db_index=True
+    )
+    # Resized copies keyed by width in pixels, e.g. {"480": "images/..."}
+    variants = models.JSONField(default=dict, blank=True)
+    # Size of the file as uploaded and as stored, after any re-encoding
+    original_byte_size = models.PositiveIntegerField(blank=True, null=True)
+    byte_size = models.PositiveIntegerField(blank=True, null=True)
+    # Extracted on upload so clients can lay images out before loading them
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    content_type = models.CharField(max_length=100, blank=True, null=True)
+    orientation = models.PositiveSmallIntegerField(blank=True, null=True)
+    dominant_color = models.CharField(max_length=7, blank=True, null=True)
+    blurhash = models.CharField(max_length=64, blank=True, null=True)
+    # 64-bit dHash in hex; close hashes mean visually similar images
+    perceptual_hash = models.CharField(max_length=16, blank=True, null=True)
+    near_duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="near_duplicates",
+    )
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's images, newest first
+            models.Index(
+                fields=["uploaded_by", "created", "uuid"],
+                name="image_owner_created_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.image_key}"
+
+    @property
+    def bytes_saved(self) -> int:
+        if self.original_byte_size is None or self.byte_size is None:
+            return 0
+        return self.original_byte_size - self.byte_size
+
+
+class StoredImage(TrackObjectStateMixin):
+    """
+    A stored object shared by every Image with the same content.
+    """
+
+    storage_backend = models.CharField(max_length=20)
+    content_hash = models.CharField(max_length=64)
+    image_key = models.CharField(max_length=255)
+    variants = models.JSONField(default=dict, blank=True)
+    original_byte_size = models.PositiveIntegerField(blank=True, null=True)
+    byte_size = models.PositiveIntegerField(blank=True, null=True)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    content_type = models.CharField(max_length=100, blank=True, null=True)
+    orientation = models.PositiveSmallIntegerField(blank=True, null=True)
+    dominant_color = models.CharField(max_length=7, blank=True, null=True)
+    blurhash = models.CharField(max_length=64, blank=True, null=True)
+    perceptual_hash = models.CharField(max_length=16, blank=True, null=True)
+    reference_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("storage_backend", "content_hash")
+
+    def __str__(self) -> str:
+        return f"{self.image_key} ({self.reference_count})"
+
+
+class ResumableUpload(TrackObjectStateMixin):
+    """
+    An image sent in chunks, so a dropped connection resumes from ``offset``
+    instead of starting over.
+    """
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    storage_backend = models.CharField(max_length=20)
+    file_name = models.TextField()
+    content_type = models.CharField(max_length=100)
+    # Declared total size and bytes received so far
+    length = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    # Read from the first chunk
+    image_format = models.CharField(max_length=10, blank=True, null=True)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    # Object key, multipart upload ID and sent parts, for backends that
+    # assemble the file in storage
+    key = models.CharField(max_length=255, blank=True, null=True)
+    upload_id = models.CharField(max_length=255, blank=True, null=True)
+    parts = models.JSONField(default=list, blank=True)
+    # Set while a request turns the upload into an Image
+    completing_since = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"{self.file_name} ({self.offset}/{self.length})"
+
+
+class StorageUsage(TrackObjectStateMixin):
+    """
+    Running totals of what a user, or an organization's members, store.
+
+    Counters move with every upload and delete, so quotas are checked
+    without aggregating Image rows; ``recompute_storage_usage`` corrects
+    any drift. Quotas left empty fall back to the MEDIA_CONFIG defaults.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="storage_usage",
+    )
+    organization = models.OneToOneField(
+        "authentication.Organization",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="storage_usage",
+    )
+    byte_count = models.PositiveBigIntegerField(default=0)
+    image_count = models.PositiveIntegerField(default=0)
+    byte_quota = models.PositiveBigIntegerField(blank=True, null=True)
+    image_quota = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user__isnull=True)
+                ^ models.Q(organization__isnull=True),
+                name="storage_usage_single_owner",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        owner = self.user_id or self.organization_id
+        return f"{owner}: {self.byte_count} bytes, {self.image_count} images"
@@ -1,9 +1,7 @@
 from rest_framework import serializers
 
 from media.features.image.models import Image
-from services.image_service import ImageService
-
-image_service = ImageService()
+from services.image_backends import get_image_service
 
 
 class ImageUploadSerializer(serializers.Serializer):
@@ -19,8 +17,73 @@ class ImageUploadSerializer(serializers.Serializer):
         )
     )
 
+
+class PresignFileSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+
+
+class PresignUploadSerializer(serializers.Serializer):
+    """
+    Serializer for requesting direct-to-storage upload parameters.
+    """
+
+    files = serializers.ListField(
+        child=PresignFileSerializer(), allow_empty=False, max_length=50
+    )
+
+
+class ConfirmUploadSerializer(serializers.Serializer):
+    """
+    Serializer for confirming direct-to-storage uploads.
+    """
+
+    tokens = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=50
+    )
+
+
+class ResumableUploadSerializer(serializers.Serializer):
+    """
+    Serializer for starting a resumable upload.
+    """
+
+    file_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    # Total size of the file in bytes
+    length = serializers.IntegerField(min_value=1)
+
+
+class ImageListSerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of image listings.
+    """
+
+    cursor = serializers.CharField(required=False, max_length=200)
+    limit = serializers.IntegerField(
+        required=False, default=50, min_value=1, max_value=200
+    )
+
+
+class ImageURLBatchSerializer(serializers.Serializer):
+    """
+    Serializer for requesting URLs for many images at once.
+    """
+
+    image_keys = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=500,
+    )
+    expiration = serializers.IntegerField(
+        min_value=60, max_value=7 * 24 * 60 * 60, default=3600
+    )
+
+
 class ImageSerializer(serializers.ModelSerializer):
     # For fetching image data
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Image
         fields = [
@@ -28,9 +91,64 @@ class ImageSerializer(serializers.ModelSerializer):
             "image_key",
             "original_file_name",
             "uploaded_by",
+            "width",
+            "height",
+            "byte_size",
+            "content_type",
+            "orientation",
+            "dominant_color",
+            "blurhash",
+            "near_duplicate_of",
+            "srcset",
         ]
         read_only_fields = fields  # All fields read-only for fetching
 
+    def get_srcset(self, obj):
+        # Map of width in pixels to URL of the resized variant
+        urls = get_image_service().get_image_urls(obj.variants.values())
+        return {width: urls[key] for width, key in obj.variants.items()}
+
+
+class ImageBulkDeleteSerializer(serializers.Serializer):
+    """
+    Serializer for deleting many images at once.
+    """
+
+    image_uuids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=1000
+    )
+
+
+class ImageMetadataSerializer(serializers.Serializer):
+    uuid = serializers.UUIDField()
+    description = serializers.CharField(
+        max_length=255, required=False, allow_blank=True, allow_null=True
+    )
+    original_file_name = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True
+    )
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError("No fields to update.")
+        return attrs
+
+
+class ImageBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for editing the metadata of many images at once.
+    """
+
+    images = serializers.ListField(
+        child=ImageMetadataSerializer(), allow_empty=False, max_length=1000
+    )
+
+    def validate_images(self, images):
+        uuids = [image["uuid"] for image in images]
+        if len(set(uuids)) != len(uuids):
+            raise serializers.ValidationError("Duplicate image UUIDs.")
+        return images
+
 
 class ImageDeleteSerializer(serializers.Serializer):
     image_uuid = serializers.UUIDField()
@@ -55,9 +173,17 @@ class GetImagesSerializer(serializers.ModelSerializer):
             "uuid",
             "image_key",
             "created",
+            "width",
+            "height",
+            "dominant_color",
+            "blurhash",
             "image_url",
         ]
 
     def get_image_url(self, obj):
-        # Dynamically fetch the image URL based on the image_key
-        return image_service.get_image_url(obj.image_key)
+        # Views listing many images can sign the whole page up front
+        # and pass the result in as ``image_urls``.
+        image_urls = self.context.get("image_urls")
+        if image_urls is not None and obj.image_key in image_urls:
+            return image_urls[obj.image_key]
+        return get_image_service().get_cached_image_url(obj.image_key)
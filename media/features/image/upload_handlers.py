@@ -0,0 +1,267 @@
+import hashlib
+import io
+import logging
+import tempfile
+from collections import deque
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.core.files.uploadhandler import FileUploadHandler
+
+from services.base_image_service import (
+    IMAGE_CONTENT_TYPES,
+    MAX_IMAGE_SIZE,
+    SPOOL_SIZE,
+    StoredUploadedFile,
+    check_image_info,
+)
+from services.executors import get_io_executor
+from services.image_validation import read_image_info
+from services.storage_quotas import QUOTA_EXCEEDED, remaining_quota
+
+logger = logging.getLogger(__name__)
+
+
+class S3UploadedFile(StoredUploadedFile):
+    """
+    A file whose bytes were streamed to S3 while the request was parsed.
+
+    ``key`` is ``None`` when the upload was rejected or failed part way.
+    """
+
+
+class S3MultipartUploadHandler(FileUploadHandler):
+    """
+    Upload handler that pipes image parts straight into S3.
+
+    Bytes are buffered only up to ``part_size`` per file. Files smaller than
+    one part are written with a single ``put_object``; larger files start an
+    S3 multipart upload as soon as the first part is full and send parts on
+    the shared I/O pool while the rest of the body is still arriving.
+
+    Files that are not images are passed through untouched to the next
+    handler, so the image service can reject them as usual. Images whose
+    dimensions are over the limit stop being sent after the first chunk.
+    Frames can only be counted from the whole file, so formats that may be
+    animated are also copied to a spooled temporary file on the way.
+
+    The uploader's remaining quota is read before the body is parsed, and a
+    file stops being sent as soon as it no longer fits.
+    """
+
+    # S3's minimum size for every part but the last
+    part_size = 5 * 1024 * 1024
+    max_parts_in_flight = 2
+
+    def __init__(self, request=None, image_service=None, owner_id=None):
+        super().__init__(request)
+        self.image_service = image_service
+        self.owner_id = owner_id
+        # Bytes and images the uploader may still store; None is unlimited
+        self.bytes_left = None
+        self.images_left = None
+        self._reset()
+
+    def _reset(self):
+        self.active = False
+        self.key = None
+        self.upload_id = None
+        self.buffer = bytearray()
+        self.parts = []
+        self.in_flight = deque()
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.image_info = None
+        self.copy = None
+        self.failed = False
+        self.error = None
+
+    @property
+    def s3_client(self):
+        return self.image_service.s3_client
+
+    @property
+    def bucket_name(self):
+        return self.image_service.bucket_name
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        if self.request is not None:
+            self.bytes_left, self.images_left = remaining_quota(
+                self.request.user
+            )
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        self._reset()
+        if content_type in IMAGE_CONTENT_TYPES:
+            self.active = True
+            self.key = self.image_service.build_key(self.owner_id, file_name)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if start == 0:
+            info = read_image_info(io.BytesIO(raw_data), count_frames=False)
+            if info is None:
+                # Not an image, or its header does not fit in the first
+                # chunk; let the next handler buffer it so the service can
+                # validate it fully.
+                self.active = False
+                return raw_data
+            self.image_info = info
+            try:
+                check_image_info(info, 0)
+            except ValueError:
+                # The service reports why from ``image_info``.
+                self.failed = True
+            if self.images_left is not None and self.images_left < 1:
+                self._refuse(QUOTA_EXCEEDED)
+            if info.format != "jpeg":
+                self.copy = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+        self.received += len(raw_data)
+        if self.failed:
+            return None
+
+        if self.received > MAX_IMAGE_SIZE:
+            self._abort()
+            return None
+        if self.bytes_left is not None and self.received > self.bytes_left:
+            self._refuse(QUOTA_EXCEEDED)
+            return None
+
+        if self.copy is not None:
+            self.copy.write(raw_data)
+        self.digest.update(raw_data)
+        self.buffer.extend(raw_data)
+        if len(self.buffer) >= self.part_size:
+            self._send_part()
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+
+        if self.copy is not None:
+            if not self.failed:
+                self.image_info = read_image_info(self.copy)
+                try:
+                    check_image_info(self.image_info, 0)
+                except ValueError:
+                    self._abort()
+            self.copy.close()
+        if not self.failed:
+            self._finish()
+        if not self.failed:
+            # Later files in the request must fit in what is left.
+            if self.bytes_left is not None:
+                self.bytes_left -= self.received
+            if self.images_left is not None:
+                self.images_left -= 1
+
+        uploaded = S3UploadedFile(
+            key=None if self.failed else self.key,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.received,
+            content_hash=self.digest.hexdigest(),
+            charset=self.charset,
+            image_info=self.image_info,
+            error=self.error,
+        )
+        self._reset()
+        return uploaded
+
+    def upload_interrupted(self):
+        if self.active:
+            self._abort()
+            if self.copy is not None:
+                self.copy.close()
+
+    def _finish(self):
+        try:
+            if self.upload_id is None:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    Body=bytes(self.buffer),
+                    ContentType=self.content_type,
+                    ACL="private",
+                )
+                return
+
+            if self.buffer:
+                self._send_part()
+            if self.failed:
+                return
+            self._wait_for_parts(0)
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Streaming upload of %s failed: %s", self.key, e)
+            self._abort()
+
+    def _send_part(self):
+        try:
+            if self.upload_id is None:
+                response = self.s3_client.create_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    ContentType=self.content_type,
+                    ACL="private",
+                )
+                self.upload_id = response["UploadId"]
+
+            part_number = len(self.parts) + len(self.in_flight) + 1
+            body = bytes(self.buffer)
+            self.buffer = bytearray()
+            future = get_io_executor().submit(
+                self.s3_client.upload_part,
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            self.in_flight.append((part_number, future))
+            self._wait_for_parts(self.max_parts_in_flight)
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Streaming upload of %s failed: %s", self.key, e)
+            self._abort()
+
+    def _wait_for_parts(self, keep):
+        # Bounds memory to ``max_parts_in_flight`` parts per file.
+        while len(self.in_flight) > keep:
+            part_number, future = self.in_flight.popleft()
+            response = future.result()
+            self.parts.append(
+                {"PartNumber": part_number, "ETag": response["ETag"]}
+            )
+
+    def _refuse(self, error):
+        self.error = error
+        self._abort()
+
+    def _abort(self):
+        self.failed = True
+        self.buffer = bytearray()
+        for _, future in self.in_flight:
+            future.cancel()
+        self.in_flight.clear()
+        if self.upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id,
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.error("Aborting upload of %s failed: %s", self.key, e)
+        self.upload_id = None
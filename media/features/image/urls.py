@@ -1,12 +1,58 @@
 from django.urls import path
 
 from media.api.image import (
+    CompleteResumableUploadView,
+    ConfirmUploadView,
     # GetDeleteImageView,
+    ImageBulkDeleteView,
+    ImageBulkUpdateView,
+    ImageFileView,
+    ImageListView,
     ImageUploadView,
+    ImageURLBatchView,
+    OrganizationImageListView,
+    PresignedUploadView,
+    ResumableUploadDetailView,
+    ResumableUploadView,
 )
 
 urlpatterns = [
+    path("", ImageListView.as_view(), name="list_images"),
+    path(
+        "organizations/<uuid:org_uuid>/",
+        OrganizationImageListView.as_view(),
+        name="list_organization_images",
+    ),
     path("upload/", ImageUploadView.as_view(), name="upload_image"),
+    path(
+        "upload/presign/",
+        PresignedUploadView.as_view(),
+        name="presign_image_upload",
+    ),
+    path(
+        "upload/confirm/",
+        ConfirmUploadView.as_view(),
+        name="confirm_image_upload",
+    ),
+    path(
+        "uploads/",
+        ResumableUploadView.as_view(),
+        name="resumable_uploads",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/",
+        ResumableUploadDetailView.as_view(),
+        name="resumable_upload",
+    ),
+    path(
+        "uploads/<uuid:upload_id>/complete/",
+        CompleteResumableUploadView.as_view(),
+        name="complete_resumable_upload",
+    ),
+    path("urls/", ImageURLBatchView.as_view(), name="image_urls"),
+    path("delete/", ImageBulkDeleteView.as_view(), name="bulk_delete_images"),
+    path("update/", ImageBulkUpdateView.as_view(), name="bulk_update_images"),
+    path("files/<path:key>", ImageFileView.as_view(), name="image_file"),
     # path(
     #     "<uuid:image_id>/",
     #     GetDeleteImageView.as_view(),
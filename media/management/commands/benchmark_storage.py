@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.storage import BACKENDS, run_benchmark
+
+SIZE_UNITS = {"kb": 1024, "mb": 1024 * 1024}
+
+
+def parse_size(value):
+    value = value.strip().lower()
+    for unit, factor in SIZE_UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[: -len(unit)]) * factor)
+    return int(value)
+
+
+def parse_list(value, parse):
+    try:
+        return [parse(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise CommandError(f"Invalid list: {value}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure upload, URL generation and delete throughput for each "
+        "storage backend against local stand-ins, and print the results "
+        "as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends",
+            default=",".join(BACKENDS),
+            help="Comma-separated backends to run",
+        )
+        parser.add_argument(
+            "--sizes",
+            default="64kb,1mb,8mb",
+            help="Comma-separated file sizes, e.g. 64kb,1mb",
+        )
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32",
+            help="Comma-separated worker thread counts",
+        )
+        parser.add_argument(
+            "--operations",
+            type=int,
+            default=50,
+            help="Objects per backend, size and concurrency",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report here instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        backends = parse_list(options["backends"], str.strip)
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(unknown)}")
+        sizes = parse_list(options["sizes"], parse_size)
+        concurrency = parse_list(options["concurrency"], int)
+        if options["operations"] < 1 or min(sizes + concurrency) < 1:
+            raise CommandError("Sizes, concurrency and operations must be >0")
+
+        report = json.dumps(
+            run_benchmark(backends, sizes, concurrency, options["operations"]),
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,196 @@
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from media.features.image.models import Image, StoredImage
+from services.base_image_service import variant_key
+from services.executors import run_bounded
+from services.image_backends import IMAGE_SERVICES, get_image_service
+from services.key_layouts import get_key_layout
+
+
+class Command(BaseCommand):
+    help = (
+        "Move stored images to the keys given by IMAGE_KEY_LAYOUT and "
+        "rewrite image_key in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            choices=sorted(IMAGE_SERVICES),
+            default=settings.MEDIA_CONFIG.IMAGE_STORAGE_BACKEND,
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Stored images moved per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the keys that would move",
+        )
+
+    def handle(self, *args, **options):
+        self.image_service = get_image_service(options["backend"])
+        self.layout = get_key_layout()
+        self.dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        moved = failed = 0
+        # Shared content first, then images that own their object outright.
+        stored_images = StoredImage.objects.filter(
+            storage_backend=self.image_service.storage_backend
+        )
+        for batch in _batches(stored_images, batch_size):
+            done, errors = self._migrate_stored(batch)
+            moved, failed = moved + done, failed + errors
+        for batch in _batches(
+            Image.objects.filter(content_hash__isnull=True), batch_size
+        ):
+            done, errors = self._migrate_images(batch)
+            moved, failed = moved + done, failed + errors
+
+        verb = "Would move" if self.dry_run else "Moved"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {moved} images; {failed} failed")
+        )
+
+    def _new_keys(self, key: str, variants: Dict[str, str], owner_id) -> Dict:
+        file_name = key.rsplit("/", 1)[-1]
+        new_key = self.layout.build_key(str(owner_id), file_name)
+        if new_key == key:
+            return {}
+
+        moves = {key: new_key}
+        for width, old in variants.items():
+            _, dot, extension = old.rpartition(".")
+            moves[old] = variant_key(new_key, width, extension if dot else "")
+        return moves
+
+    def _migrate_stored(self, batch: List[StoredImage]) -> Tuple[int, int]:
+        # Collections are not recorded on the row, so owner-based layouts
+        # file shared content under its first uploader.
+        owners = {}
+        for content_hash, owner_id in (
+            Image.objects.filter(
+                content_hash__in=[row.content_hash for row in batch]
+            )
+            .order_by("created")
+            .values_list("content_hash", "uploaded_by_id")
+        ):
+            owners.setdefault(content_hash, owner_id)
+
+        plans = {}
+        for stored_image in batch:
+            # Rows nothing references any more keep their key.
+            owner_id = owners.get(stored_image.content_hash)
+            if owner_id is None:
+                continue
+            moves = self._new_keys(
+                stored_image.image_key, stored_image.variants, owner_id
+            )
+            if moves:
+                plans[stored_image.pk] = moves
+
+        return self._apply(
+            plans,
+            StoredImage.objects.select_for_update().filter(pk__in=plans),
+        )
+
+    def _migrate_images(self, batch: List[Image]) -> Tuple[int, int]:
+        # Rows without stored content do not record their backend; only
+        # those whose object is in this one are moved.
+        stored = self.image_service.find_stored_keys(
+            [image.image_key for image in batch if image.image_key]
+        )
+        plans = {}
+        for image in batch:
+            if image.image_key not in stored:
+                continue
+            moves = self._new_keys(
+                image.image_key, image.variants, image.uploaded_by_id
+            )
+            if moves:
+                plans[image.pk] = moves
+
+        return self._apply(
+            plans, Image.objects.select_for_update().filter(pk__in=plans)
+        )
+
+    def _apply(self, plans: Dict, rows) -> Tuple[int, int]:
+        """
+        Copy the objects, point the rows at the copies, then drop the old
+        objects once the new keys are committed.
+        """
+        for moves in plans.values():
+            for old, new in moves.items():
+                self.stdout.write(f"{old} -> {new}")
+        if self.dry_run or not plans:
+            return len(plans), 0
+
+        copies = [
+            (pk, old, new)
+            for pk, moves in plans.items()
+            for old, new in moves.items()
+        ]
+        outcomes = run_bounded(
+            lambda copy: self.image_service.copy_stored_object(*copy[1:]),
+            copies,
+            settings.MEDIA_CONFIG.IMAGE_UPLOAD_CONCURRENCY,
+        )
+        broken = set()
+        for (pk, old, _), (_, error) in zip(copies, outcomes):
+            if error is not None:
+                self.stderr.write(f"Could not copy {old}: {error}")
+                broken.add(pk)
+        # Leave rows with a failed copy untouched and drop their new copies.
+        leftovers = [
+            new for pk in broken for old, new in plans.pop(pk).items()
+        ]
+
+        with transaction.atomic():
+            locked = list(rows.filter(pk__in=plans))
+            moves = {}
+            for row in locked:
+                moves.update(plans[row.pk])
+                self._rekey(row, plans[row.pk])
+            rows.model.objects.bulk_update(locked, ["image_key", "variants"])
+            # Images sharing stored content follow it; the lock on the
+            # StoredImage rows keeps new uploads from pointing at old keys.
+            images = list(
+                Image.objects.filter(image_key__in=moves).exclude(
+                    pk__in=[row.pk for row in locked]
+                )
+            )
+            for image in images:
+                self._rekey(image, moves)
+            Image.objects.bulk_update(images, ["image_key", "variants"])
+
+        self.image_service.delete_stored_objects(list(moves) + leftovers)
+        return len(locked), len(broken)
+
+    def _rekey(self, row, moves: Dict[str, str]) -> None:
+        row.image_key = moves.get(row.image_key, row.image_key)
+        row.variants = {
+            width: moves.get(key, key) for width, key in row.variants.items()
+        }
+
+
+def _batches(queryset, size: int):
+    """
+    Walk a queryset in primary-key order, ``size`` rows at a time.
+    """
+    queryset = queryset.order_by("pk")
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        batch = list(page[:size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1].pk
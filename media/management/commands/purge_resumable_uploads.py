@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from media.features.image.models import ResumableUpload
+from services.image_backends import IMAGE_SERVICES, get_image_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Abort resumable uploads left unfinished past "
+        "IMAGE_RESUMABLE_UPLOAD_EXPIRY and free their storage."
+    )
+
+    def handle(self, *args, **options):
+        total = 0
+        for backend in IMAGE_SERVICES:
+            # Backends nobody uploaded to need not be configured.
+            if not ResumableUpload.objects.filter(
+                storage_backend=backend
+            ).exists():
+                continue
+            total += get_image_service(backend).purge_expired_uploads()
+        self.stdout.write(
+            self.style.SUCCESS(f"Removed {total} expired uploads")
+        )
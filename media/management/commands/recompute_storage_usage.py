@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from services.storage_quotas import recompute_storage_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount each user's and organization's stored bytes and images "
+        "from the Image table and correct counters that drifted."
+    )
+
+    def handle(self, *args, **options):
+        corrected = recompute_storage_usage()
+        self.stdout.write(
+            self.style.SUCCESS(f"Corrected {corrected} usage counters")
+        )
@@ -0,0 +1,236 @@
+import re
+from datetime import timedelta
+from typing import Iterator, List, Tuple
+
+import boto3
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from media.features.image.models import Image, StoredImage
+from services.aws_image_service import ImageService
+
+# Every storage key the database points at, in byte order to match the S3
+# listing. ``tracked`` marks originals recorded in StoredImage for this
+# backend; only those are cleaned when their object is missing. Keys of
+# Image rows without stored content may live in another backend, so they
+# only protect objects from deletion.
+REFERENCED_KEYS_SQL = """
+    SELECT key, bool_or(tracked) FROM (
+        SELECT image_key AS key, FALSE AS tracked
+        FROM {image} WHERE image_key IS NOT NULL
+        UNION ALL
+        SELECT value, FALSE FROM {image}, jsonb_each_text(variants)
+        UNION ALL
+        SELECT image_key, TRUE FROM {stored} WHERE storage_backend = %s
+        UNION ALL
+        SELECT value, FALSE FROM {stored}, jsonb_each_text(variants)
+        WHERE storage_backend = %s
+    ) AS referenced
+    WHERE {condition}
+    GROUP BY key
+    ORDER BY key COLLATE "C"
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Find S3 objects with no image row and image rows whose object is "
+        "gone, and optionally remove them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix", default="images/", help="Only check keys under this"
+        )
+        parser.add_argument("--bucket", help="Defaults to the configured one")
+        parser.add_argument(
+            "--endpoint-url",
+            help="S3-compatible endpoint, e.g. a local MinIO or LocalStack",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Remove orphans instead of only reporting them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Orphans handled per cleanup batch",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=settings.MEDIA_CONFIG.IMAGE_UPLOAD_TOKEN_MAX_AGE,
+            help=(
+                "Ignore objects modified less than this many seconds ago, "
+                "so uploads awaiting their row are not taken for orphans"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        s3_client = None
+        if options["endpoint_url"]:
+            s3_client = boto3.client(
+                "s3",
+                endpoint_url=options["endpoint_url"],
+                aws_access_key_id=settings.AWS_CONFIG.AWS_S3_ACCESS_KEY_ID,
+                aws_secret_access_key=(
+                    settings.AWS_CONFIG.AWS_S3_SECRET_ACCESS_KEY
+                ),
+                region_name=settings.AWS_CONFIG.AWS_S3_REGION_NAME,
+            )
+        self.image_service = ImageService(
+            s3_client=s3_client, bucket_name=options["bucket"]
+        )
+        self.delete = options["delete"]
+        self.cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+
+        prefix = options["prefix"]
+        storage_orphans = []
+        db_orphans = []
+        totals = {"storage": 0, "db": 0}
+        for side, key in self._diff(self._listed_keys(prefix), prefix):
+            batch = storage_orphans if side == "storage" else db_orphans
+            batch.append(key)
+            if len(batch) >= options["batch_size"]:
+                totals[side] += self._flush(side, batch)
+                batch.clear()
+        totals["storage"] += self._flush("storage", storage_orphans)
+        totals["db"] += self._flush("db", db_orphans)
+
+        verb = "Removed" if self.delete else "Found"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {totals['storage']} objects without an image and "
+                f"{totals['db']} images without an object"
+            )
+        )
+
+    def _listed_keys(self, prefix: str) -> Iterator[Tuple[str, bool]]:
+        """
+        Stream ``(key, old_enough)`` from the bucket, one page at a time.
+        """
+        paginator = self.image_service.s3_client.get_paginator(
+            "list_objects_v2"
+        )
+        pages = paginator.paginate(
+            Bucket=self.image_service.bucket_name, Prefix=prefix
+        )
+        for page in pages:
+            for item in page.get("Contents", []):
+                yield item["Key"], item["LastModified"] <= self.cutoff
+
+    def _referenced_keys(
+        self, prefix: str = None, keys: List[str] = None
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        Stream ``(key, tracked)`` for keys the database references, through
+        a server-side cursor.
+        """
+        if keys is not None:
+            condition, params = "key = ANY(%s)", [keys]
+        else:
+            pattern = re.sub(r"([\\%_])", r"\\\1", prefix) + "%"
+            condition, params = "key LIKE %s", [pattern]
+        sql = REFERENCED_KEYS_SQL.format(
+            image=Image._meta.db_table,
+            stored=StoredImage._meta.db_table,
+            condition=condition,
+        )
+        backend = self.image_service.storage_backend
+
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(sql, [backend, backend, *params])
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    return
+                yield from rows
+
+    def _diff(
+        self, listed: Iterator[Tuple[str, bool]], prefix: str
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Merge-join two key streams sorted in byte order.
+
+        Yields ``("storage", key)`` for objects no row references and
+        ``("db", key)`` for tracked originals with no object.
+        """
+        referenced = self._referenced_keys(prefix)
+        db_key, tracked = next(referenced, (None, False))
+        for key, old_enough in listed:
+            # Code point order matches the UTF-8 byte order used by S3 and
+            # COLLATE "C".
+            while db_key is not None and db_key < key:
+                if tracked:
+                    yield "db", db_key
+                db_key, tracked = next(referenced, (None, False))
+
+            if db_key == key:
+                db_key, tracked = next(referenced, (None, False))
+            elif old_enough:
+                yield "storage", key
+
+        while db_key is not None:
+            if tracked:
+                yield "db", db_key
+            db_key, tracked = next(referenced, (None, False))
+
+    def _flush(self, side: str, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        if side == "storage":
+            return self._clean_objects(keys)
+        return self._clean_rows(keys)
+
+    def _clean_objects(self, keys: List[str]) -> int:
+        for key in keys:
+            self.stdout.write(f"Orphaned object: {key}")
+        if not self.delete:
+            return len(keys)
+
+        # Rows committed after the scan passed a key still count.
+        referenced = {key for key, _ in self._referenced_keys(keys=keys)}
+        keys = [key for key in keys if key not in referenced]
+        failures = self.image_service.delete_stored_objects(keys)
+        for key, error in failures.items():
+            self.stderr.write(f"Could not delete {key}: {error}")
+        return len(keys) - len(failures)
+
+    def _clean_rows(self, keys: List[str]) -> int:
+        for key in keys:
+            self.stdout.write(f"Missing object: {key}")
+        if not self.delete:
+            return len(keys)
+
+        # Objects stored after the listing passed a key still count.
+        missing = set(keys) - self.image_service.find_stored_keys(keys).keys()
+        # Deleting through the service releases the content, the storage
+        # usage and the near-duplicate index entries with the rows; the
+        # variants of content no image references any more go with them.
+        self.image_service.delete_image_records(
+            list(Image.objects.filter(image_key__in=missing))
+        )
+
+        # Content whose reference count drifted still points at nothing.
+        with transaction.atomic():
+            stored = list(
+                StoredImage.objects.select_for_update().filter(
+                    storage_backend=self.image_service.storage_backend,
+                    image_key__in=missing,
+                )
+            )
+            StoredImage.objects.filter(
+                pk__in=[stored_image.pk for stored_image in stored]
+            ).delete()
+        variants = [
+            key
+            for stored_image in stored
+            for key in stored_image.variants.values()
+        ]
+        if variants:
+            self.image_service.delete_stored_objects(variants)
+        return len(missing)
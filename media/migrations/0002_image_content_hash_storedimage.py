@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:55
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('storage_backend', models.CharField(max_length=20)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('image_key', models.CharField(max_length=255)),
+                ('reference_count', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'unique_together': {('storage_backend', 'content_hash')},
+            },
+        ),
+    ]
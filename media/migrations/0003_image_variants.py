@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_image_content_hash_storedimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='storedimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='byte_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='original_byte_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='storedimage',
+            name='byte_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='storedimage',
+            name='original_byte_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0004_image_byte_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="blurhash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="content_type",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="dominant_color",
+            field=models.CharField(blank=True, max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="orientation",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="blurhash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="content_type",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="dominant_color",
+            field=models.CharField(blank=True, max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="orientation",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="storedimage",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
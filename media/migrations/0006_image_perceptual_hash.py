@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0005_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='near_duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_duplicates', to='media.image'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='storedimage',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:24
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0006_image_perceptual_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumableUpload',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('storage_backend', models.CharField(max_length=20)),
+                ('file_name', models.TextField()),
+                ('content_type', models.CharField(max_length=100)),
+                ('length', models.PositiveIntegerField()),
+                ('offset', models.PositiveIntegerField(default=0)),
+                ('image_format', models.CharField(blank=True, max_length=10, null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('key', models.CharField(blank=True, max_length=255, null=True)),
+                ('upload_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('parts', models.JSONField(blank=True, default=list)),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
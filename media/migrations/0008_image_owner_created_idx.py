@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:24
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking writes to a large table
+    atomic = False
+
+    dependencies = [
+        ('media', '0007_resumableupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='image',
+            index=models.Index(fields=['uploaded_by', 'created', 'uuid'], name='image_owner_created_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_remove_otp_created_at_remove_user_organization_and_more'),
+        ('media', '0008_image_owner_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('byte_count', models.PositiveBigIntegerField(default=0)),
+                ('image_count', models.PositiveIntegerField(default=0)),
+                ('byte_quota', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('image_quota', models.PositiveIntegerField(blank=True, null=True)),
+                ('organization', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='storage_usage', to='authentication.organization')),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='storage_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('user__isnull', True), ('organization__isnull', True), _connector='XOR'), name='storage_usage_single_owner')],
+            },
+        ),
+    ]
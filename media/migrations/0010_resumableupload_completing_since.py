@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0009_storageusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumableupload',
+            name='completing_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,66 +1,54 @@
-import imghdr
+import logging
 import uuid
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
-from django.shortcuts import get_object_or_404
 
 from authentication.models import User
-from media.features.image.models import Image, generate_upload_path
-from services.s3_service import delete_image_from_s3
+from media.features.image.models import Image, ResumableUpload, StoredImage
+from services.base_image_service import (
+    MAX_IMAGE_SIZE,
+    BaseImageService,
+    StoredUploadedFile,
+)
+from services.executors import run_bounded
+from services.storage_clients import get_storage_client
 
+logger = logging.getLogger(__name__)
 
-class ImageService:
+# Most keys S3 accepts in one DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
+# Smallest part S3 accepts in a multipart upload, except for the last one
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class ImageService(BaseImageService):
     """
     Service class for handling image uploads, validations, and retrievals.
     """
 
+    storage_backend = "s3"
+
     def __init__(
         self,
         s3_client: Optional[boto3.client] = None,
         bucket_name: Optional[str] = None,
     ):
         """
-        Initialize S3 client with optional dependency injection for testing.
+        Use the shared S3 client unless one is injected for testing.
 
         Args:
             s3_client (boto3.client, optional): S3 client instance
             bucket_name (str, optional): S3 bucket name
         """
-        self.s3_client = s3_client or boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_CONFIG.AWS_S3_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_CONFIG.AWS_S3_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_CONFIG.AWS_S3_REGION_NAME,
-            endpoint_url="https://s3.af-south-1.amazonaws.com",
-        )
+        self.s3_client = s3_client or get_storage_client("s3")
         self.bucket_name = (
             bucket_name or settings.AWS_CONFIG.AWS_STORAGE_BUCKET_NAME
         )
 
-    def validate_image(self, image: UploadedFile) -> bool:
-        """
-        Validate image based on multiple criteria.
-
-        Args:
-            image (UploadedFile): Uploaded image file
-
-        Returns:
-            bool: Whether image is valid
-        """
-        # Check file size (e.g., max 10MB)
-        if image.size > 10 * 1024 * 1024:
-            return False
-
-        # Validate image type
-        valid_types = ["jpeg", "png", "gif", "webp"]
-        image_type = imghdr.what(image)
-
-        return image_type in valid_types
-
     def generate_unique_filename(self, original_filename: str) -> str:
         """
         Generate a unique filename with UUID and original extension.
@@ -75,33 +63,24 @@ class ImageService:
         unique_filename = f"{uuid.uuid4()}.{extension}"
         return unique_filename
 
-    def upload_image(
-        self,
-        image: UploadedFile,
-        folder: str,
-        uploaded_by: User,
-    ) -> Dict[str, str]:
+    def store_image(self, image: UploadedFile, key: str) -> Dict[str, str]:
         """
-        Upload single image to S3 with validation and unique naming.
+        Validate and upload a single image to S3 without saving it to the DB.
 
         Args:
             image (UploadedFile): Image file to upload
-            folder (str, optional): S3 folder path
+            key (str): S3 object key
 
         Returns:
             Dict[str, str]: Upload metadata
         """
-        if not self.validate_image(image):
-            raise ValueError("Invalid image file")
-
-        unique_filename = self.generate_unique_filename(image.name)
-        s3_key = f"{folder}{unique_filename}"
+        self.check_image(image)
 
         try:
             self.s3_client.upload_fileobj(
                 image,
                 self.bucket_name,
-                s3_key,
+                key,
                 ExtraArgs={
                     "ContentType": image.content_type,
                     "ACL": "private",  # Secure by default
@@ -110,35 +89,11 @@ class ImageService:
         except ClientError as e:
             raise RuntimeError(f"S3 Upload Error: {str(e)}")
 
-        self.save_image_to_db(
-            image_key=s3_key,
-            uploaded_by=uploaded_by,
-        )
-
         return {
-            "url": f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}",
-            "key": s3_key,
+            "url": f"https://{self.bucket_name}.s3.amazonaws.com/{key}",
+            "key": key,
         }
 
-    def batch_upload_images(
-        self, images: List[UploadedFile], uploaded_by: User
-    ) -> List[Dict[str, str]]:
-        """
-        Batch upload multiple images.
-
-        Args:
-            images (List[UploadedFile]): List of images to upload
-            folder (str, optional): S3 folder path
-
-        Returns:
-            List[Dict[str, str]]: List of upload metadata
-        """
-        upload_path = generate_upload_path(uploaded_by.uuid)
-        return [
-            self.upload_image(image, upload_path, uploaded_by)
-            for image in images
-        ]
-
     def get_image_url(self, s3_key: str, expiration: int = 3600) -> str:
         """
         Generate a temporary signed URL for private S3 objects.
@@ -160,6 +115,71 @@ class ImageService:
         except ClientError:
             return None
 
+    def create_presigned_upload(
+        self, key: str, content_type: str
+    ) -> Dict[str, object]:
+        """
+        Generate a presigned POST policy for uploading straight to S3.
+
+        The policy pins the key, content type and private ACL, and caps the
+        object size, since the bytes never pass through our validation.
+
+        Args:
+            key (str): S3 object key
+            content_type (str): Content type the client must send
+
+        Returns:
+            Dict[str, object]: ``url`` and form ``fields`` for the POST
+        """
+        return self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields={"Content-Type": content_type, "acl": "private"},
+            Conditions=[
+                {"Content-Type": content_type},
+                {"acl": "private"},
+                ["content-length-range", 1, MAX_IMAGE_SIZE],
+            ],
+            ExpiresIn=settings.MEDIA_CONFIG.IMAGE_PRESIGNED_UPLOAD_EXPIRY,
+        )
+
+    def find_stored_keys(self, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Check which keys exist in the bucket.
+
+        Args:
+            keys (Iterable[str]): S3 object keys
+
+        Returns:
+            Dict[str, int]: Size in bytes of each key that exists
+        """
+
+        def head(key):
+            try:
+                response = self.s3_client.head_object(
+                    Bucket=self.bucket_name, Key=key
+                )
+            except ClientError:
+                return None
+            return response["ContentLength"]
+
+        keys = list(keys)
+        outcomes = run_bounded(
+            head, keys, settings.MEDIA_CONFIG.IMAGE_UPLOAD_CONCURRENCY
+        )
+        return {
+            key: size
+            for key, (size, _) in zip(keys, outcomes)
+            if size is not None
+        }
+
+    def read_stored_object(self, key: str) -> Iterator[bytes]:
+        """
+        Stream an object from the bucket, a megabyte at a time.
+        """
+        body = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        return body["Body"].iter_chunks(1024 * 1024)
+
     def get_image(self, image_uuid):
         return Image.objects.get(uuid=image_uuid)
 
@@ -176,17 +196,169 @@ class ImageService:
             uploaded_by=uploaded_by,
         )
 
-    def delete_image(image_uuid, user):
-        # Ensure that the user owns the image
-        image = get_object_or_404(
-            Image, uuid=image_uuid, uploaded_by=user.uuid
+    def store_object(self, key: str, data: bytes, content_type: str) -> None:
+        """
+        Upload encoded image bytes to S3.
+
+        Args:
+            key (str): S3 object key
+            data (bytes): Encoded image
+            content_type (str): Content type of the image
+        """
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=data,
+                ContentType=content_type,
+                ACL="private",
+            )
+        except ClientError as e:
+            raise RuntimeError(f"S3 Upload Error: {str(e)}")
+
+    def copy_stored_object(self, key: str, new_key: str) -> None:
+        """
+        Copy an object within the bucket, keeping its metadata.
+
+        Args:
+            key (str): Source S3 object key
+            new_key (str): Destination S3 object key
+        """
+        try:
+            self.s3_client.copy_object(
+                Bucket=self.bucket_name,
+                Key=new_key,
+                CopySource={"Bucket": self.bucket_name, "Key": key},
+                MetadataDirective="COPY",
+                ACL="private",
+            )
+        except ClientError as e:
+            raise RuntimeError(f"S3 Copy Error: {str(e)}")
+
+    def begin_chunked_object(self, upload: ResumableUpload) -> None:
+        """
+        Start an S3 multipart upload; every chunk becomes one part.
+        """
+        upload.key = self.build_key(upload.uploaded_by_id, upload.file_name)
+        try:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=upload.key,
+                ContentType=upload.content_type,
+                ACL="private",
+            )
+        except ClientError as e:
+            raise RuntimeError(f"S3 Upload Error: {str(e)}")
+        upload.upload_id = response["UploadId"]
+
+    def write_chunk(self, upload: ResumableUpload, data: bytes) -> None:
+        """
+        Send a chunk as the next part. Resending a chunk reuses its part
+        number, which replaces the earlier attempt.
+        """
+        if (
+            len(data) < S3_MIN_PART_SIZE
+            and upload.offset + len(data) < upload.length
+        ):
+            raise ValueError("Chunks must be at least 5 MiB, except the last")
+
+        part_number = len(upload.parts) + 1
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name,
+                Key=upload.key,
+                UploadId=upload.upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+        except ClientError as e:
+            raise RuntimeError(f"S3 Upload Error: {str(e)}")
+        upload.parts.append(
+            {"PartNumber": part_number, "ETag": response["ETag"]}
         )
 
-        # Extract the S3 key from file_url
-        file_url = image.image_key
-        file_path = f"https://{settings.AWS_CONFIG.AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/{file_url}"
-        delete_image_from_s3(file_path)
+    def finish_chunked_object(
+        self, upload: ResumableUpload
+    ) -> StoredUploadedFile:
+        """
+        Complete the multipart upload and inspect the assembled object.
 
-        # Delete the image record from the database
-        image.delete()
-        return True
+        The SHA-256 and frame count of the whole file cannot be carried
+        across requests, so the object is read back once, in a stream. A
+        retry after a failed read skips the completion.
+        """
+        if upload.upload_id is not None:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=upload.key,
+                UploadId=upload.upload_id,
+                MultipartUpload={"Parts": upload.parts},
+            )
+            upload.upload_id = None
+            upload.save(update_fields=["upload_id"])
+        return self.inspect_stored_object(
+            upload.key, upload.file_name, upload.length
+        )
+
+    def abort_chunked_object(self, upload: ResumableUpload) -> None:
+        """
+        Abort the multipart upload, or delete the assembled object unless
+        it became a stored image.
+        """
+        if upload.upload_id is None:
+            if not StoredImage.objects.filter(
+                storage_backend=self.storage_backend, image_key=upload.key
+            ).exists():
+                self.delete_stored_objects([upload.key])
+            return
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=upload.key,
+                UploadId=upload.upload_id,
+            )
+        except ClientError as e:
+            logger.error("Aborting upload of %s failed: %s", upload.key, e)
+
+    def delete_stored_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Delete objects from S3 with ``delete_objects``, up to 1000 keys per
+        request.
+
+        Args:
+            keys (List[str]): S3 object keys
+
+        Returns:
+            Dict[str, str]: Error message for each key that was not deleted
+        """
+
+        def delete_chunk(chunk):
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={
+                        "Objects": [{"Key": key} for key in chunk],
+                        "Quiet": True,
+                    },
+                )
+            except (BotoCoreError, ClientError) as e:
+                return {key: f"S3 Deletion Error: {str(e)}" for key in chunk}
+            return {
+                error["Key"]: error.get("Message") or error.get("Code")
+                for error in response.get("Errors", [])
+            }
+
+        keys = list(dict.fromkeys(keys))
+        chunks = [
+            keys[i : i + S3_DELETE_BATCH_SIZE]
+            for i in range(0, len(keys), S3_DELETE_BATCH_SIZE)
+        ]
+        failures = {}
+        outcomes = run_bounded(
+            delete_chunk,
+            chunks,
+            settings.MEDIA_CONFIG.IMAGE_UPLOAD_CONCURRENCY,
+        )
+        for failed, _ in outcomes:
+            failures.update(failed)
+        return failures
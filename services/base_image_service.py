@@ -0,0 +1,1558 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from authentication.models import User
+from media.exceptions import UploadOffsetConflict
+from media.features.image.models import Image, ResumableUpload, StoredImage
+from services.executors import get_cpu_executor, run_bounded
+from services.image_processing import process_image
+from services.image_validation import ImageInfo, read_image_info
+from services.key_layouts import get_key_layout
+from services.near_duplicates import get_near_duplicate_index
+from services.storage_quotas import (
+    QUOTA_EXCEEDED,
+    check_quota,
+    record_usage,
+    release_usage,
+)
+from utils.bktree import BKTree
+from utils.cache import TTLCache
+from utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Newest images first across a set of uploaders. Each uploader's images are
+# read from ``image_owner_created_idx`` starting at the cursor, so a page
+# costs the same however deep it is.
+LIST_IMAGES_SQL = """
+    SELECT page.* FROM unnest(%s::uuid[]) AS owner(id)
+    CROSS JOIN LATERAL (
+        SELECT * FROM {image}
+        WHERE uploaded_by_id = owner.id {after}
+        ORDER BY created DESC, uuid DESC
+        LIMIT %s
+    ) AS page
+    ORDER BY page.created DESC, page.uuid DESC
+    LIMIT %s
+"""
+
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+# Bytes of a file read back from storage kept in memory before it spills
+# to disk
+SPOOL_SIZE = 1024 * 1024
+IMAGE_CONTENT_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+UPLOAD_TOKEN_SALT = "media.presigned-upload"
+# How long a completing resumable upload stays claimed by its request
+RESUMABLE_COMPLETION_TIMEOUT = timedelta(minutes=10)
+# Image fields owners may edit after upload
+EDITABLE_IMAGE_FIELDS = ("description", "original_file_name")
+# Rows written per UPDATE when editing many images
+IMAGE_UPDATE_BATCH_SIZE = 200
+# Extracted descriptive fields shared by StoredImage and Image
+IMAGE_METADATA_FIELDS = (
+    "width",
+    "height",
+    "content_type",
+    "orientation",
+    "dominant_color",
+    "blurhash",
+    "perceptual_hash",
+)
+
+# Signed/public URLs keyed by (backend, key, expiry)
+_url_cache = TTLCache(maxsize=settings.MEDIA_CONFIG.IMAGE_URL_CACHE_SIZE)
+
+
+def variant_key(key: str, width: int, extension: str) -> str:
+    """
+    Build the storage key of a resized variant next to ``key``.
+
+    ``images/u/abc.png`` becomes ``images/u/abc_480w.png``; keys without an
+    extension (Cloudinary public IDs) just get the width suffix.
+    """
+    stem, dot, current = key.rpartition(".")
+    if not dot or "/" in current:
+        return f"{key}_{width}w"
+    return f"{stem}_{width}w.{extension}"
+
+
+def presigned_image_uuid(key: str) -> UUID:
+    """
+    UUID of the Image recorded for a presigned upload to ``key``.
+
+    Derived from the key, so confirming an upload again finds the Image
+    made the first time, even once its content was deduplicated and the
+    object at ``key`` removed.
+    """
+    return uuid5(NAMESPACE_URL, f"{UPLOAD_TOKEN_SALT}:{key}")
+
+
+def check_image_info(info: Optional[ImageInfo], size: int) -> ImageInfo:
+    """
+    Apply the upload limits to an image's size and header details.
+
+    Every way an image arrives goes through here, so they all fail with
+    the same messages.
+
+    Args:
+        info (ImageInfo, optional): Header details, None if unreadable
+        size (int): Size of the file in bytes
+
+    Returns:
+        ImageInfo: ``info``, once it passed
+
+    Raises:
+        ValueError: Naming the first limit the image breaks
+    """
+    if size > MAX_IMAGE_SIZE:
+        raise ValueError("Image file too large")
+    if info is None:
+        raise ValueError("Invalid image file")
+    if info.pixels > settings.MEDIA_CONFIG.IMAGE_MAX_PIXELS:
+        raise ValueError("Image dimensions too large")
+    if info.frames > settings.MEDIA_CONFIG.IMAGE_MAX_FRAMES:
+        raise ValueError("Too many animation frames")
+    return info
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    An upload whose bytes reached storage without passing through Django.
+
+    There is no local file object; ``key`` points at the stored object, or
+    is ``None`` when storing it failed. ``content_hash`` is the SHA-256 of
+    the content and ``image_info`` the details read from its headers.
+    ``error`` says why the file was refused before it was fully stored.
+    """
+
+    def __init__(
+        self,
+        key,
+        name,
+        content_type,
+        size,
+        content_hash=None,
+        charset=None,
+        image_info=None,
+        error=None,
+    ):
+        super().__init__(
+            file=None,
+            name=name,
+            content_type=content_type,
+            size=size,
+            charset=charset,
+        )
+        self.key = key
+        self.content_hash = content_hash
+        self.image_info = image_info
+        self.error = error
+
+    def open(self, mode=None):
+        raise ValueError("Stored uploads have no local content")
+
+    def close(self):
+        # Nothing to close; Django still calls this when the request ends.
+        pass
+
+
+def _staging_dir() -> str:
+    return settings.MEDIA_CONFIG.IMAGE_RESUMABLE_UPLOAD_DIR or os.path.join(
+        tempfile.gettempdir(), "image-uploads"
+    )
+
+
+def _staging_path(upload: ResumableUpload) -> str:
+    return os.path.join(_staging_dir(), f"{upload.uuid}.part")
+
+
+def _resumable_cutoff() -> datetime:
+    expiry = settings.MEDIA_CONFIG.IMAGE_RESUMABLE_UPLOAD_EXPIRY
+    return timezone.now() - timedelta(seconds=expiry)
+
+
+def _completing_cutoff() -> datetime:
+    # Completions that started before this are taken to have crashed.
+    return timezone.now() - RESUMABLE_COMPLETION_TIMEOUT
+
+
+class BaseImageService:
+    """
+    Upload orchestration shared by the storage-specific image services.
+
+    Subclasses implement ``store_image``, which validates a single file and
+    writes it to their storage backend without touching the database, and
+    ``get_image_url``.
+    """
+
+    storage_backend = None
+
+    def build_key(self, owner_id: str, file_name: str) -> str:
+        """
+        Choose the storage key for a new file with the configured layout.
+
+        Args:
+            owner_id (str): User or collection the image belongs to
+            file_name (str): Name of the uploaded file
+
+        Returns:
+            str: Unique storage key
+        """
+        unique_filename = self.generate_unique_filename(file_name)
+        return get_key_layout().build_key(str(owner_id), unique_filename)
+
+    def store_image(self, image: UploadedFile, key: str) -> Dict[str, str]:
+        """
+        Validate and store a single image in the storage backend.
+
+        Args:
+            image (UploadedFile): Image file to store
+            key (str): Storage key, from ``build_key``
+
+        Returns:
+            Dict[str, str]: Upload metadata with ``url`` and ``key``
+        """
+        raise NotImplementedError
+
+    def get_image_url(self, key: str, expiration: int = 3600) -> str:
+        """
+        Generate a URL for accessing an image.
+        """
+        raise NotImplementedError
+
+    def get_cached_image_url(self, key: str, expiration: int = 3600) -> str:
+        """
+        Return a URL for ``key``, reusing a previously generated one until
+        shortly before it expires.
+
+        Args:
+            key (str): Storage key of the image
+            expiration (int, optional): URL expiration time in seconds
+
+        Returns:
+            str: URL for image access
+        """
+        cache_key = (self.storage_backend, key, expiration)
+        url = _url_cache.get(cache_key)
+        if url is None:
+            url = self.get_image_url(key, expiration)
+            if url is not None:
+                margin = min(
+                    settings.MEDIA_CONFIG.IMAGE_URL_CACHE_MARGIN,
+                    expiration // 2,
+                )
+                _url_cache.set(cache_key, url, ttl=expiration - margin)
+        return url
+
+    def get_image_urls(
+        self, keys: Iterable[str], expiration: int = 3600
+    ) -> Dict[str, str]:
+        """
+        Return URLs for many keys at once, going through the URL cache.
+
+        Args:
+            keys (Iterable[str]): Storage keys of the images
+            expiration (int, optional): URL expiration time in seconds
+
+        Returns:
+            Dict[str, str]: URL for each key
+        """
+        return {
+            key: self.get_cached_image_url(key, expiration)
+            for key in dict.fromkeys(keys)
+        }
+
+    def create_presigned_upload(
+        self, key: str, content_type: str
+    ) -> Dict[str, object]:
+        """
+        Build the parameters a client needs to upload straight to storage.
+
+        Args:
+            key (str): Object key the client must upload to
+            content_type (str): Declared content type of the file
+
+        Returns:
+            Dict[str, object]: ``url`` to POST to and form ``fields``
+        """
+        raise NotImplementedError
+
+    def find_stored_keys(self, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Return the size in bytes of each of ``keys`` that exists in the
+        storage backend.
+        """
+        raise NotImplementedError
+
+    def read_stored_object(self, key: str) -> Iterator[bytes]:
+        """
+        Stream the content of a stored object in chunks.
+        """
+        raise NotImplementedError
+
+    def inspect_stored_object(
+        self, key: str, name: str, size: int
+    ) -> StoredUploadedFile:
+        """
+        Read back an object that was stored without going through
+        ``inspect_image``, to fingerprint it and read its headers.
+
+        The content is copied into a spooled temporary file, so no more than
+        ``SPOOL_SIZE`` is held in memory; the frames of an animated image
+        can only be counted from the whole file. Objects over
+        ``MAX_IMAGE_SIZE`` are not read at all.
+
+        Args:
+            key (str): Storage key of the object
+            name (str): Name the file was uploaded with
+            size (int): Size of the object in bytes
+
+        Returns:
+            StoredUploadedFile: The object, ready for ``batch_upload_images``
+        """
+        content_hash = info = None
+        if size <= MAX_IMAGE_SIZE:
+            digest = hashlib.sha256()
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as copy:
+                for chunk in self.read_stored_object(key):
+                    digest.update(chunk)
+                    copy.write(chunk)
+                info = read_image_info(copy)
+            content_hash = digest.hexdigest()
+
+        return StoredUploadedFile(
+            key=key,
+            name=name,
+            content_type=info and f"image/{info.format}",
+            size=size,
+            content_hash=content_hash,
+            image_info=info,
+        )
+
+    def store_object(self, key: str, data: bytes, content_type: str) -> None:
+        """
+        Store already-encoded image bytes, such as a re-encoded original or
+        a resized variant.
+
+        Args:
+            key (str): Storage key of the object
+            data (bytes): Encoded image
+            content_type (str): Content type of the image
+        """
+        raise NotImplementedError
+
+    def copy_stored_object(self, key: str, new_key: str) -> None:
+        """
+        Make the object at ``key`` available at ``new_key`` as well.
+
+        Backends that can only rename may move it instead; deleting ``key``
+        afterwards must then be harmless.
+
+        Args:
+            key (str): Current storage key
+            new_key (str): Storage key to copy to
+        """
+        raise NotImplementedError
+
+    def delete_stored_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Remove objects from the storage backend, batching where the backend
+        allows it. Keys that do not exist count as deleted.
+
+        Args:
+            keys (List[str]): Storage keys to delete
+
+        Returns:
+            Dict[str, str]: Error message for each key that was not deleted
+        """
+        raise NotImplementedError
+
+    def begin_chunked_object(self, upload: ResumableUpload) -> None:
+        """
+        Prepare storage for a resumable upload.
+
+        The default stages chunks in a local file; backends that can
+        assemble objects from parts override the ``*_chunked_object`` hooks.
+
+        Args:
+            upload (ResumableUpload): Upload being created, not yet saved
+        """
+        os.makedirs(_staging_dir(), exist_ok=True)
+        open(_staging_path(upload), "wb").close()
+
+    def write_chunk(self, upload: ResumableUpload, data: bytes) -> None:
+        """
+        Store the chunk starting at ``upload.offset``.
+
+        Writing the same offset again replaces the earlier attempt, so a
+        chunk whose database update was lost can simply be resent.
+
+        Args:
+            upload (ResumableUpload): Locked upload row
+            data (bytes): Chunk content
+        """
+        with open(_staging_path(upload), "r+b") as file:
+            file.seek(upload.offset)
+            file.write(data)
+            file.truncate()
+
+    def finish_chunked_object(self, upload: ResumableUpload) -> UploadedFile:
+        """
+        Assemble a fully received upload.
+
+        Args:
+            upload (ResumableUpload): Upload with every byte received
+
+        Returns:
+            UploadedFile: File to pass through ``batch_upload_images``
+        """
+        return UploadedFile(
+            file=open(_staging_path(upload), "rb"),
+            name=upload.file_name,
+            content_type=upload.content_type,
+            size=upload.length,
+        )
+
+    def abort_chunked_object(self, upload: ResumableUpload) -> None:
+        """
+        Release whatever storage a finished or abandoned upload still holds.
+        """
+        try:
+            os.remove(_staging_path(upload))
+        except FileNotFoundError:
+            pass
+
+    def check_image(self, image: UploadedFile) -> ImageInfo:
+        """
+        Check an image's size, format and dimensions from its headers.
+
+        Nothing is decoded, so oversized images are rejected before any
+        processing could expand them into a bitmap.
+
+        Args:
+            image (UploadedFile): Uploaded image file
+
+        Returns:
+            ImageInfo: Format, dimensions and frame count of the image
+        """
+        if image.size > MAX_IMAGE_SIZE:
+            raise ValueError("Image file too large")
+        return check_image_info(read_image_info(image), image.size)
+
+    def header_metadata(self, image: UploadedFile) -> Dict[str, object]:
+        """
+        Describe an image from its headers alone.
+
+        Used when the image could not be decoded for full extraction.
+
+        Args:
+            image (UploadedFile): Uploaded image file
+
+        Returns:
+            Dict[str, object]: Whatever of ``IMAGE_METADATA_FIELDS`` the
+                headers reveal
+        """
+        if isinstance(image, StoredUploadedFile):
+            info = image.image_info
+        else:
+            info = read_image_info(image, count_frames=False)
+        if info is None:
+            return {"content_type": image.content_type}
+        return {
+            "width": info.width,
+            "height": info.height,
+            "content_type": f"image/{info.format}",
+        }
+
+    def validate_image(self, image: UploadedFile) -> bool:
+        """
+        Validate image based on multiple criteria.
+
+        Args:
+            image (UploadedFile): Uploaded image file
+
+        Returns:
+            bool: Whether image is valid
+        """
+        try:
+            self.check_image(image)
+        except ValueError:
+            return False
+        return True
+
+    def inspect_image(self, image: UploadedFile) -> str:
+        """
+        Validate an image and compute its SHA-256 content hash.
+
+        ``check_image`` only looks at the headers, so the content is read
+        once, chunk by chunk, and never held in memory as a whole. Stored
+        uploads were read when they reached storage; only their recorded
+        details are checked.
+
+        Args:
+            image (UploadedFile): Uploaded image file
+
+        Returns:
+            str: Hex digest of the image content
+        """
+        if isinstance(image, StoredUploadedFile):
+            check_image_info(image.image_info, image.size)
+            if image.error is not None:
+                raise ValueError(image.error)
+            if image.key is None:
+                raise RuntimeError(f"Storing {image.name} failed")
+            return image.content_hash
+
+        self.check_image(image)
+
+        digest = hashlib.sha256()
+        for chunk in image.chunks():
+            digest.update(chunk)
+        image.seek(0)
+        return digest.hexdigest()
+
+    def discard_image(self, image: UploadedFile) -> None:
+        """
+        Drop an upload that was rejected or whose content turned out to be
+        stored already.
+
+        Only stored uploads have anything to remove.
+        """
+        if isinstance(image, StoredUploadedFile) and image.key:
+            self.delete_stored_objects([image.key])
+
+    def upload_image(
+        self, image: UploadedFile, owner_id: str, uploaded_by: User
+    ) -> Dict[str, str]:
+        """
+        Upload a single image, reusing stored content when possible.
+
+        Args:
+            image (UploadedFile): Image file to upload
+            owner_id (str): User or collection the image is stored under
+            uploaded_by (User): User who uploaded the image
+
+        Returns:
+            Dict[str, str]: Upload metadata
+        """
+        [(result, error)] = self._upload([image], owner_id, uploaded_by)
+        if error is not None:
+            raise error
+        return result
+
+    def batch_upload_images(
+        self,
+        images: List[UploadedFile],
+        uploaded_by: User,
+        collection_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Upload multiple images in parallel and record them in one INSERT.
+
+        Each image succeeds or fails on its own; failures are reported in
+        place as ``{"file_name": ..., "error": ...}``.
+
+        Args:
+            images (List[UploadedFile]): List of images to upload
+            uploaded_by (User): User who uploaded the images
+            collection_id (str, optional): Folder to group the images under,
+                defaults to the uploader
+            concurrency (int, optional): Maximum uploads in flight for this
+                batch, defaults to ``IMAGE_UPLOAD_CONCURRENCY``
+
+        Returns:
+            List[Dict[str, str]]: Upload metadata, in the order of ``images``
+        """
+        owner_id = collection_id or uploaded_by.uuid
+        outcomes = self._upload(images, owner_id, uploaded_by, concurrency)
+        return [
+            (
+                {"file_name": image.name, "error": self._describe(error)}
+                if error is not None
+                else result
+            )
+            for image, (result, error) in zip(images, outcomes)
+        ]
+
+    def _upload(
+        self,
+        images: List[UploadedFile],
+        owner_id: str,
+        uploaded_by: User,
+        concurrency: Optional[int] = None,
+        image_uuids: Optional[List[UUID]] = None,
+    ) -> List[Tuple[Optional[Dict[str, str]], Optional[BaseException]]]:
+        limit = concurrency or settings.MEDIA_CONFIG.IMAGE_UPLOAD_CONCURRENCY
+
+        # Validate and fingerprint every file in parallel.
+        outcomes = run_bounded(self.inspect_image, images, limit)
+        for image, (_, error) in zip(images, outcomes):
+            if error is not None:
+                self.discard_image(image)
+
+        # Quotas are checked against the usage counters before anything is
+        # stored; files that do not fit fail on their own.
+        valid = [i for i, (_, error) in enumerate(outcomes) if error is None]
+        allowed = check_quota(uploaded_by, [images[i].size for i in valid])
+        for i, fits in zip(valid, allowed):
+            if not fits:
+                self.discard_image(images[i])
+                outcomes[i] = (None, ValueError(QUOTA_EXCEEDED))
+
+        references = Counter(
+            content_hash for content_hash, error in outcomes if error is None
+        )
+
+        # Content we already store is never uploaded again, and content
+        # repeated within the batch is uploaded once.
+        known = set(
+            StoredImage.objects.filter(
+                storage_backend=self.storage_backend,
+                content_hash__in=references,
+            ).values_list("content_hash", flat=True)
+        )
+        to_store = {}
+        for image, (content_hash, error) in zip(images, outcomes):
+            if error is not None:
+                continue
+            if content_hash in known or content_hash in to_store:
+                self.discard_image(image)
+            else:
+                to_store[content_hash] = image
+
+        stored = self._store_content(to_store, owner_id, limit)
+
+        redundant_keys = []
+        records = []
+        results = []
+        with transaction.atomic():
+            StoredImage.objects.bulk_create(
+                [
+                    StoredImage(
+                        storage_backend=self.storage_backend,
+                        content_hash=content_hash,
+                        image_key=result["key"],
+                        variants=result["variants"],
+                        original_byte_size=result["original_byte_size"],
+                        byte_size=result["byte_size"],
+                        reference_count=references[content_hash],
+                        **{
+                            field: result["metadata"].get(field)
+                            for field in IMAGE_METADATA_FIELDS
+                        },
+                    )
+                    for content_hash, (result, error) in stored.items()
+                    if error is None
+                ],
+                ignore_conflicts=True,
+            )
+            # Lock what we point at so a concurrent delete cannot drop it.
+            locked = StoredImage.objects.select_for_update().filter(
+                storage_backend=self.storage_backend,
+                content_hash__in=references,
+            )
+            objects = {
+                stored_image.content_hash: stored_image
+                for stored_image in locked
+            }
+
+            bumped = []
+            for content_hash in references:
+                stored_image = objects.get(content_hash)
+                if stored_image is None:
+                    continue
+                result, error = stored.get(content_hash, (None, None))
+                if result is None:
+                    bumped.append(stored_image)
+                elif stored_image.image_key != result["key"]:
+                    # Another request stored the same content first.
+                    redundant_keys.append(result["key"])
+                    redundant_keys.extend(result["variants"].values())
+                    bumped.append(stored_image)
+            for stored_image in bumped:
+                stored_image.reference_count += references[
+                    stored_image.content_hash
+                ]
+            StoredImage.objects.bulk_update(bumped, ["reference_count"])
+
+            for image, image_uuid, (content_hash, error) in zip(
+                images, image_uuids or [None] * len(images), outcomes
+            ):
+                if error is None:
+                    error = stored.get(content_hash, (None, None))[1]
+                if error is None and content_hash not in objects:
+                    error = RuntimeError("Stored image disappeared")
+                if error is not None:
+                    results.append((None, error))
+                    continue
+
+                stored_image = objects[content_hash]
+                image_key = stored_image.image_key
+                record = Image(
+                    image_key=image_key,
+                    variants=stored_image.variants,
+                    original_byte_size=stored_image.original_byte_size,
+                    byte_size=stored_image.byte_size,
+                    **{
+                        field: getattr(stored_image, field)
+                        for field in IMAGE_METADATA_FIELDS
+                    },
+                    content_hash=content_hash,
+                    original_file_name=image.name,
+                    uploaded_by=uploaded_by,
+                )
+                if image_uuid is not None:
+                    record.uuid = image_uuid
+                records.append(record)
+                results.append(
+                    (
+                        {
+                            "url": self.get_cached_image_url(image_key),
+                            "key": image_key,
+                            "uuid": str(record.uuid),
+                        },
+                        None,
+                    )
+                )
+
+            self._flag_near_duplicates(records)
+            Image.objects.bulk_create(records)
+            record_usage(
+                uploaded_by.pk,
+                sum(record.byte_size or 0 for record in records),
+                len(records),
+            )
+
+        index = get_near_duplicate_index()
+        for record in records:
+            index.add(record)
+        flagged = iter(records)
+        for result, error in results:
+            if error is None:
+                original = next(flagged).near_duplicate_of_id
+                result["near_duplicate_of"] = original and str(original)
+
+        self._delete_stored(redundant_keys)
+        return results
+
+    def _flag_near_duplicates(self, records: List[Image]) -> None:
+        """
+        Point each new image at the uploader's most similar existing image,
+        if one is within ``IMAGE_NEAR_DUPLICATE_DISTANCE``.
+
+        Earlier images in the same batch count as existing.
+        """
+        max_distance = settings.MEDIA_CONFIG.IMAGE_NEAR_DUPLICATE_DISTANCE
+        if max_distance is None:
+            return
+        records = [record for record in records if record.perceptual_hash]
+        if not records:
+            return
+
+        index = get_near_duplicate_index()
+        index.sync()
+        matches = [
+            index.find(
+                record.perceptual_hash, record.uploaded_by_id, max_distance
+            )
+            for record in records
+        ]
+        candidates = {uuid for found in matches for _, _, uuid in found}
+        existing = set(
+            Image.objects.filter(uuid__in=candidates).values_list(
+                "uuid", flat=True
+            )
+        )
+
+        batch = BKTree()
+        for record, found in zip(records, matches):
+            nearest = None
+            for distance, perceptual_hash, uuid in found:
+                if uuid in existing:
+                    nearest = (distance, uuid)
+                    break
+                # Deleted since it was indexed
+                index.remove(perceptual_hash, record.uploaded_by_id, uuid)
+
+            key = int(record.perceptual_hash, 16)
+            for distance, _, uuid in batch.search(key, max_distance)[:1]:
+                if nearest is None or distance < nearest[0]:
+                    nearest = (distance, uuid)
+            batch.add(key, record.uuid)
+
+            if nearest is not None:
+                record.near_duplicate_of_id = nearest[1]
+
+    def _store_content(
+        self, to_store: Dict[str, UploadedFile], owner_id: str, limit: int
+    ) -> Dict[str, Tuple[Optional[Dict], Optional[BaseException]]]:
+        """
+        Upload new content and its resized variants.
+
+        Re-encoding, metadata extraction and variant rendering run on the
+        process pool. When ``IMAGE_TRANSCODE_FORMAT`` is set, each upload
+        waits for its re-encoded copy and stores it instead of the original
+        if it is smaller. A variant that fails is left out of the
+        ``variants`` map; it never fails the upload itself.
+        """
+        renders = {
+            content_hash: self._process_image(image)
+            for content_hash, image in to_store.items()
+        }
+        stored = dict(
+            zip(
+                to_store,
+                run_bounded(
+                    lambda item: self._store_original(
+                        item[1], owner_id, renders[item[0]]
+                    ),
+                    to_store.items(),
+                    limit,
+                ),
+            )
+        )
+
+        variants = []
+        for content_hash, (result, error) in stored.items():
+            if error is not None:
+                continue
+            result["variants"] = {}
+            processed = None
+            if renders[content_hash] is not None:
+                try:
+                    processed = renders[content_hash].result()
+                except Exception as e:
+                    logger.warning("Processing image failed: %s", e)
+            if processed is None:
+                image = to_store[content_hash]
+                result["metadata"] = self.header_metadata(image)
+                continue
+
+            result["metadata"] = processed["metadata"]
+            rendered = processed["variants"]
+            for width, (data, extension, content_type) in rendered.items():
+                key = variant_key(result["key"], width, extension)
+                variants.append((result, width, key, data, content_type))
+
+        outcomes = run_bounded(
+            lambda variant: self.store_object(*variant[2:]), variants, limit
+        )
+        for (result, width, key, _, _), (_, error) in zip(variants, outcomes):
+            if error is None:
+                result["variants"][str(width)] = key
+            else:
+                logger.warning("Storing variant %s failed: %s", key, error)
+
+        return stored
+
+    def _store_original(
+        self, image: UploadedFile, owner_id: str, render: Optional[Future]
+    ) -> Dict[str, object]:
+        transcoded = None
+        if render is not None and settings.MEDIA_CONFIG.IMAGE_TRANSCODE_FORMAT:
+            try:
+                transcoded = render.result()["transcoded"]
+            except Exception as e:
+                logger.warning("Re-encoding %s failed: %s", image.name, e)
+
+        if isinstance(image, StoredUploadedFile):
+            result = {"key": image.key, "byte_size": image.size}
+        elif transcoded is None:
+            key = self.build_key(owner_id, image.name)
+            result = self.store_image(image, key)
+            result["byte_size"] = image.size
+        else:
+            data, extension, content_type = transcoded
+            stem = image.name.rsplit(".", 1)[0]
+            key = self.build_key(owner_id, f"{stem}.{extension}")
+            self.store_object(key, data, content_type)
+            result = {"key": key, "byte_size": len(data)}
+
+        result["original_byte_size"] = image.size
+        return result
+
+    def _process_image(self, image: UploadedFile) -> Optional[Future]:
+        config = settings.MEDIA_CONFIG
+        # Streamed uploads are already in storage and have no local bytes.
+        if image.file is None:
+            return None
+
+        data = image.read()
+        image.seek(0)
+        return get_cpu_executor().submit(
+            process_image,
+            data,
+            config.IMAGE_VARIANT_WIDTHS,
+            config.IMAGE_TRANSCODE_FORMAT,
+            config.IMAGE_TRANSCODE_QUALITY,
+            config.IMAGE_TRANSCODE_MAX_BYTES,
+        )
+
+    def list_images(
+        self,
+        uploader_ids: List[str],
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Image], Optional[str]]:
+        """
+        Page through images uploaded by any of ``uploader_ids``, newest
+        first, using keyset pagination on ``(created, uuid)``.
+
+        Args:
+            uploader_ids (List[str]): Users whose images to list
+            cursor (str, optional): ``next`` cursor of the previous page
+            limit (int, optional): Page size
+
+        Returns:
+            Tuple[List[Image], Optional[str]]: The page and the cursor of
+                the next one, or None on the last page
+
+        Raises:
+            ValueError: When the cursor is malformed
+        """
+        after, params = "", []
+        if cursor:
+            after = "AND (created, uuid) < (%s, %s)"
+            params = list(decode_cursor(cursor))
+        sql = LIST_IMAGES_SQL.format(image=Image._meta.db_table, after=after)
+        # One extra row tells whether another page follows.
+        images = list(
+            Image.objects.raw(
+                sql, [list(uploader_ids), *params, limit + 1, limit + 1]
+            )
+        )
+        if len(images) <= limit:
+            return images, None
+        last = images[limit - 1]
+        return images[:limit], encode_cursor(last.created, last.uuid)
+
+    def release_images(self, images: List[Image]) -> List[str]:
+        """
+        Drop the references held by ``images`` on their stored content.
+
+        Must run inside the transaction that deletes the rows.
+
+        Args:
+            images (List[Image]): Images about to be deleted
+
+        Returns:
+            List[str]: Storage keys no longer referenced by any image
+        """
+        references = Counter(
+            image.content_hash for image in images if image.content_hash
+        )
+        # Images recorded without a hash own their objects outright.
+        orphaned = []
+        for image in images:
+            if not image.content_hash and image.image_key:
+                orphaned.append(image.image_key)
+                orphaned.extend(image.variants.values())
+
+        objects = StoredImage.objects.select_for_update().filter(
+            storage_backend=self.storage_backend,
+            content_hash__in=references,
+        )
+        remaining = []
+        released = []
+        for stored_image in objects:
+            stored_image.reference_count -= references[
+                stored_image.content_hash
+            ]
+            if stored_image.reference_count > 0:
+                remaining.append(stored_image)
+            else:
+                released.append(stored_image.pk)
+                orphaned.append(stored_image.image_key)
+                orphaned.extend(stored_image.variants.values())
+
+        StoredImage.objects.bulk_update(remaining, ["reference_count"])
+        StoredImage.objects.filter(pk__in=released).delete()
+        return orphaned
+
+    def delete_image(self, image_uuid: str, user: User) -> bool:
+        """
+        Delete an image, removing the stored object once nothing else
+        references it.
+
+        Args:
+            image_uuid (str): Image UUID
+            user (User): User requesting deletion
+
+        Returns:
+            bool: Whether deletion was successful
+        """
+        # Ensure that the user owns the image
+        image = get_object_or_404(Image, uuid=image_uuid, uploaded_by=user)
+
+        self.delete_image_records([image])
+        return True
+
+    def delete_images(
+        self, image_uuids: List[str], user: User
+    ) -> List[Dict[str, object]]:
+        """
+        Delete many of a user's images at once.
+
+        Ownership is checked with one query, the rows are deleted together
+        and unreferenced objects are removed with the backend's batch delete.
+
+        Args:
+            image_uuids (List[str]): UUIDs of the images to delete
+            user (User): User requesting deletion
+
+        Returns:
+            List[Dict[str, object]]: Outcome for each UUID, in input order;
+                objects that could not be removed are listed per image under
+                ``failed_keys``
+        """
+        requested = list(dict.fromkeys(str(uuid) for uuid in image_uuids))
+        images = {
+            str(image.uuid): image
+            for image in Image.objects.filter(
+                uuid__in=requested, uploaded_by=user
+            )
+        }
+
+        failures = self.delete_image_records(list(images.values()))
+        results = []
+        for uuid in requested:
+            image = images.get(uuid)
+            if image is None:
+                results.append({"uuid": uuid, "error": "Image not found"})
+                continue
+
+            result = {"uuid": uuid, "deleted": True}
+            keys = [image.image_key, *image.variants.values()]
+            failed = [
+                {"key": key, "error": failures[key]}
+                for key in keys
+                if key in failures
+            ]
+            if failed:
+                result["failed_keys"] = failed
+            results.append(result)
+        return results
+
+    def delete_image_records(self, images: List[Image]) -> Dict[str, str]:
+        """
+        Delete images whose ownership was already checked, releasing their
+        stored content and storage usage.
+
+        Every path that deletes Image rows goes through here, so reference
+        counts, quota counters and the near-duplicate index stay in step.
+
+        Args:
+            images (List[Image]): Images to delete
+
+        Returns:
+            Dict[str, str]: Error message for each stored object that could
+                not be removed
+        """
+        with transaction.atomic():
+            orphaned = self.release_images(images)
+            release_usage(images)
+            self._unindex_on_commit(images)
+            Image.objects.filter(
+                pk__in=[image.pk for image in images]
+            ).delete()
+
+        return self._delete_stored(orphaned)
+
+    def update_images(
+        self, changes: List[Dict[str, object]], user: User
+    ) -> List[Dict[str, object]]:
+        """
+        Edit the metadata of many of a user's images at once.
+
+        Ownership is checked with one query and the edits are written with
+        ``bulk_update``, ``IMAGE_UPDATE_BATCH_SIZE`` rows per UPDATE.
+
+        Args:
+            changes (List[Dict[str, object]]): ``uuid`` of each image and
+                the ``EDITABLE_IMAGE_FIELDS`` to set on it
+            user (User): User requesting the edit
+
+        Returns:
+            List[Dict[str, object]]: Outcome for each image, in input order
+        """
+        images = {
+            str(image.uuid): image
+            for image in Image.objects.filter(
+                uuid__in=[change["uuid"] for change in changes],
+                uploaded_by=user,
+            ).only("uuid", *EDITABLE_IMAGE_FIELDS)
+        }
+
+        now = timezone.now()
+        fields = set()
+        results = []
+        for change in changes:
+            uuid = str(change["uuid"])
+            image = images.get(uuid)
+            if image is None:
+                results.append({"uuid": uuid, "error": "Image not found"})
+                continue
+
+            for field in EDITABLE_IMAGE_FIELDS:
+                if field in change:
+                    setattr(image, field, change[field])
+                    fields.add(field)
+            # bulk_update skips auto_now fields.
+            image.last_updated = now
+            results.append({"uuid": uuid, "updated": True})
+
+        if images:
+            Image.objects.bulk_update(
+                images.values(),
+                [*sorted(fields), "last_updated"],
+                batch_size=IMAGE_UPDATE_BATCH_SIZE,
+            )
+        return results
+
+    def _unindex_on_commit(self, images: Iterable[Image]) -> None:
+        """
+        Take images out of the near-duplicate index once their delete
+        commits, so a rolled-back delete leaves them indexed.
+        """
+        # Read now: deleting an instance clears its primary key.
+        entries = [
+            (image.perceptual_hash, image.uploaded_by_id, image.uuid)
+            for image in images
+            if image.perceptual_hash
+        ]
+        if not entries:
+            return
+
+        index = get_near_duplicate_index()
+
+        def forget():
+            for entry in entries:
+                index.remove(*entry)
+
+        transaction.on_commit(forget)
+
+    def _delete_stored(self, keys: List[str]) -> Dict[str, str]:
+        # Rows are already gone; objects left behind are only logged.
+        failures = self.delete_stored_objects(keys) if keys else {}
+        for key, error in failures.items():
+            logger.error("Deleting stored object %s failed: %s", key, error)
+        return failures
+
+    def presign_uploads(
+        self,
+        files: List[Dict[str, str]],
+        uploaded_by: User,
+        collection_id: Optional[str] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        Issue direct-to-storage upload parameters for several files.
+
+        Each result carries a signed ``token`` binding the object key to the
+        uploader; it must be passed back to ``confirm_uploads``.
+
+        Args:
+            files (List[Dict[str, str]]): ``file_name`` and ``content_type``
+                of each file
+            uploaded_by (User): User who will upload the files
+            collection_id (str, optional): Folder to group the images under,
+                defaults to the uploader
+
+        Returns:
+            List[Dict[str, object]]: Upload parameters, in input order
+        """
+        owner_id = collection_id or uploaded_by.uuid
+        valid = [
+            file
+            for file in files
+            if file["content_type"] in IMAGE_CONTENT_TYPES
+        ]
+        # Sizes are unknown until confirmation; only image quotas apply.
+        allowed = iter(check_quota(uploaded_by, [0] * len(valid)))
+        results = []
+        for file in files:
+            error = None
+            if file["content_type"] not in IMAGE_CONTENT_TYPES:
+                error = "Invalid image type"
+            elif not next(allowed):
+                error = QUOTA_EXCEEDED
+            if error is not None:
+                results.append(
+                    {"file_name": file["file_name"], "error": error}
+                )
+                continue
+
+            key = self.build_key(owner_id, file["file_name"])
+            token = signing.dumps(
+                {
+                    "key": key,
+                    "user": str(uploaded_by.uuid),
+                    "name": file["file_name"],
+                },
+                salt=UPLOAD_TOKEN_SALT,
+            )
+            results.append(
+                {
+                    "file_name": file["file_name"],
+                    "key": key,
+                    "token": token,
+                    "upload": self.create_presigned_upload(
+                        key, file["content_type"]
+                    ),
+                }
+            )
+        return results
+
+    def confirm_uploads(
+        self, tokens: List[str], uploaded_by: User
+    ) -> List[Dict[str, str]]:
+        """
+        Record images that clients uploaded with ``presign_uploads``.
+
+        The bytes never passed through our validation, so each object is
+        read back once and then goes through the same checks, quotas and
+        deduplication as any other upload; objects that fail are deleted.
+        Confirming the same token twice is harmless.
+
+        Args:
+            tokens (List[str]): Tokens returned by ``presign_uploads``
+            uploaded_by (User): User confirming the uploads
+
+        Returns:
+            List[Dict[str, str]]: Per-token outcome, in input order
+        """
+        claims = []
+        for token in tokens:
+            try:
+                claim = signing.loads(
+                    token,
+                    salt=UPLOAD_TOKEN_SALT,
+                    max_age=settings.MEDIA_CONFIG.IMAGE_UPLOAD_TOKEN_MAX_AGE,
+                )
+            except signing.BadSignature:
+                claim = None
+            if claim and claim["user"] != str(uploaded_by.uuid):
+                claim = None
+            claims.append(claim)
+
+        names = {claim["key"]: claim["name"] for claim in claims if claim}
+        confirmed = {
+            image.uuid: {"key": image.image_key, "uuid": str(image.uuid)}
+            for image in Image.objects.filter(
+                uuid__in=[presigned_image_uuid(key) for key in names]
+            )
+        }
+        outcomes = {
+            key: confirmed[presigned_image_uuid(key)]
+            for key in names
+            if presigned_image_uuid(key) in confirmed
+        }
+
+        pending = [key for key in names if key not in outcomes]
+        sizes = self.find_stored_keys(pending) if pending else {}
+        for key in pending:
+            if key not in sizes:
+                outcomes[key] = {
+                    "key": key,
+                    "error": "File has not been uploaded",
+                }
+
+        found = [key for key in pending if key in sizes]
+        inspected = run_bounded(
+            lambda key: self.inspect_stored_object(
+                key, names[key], sizes[key]
+            ),
+            found,
+            settings.MEDIA_CONFIG.IMAGE_UPLOAD_CONCURRENCY,
+        )
+        files = []
+        for key, (file, error) in zip(found, inspected):
+            if error is None:
+                files.append(file)
+            else:
+                outcomes[key] = {"key": key, "error": self._describe(error)}
+
+        uploaded = self._upload(
+            files,
+            uploaded_by.uuid,
+            uploaded_by,
+            image_uuids=[presigned_image_uuid(file.key) for file in files],
+        )
+        for file, (result, error) in zip(files, uploaded):
+            if error is None:
+                outcomes[file.key] = {
+                    "key": result["key"],
+                    "uuid": result["uuid"],
+                }
+            else:
+                outcomes[file.key] = {
+                    "key": file.key,
+                    "error": self._describe(error),
+                }
+
+        return [
+            (
+                outcomes[claim["key"]]
+                if claim
+                else {"error": "Invalid or expired upload token"}
+            )
+            for claim in claims
+        ]
+
+    def create_resumable_upload(
+        self,
+        file_name: str,
+        content_type: str,
+        length: int,
+        uploaded_by: User,
+    ) -> ResumableUpload:
+        """
+        Start an upload that the client sends in chunks.
+
+        Args:
+            file_name (str): Name of the file being uploaded
+            content_type (str): Declared content type of the file
+            length (int): Total size of the file in bytes
+            uploaded_by (User): User uploading the file
+
+        Returns:
+            ResumableUpload: The new upload, at offset 0
+        """
+        if content_type not in IMAGE_CONTENT_TYPES:
+            raise ValueError("Invalid image type")
+        if length > MAX_IMAGE_SIZE:
+            raise ValueError("Image file too large")
+        if not check_quota(uploaded_by, [length])[0]:
+            raise ValueError(QUOTA_EXCEEDED)
+
+        upload = ResumableUpload(
+            uploaded_by=uploaded_by,
+            storage_backend=self.storage_backend,
+            file_name=file_name,
+            content_type=content_type,
+            length=length,
+        )
+        self.begin_chunked_object(upload)
+        upload.save()
+        return upload
+
+    def get_resumable_upload(
+        self, upload_uuid: str, uploaded_by: User
+    ) -> ResumableUpload:
+        """
+        Look up one of the user's unexpired uploads.
+
+        Raises:
+            ResumableUpload.DoesNotExist: When there is no such upload
+        """
+        return self._resumable_uploads(uploaded_by).get(uuid=upload_uuid)
+
+    def append_resumable_upload(
+        self, upload_uuid: str, uploaded_by: User, offset: int, data: bytes
+    ) -> ResumableUpload:
+        """
+        Store the next chunk of an upload.
+
+        The row stays locked while the chunk is written, so concurrent
+        requests for the same upload are applied one after the other and
+        all but the first fail the offset check.
+
+        Args:
+            upload_uuid (str): Upload to append to
+            uploaded_by (User): User sending the chunk
+            offset (int): Client's view of the bytes received so far
+            data (bytes): Chunk content
+
+        Returns:
+            ResumableUpload: The upload with its new offset
+
+        Raises:
+            UploadOffsetConflict: When ``offset`` is not the current one
+        """
+        with transaction.atomic():
+            upload = (
+                self._resumable_uploads(uploaded_by)
+                .select_for_update()
+                .get(uuid=upload_uuid)
+            )
+            if offset != upload.offset:
+                raise UploadOffsetConflict()
+            if upload.offset + len(data) > upload.length:
+                raise ValueError("Chunk exceeds the upload length")
+
+            if upload.offset == 0:
+                # The header must arrive in the first chunk, so files that
+                # are not images, or far too large ones, stop here.
+                info = check_image_info(
+                    read_image_info(io.BytesIO(data), count_frames=False),
+                    upload.length,
+                )
+                upload.image_format = info.format
+                upload.width = info.width
+                upload.height = info.height
+
+            self.write_chunk(upload, data)
+            upload.offset += len(data)
+            upload.save()
+        return upload
+
+    def complete_resumable_upload(
+        self, upload_uuid: str, uploaded_by: User
+    ) -> Dict[str, str]:
+        """
+        Turn a fully received upload into an Image.
+
+        The assembled file is validated, deduplicated and processed like
+        any other upload. The upload is removed once its Image exists or the
+        file is rejected; after any other failure it is kept, with what was
+        received, so the client can retry.
+
+        Args:
+            upload_uuid (str): Upload to finish
+            uploaded_by (User): User who sent it
+
+        Returns:
+            Dict[str, str]: Upload metadata, or ``error`` on failure
+        """
+        with transaction.atomic():
+            upload = (
+                self._resumable_uploads(uploaded_by)
+                .select_for_update()
+                .get(uuid=upload_uuid)
+            )
+            if upload.offset < upload.length:
+                raise ValueError("Upload is incomplete")
+            # Claim the upload so a repeated request cannot finish it twice
+            # at the same time.
+            if (
+                upload.completing_since is not None
+                and upload.completing_since > _completing_cutoff()
+            ):
+                raise ValueError("Upload is already being completed")
+            upload.completing_since = timezone.now()
+            upload.save(update_fields=["completing_since"])
+
+        # The Image takes the upload's UUID, so a retry after it was created
+        # returns it instead of storing the file again.
+        record = Image.objects.filter(
+            uuid=upload.uuid, uploaded_by=uploaded_by
+        ).first()
+        if record is not None:
+            self._close_resumable_upload(upload)
+            return {
+                "url": self.get_cached_image_url(record.image_key),
+                "key": record.image_key,
+                "uuid": str(record.uuid),
+                "near_duplicate_of": (
+                    record.near_duplicate_of_id
+                    and str(record.near_duplicate_of_id)
+                ),
+            }
+
+        try:
+            image = self.finish_chunked_object(upload)
+        except Exception as e:
+            result, error = None, e
+        else:
+            try:
+                [(result, error)] = self._upload(
+                    [image],
+                    uploaded_by.uuid,
+                    uploaded_by,
+                    image_uuids=[upload.uuid],
+                )
+            except Exception as e:
+                result, error = None, e
+            finally:
+                image.close()
+
+        if error is None or isinstance(error, ValueError):
+            # Stored, or rejected in a way that sending it again cannot fix.
+            self._close_resumable_upload(upload)
+        else:
+            # Keep the row and what was received so the client can retry.
+            ResumableUpload.objects.filter(pk=upload.pk).update(
+                completing_since=None
+            )
+        if error is not None:
+            return {
+                "file_name": upload.file_name,
+                "error": self._describe(error),
+            }
+        return result
+
+    def abort_resumable_upload(
+        self, upload_uuid: str, uploaded_by: User
+    ) -> None:
+        """
+        Cancel an upload and free what it stored.
+
+        Raises:
+            ResumableUpload.DoesNotExist: When there is no such upload
+        """
+        with transaction.atomic():
+            upload = (
+                self._resumable_uploads(uploaded_by)
+                .select_for_update()
+                .get(uuid=upload_uuid)
+            )
+            if (
+                upload.completing_since is not None
+                and upload.completing_since > _completing_cutoff()
+            ):
+                raise ValueError("Upload is being completed")
+            ResumableUpload.objects.filter(pk=upload.pk).delete()
+        self.abort_chunked_object(upload)
+
+    def purge_expired_uploads(self) -> int:
+        """
+        Abort uploads left unfinished past ``IMAGE_RESUMABLE_UPLOAD_EXPIRY``.
+
+        Returns:
+            int: Number of uploads removed
+        """
+        expired = ResumableUpload.objects.filter(
+            storage_backend=self.storage_backend,
+            created__lt=_resumable_cutoff(),
+        ).exclude(completing_since__gt=_completing_cutoff())
+        count = 0
+        for upload in expired.iterator():
+            # Only the request that deletes the row releases its storage.
+            if ResumableUpload.objects.filter(pk=upload.pk).delete()[0]:
+                self.abort_chunked_object(upload)
+                count += 1
+        return count
+
+    def _close_resumable_upload(self, upload: ResumableUpload) -> None:
+        # Only the request that deletes the row releases its storage.
+        if ResumableUpload.objects.filter(pk=upload.pk).delete()[0]:
+            self.abort_chunked_object(upload)
+
+    def _resumable_uploads(self, uploaded_by: User):
+        return ResumableUpload.objects.filter(
+            uploaded_by=uploaded_by,
+            storage_backend=self.storage_backend,
+            created__gte=_resumable_cutoff(),
+        )
+
+    def _describe(self, error: BaseException) -> str:
+        if isinstance(error, ValueError):
+            return str(error)
+
+        logger.error("Image upload failed: %s", error)
+        return "Upload failed"
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide thread pool used for storage I/O.
+
+    The pool is created lazily so that each gunicorn worker builds its own
+    after forking.
+    """
+    global _io_executor
+    if _io_executor is None:
+        with _lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=settings.MEDIA_CONFIG.IMAGE_UPLOAD_MAX_WORKERS,
+                    thread_name_prefix="image-io",
+                )
+    return _io_executor
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """
+    Return the process-wide pool used for CPU-bound image processing.
+
+    Workers are spawned rather than forked so they never inherit locks held
+    by the request threads, and they only import ``services.image_processing``.
+    """
+    global _cpu_executor
+    if _cpu_executor is None:
+        with _lock:
+            if _cpu_executor is None:
+                _cpu_executor = ProcessPoolExecutor(
+                    max_workers=settings.MEDIA_CONFIG.IMAGE_PROCESSING_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _cpu_executor
+
+
+def _reset_after_fork():
+    # Threads and worker pipes do not survive a fork, so drop any pool
+    # inherited from the parent and let the child create its own.
+    global _io_executor, _cpu_executor, _lock
+    _io_executor = None
+    _cpu_executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def run_bounded(
+    func: Callable[[Any], Any], items: Iterable[Any], limit: int
+) -> List[Tuple[Any, Optional[BaseException]]]:
+    """
+    Run ``func`` over ``items`` on the shared I/O pool.
+
+    At most ``limit`` calls are in flight at once, so a single request cannot
+    monopolise the pool. A failing item does not affect the others.
+
+    Args:
+        func (Callable): Function applied to each item
+        items (Iterable): Items to process
+        limit (int): Maximum number of concurrent calls for this batch
+
+    Returns:
+        List[Tuple[Any, Optional[BaseException]]]: ``(result, error)``
+            pairs in the same order as ``items``
+    """
+    items = list(items)
+    results: List[Tuple[Any, Optional[BaseException]]] = [None] * len(items)
+
+    if len(items) <= 1 or limit <= 1:
+        for index, item in enumerate(items):
+            try:
+                results[index] = (func(item), None)
+            except Exception as e:
+                results[index] = (None, e)
+        return results
+
+    executor = get_io_executor()
+    pending = {}
+    next_index = 0
+
+    def submit_next():
+        nonlocal next_index
+        future = executor.submit(func, items[next_index])
+        pending[future] = next_index
+        next_index += 1
+
+    while next_index < len(items) and len(pending) < limit:
+        submit_next()
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                results[index] = (None, error)
+            else:
+                results[index] = (future.result(), None)
+            if next_index < len(items):
+                submit_next()
+
+    return results
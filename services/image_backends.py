@@ -0,0 +1,29 @@
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from services.base_image_service import BaseImageService
+
+# Image service for each storage backend, by dotted path so that only the
+# configured backend's SDK is imported
+IMAGE_SERVICES: Dict[str, str] = {
+    "cloudinary": "services.image_service.ImageService",
+    "local": "services.local_image_service.ImageService",
+    "s3": "services.aws_image_service.ImageService",
+}
+
+
+def get_image_service(backend: Optional[str] = None) -> BaseImageService:
+    """
+    Return an image service for a storage backend.
+
+    Every view goes through here, so images are listed, signed and deleted
+    by the same backend that stored them.
+
+    Args:
+        backend (str, optional): Key of ``IMAGE_SERVICES``, defaults to
+            ``IMAGE_STORAGE_BACKEND``
+    """
+    backend = backend or settings.MEDIA_CONFIG.IMAGE_STORAGE_BACKEND
+    return import_string(IMAGE_SERVICES[backend])()
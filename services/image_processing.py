@@ -0,0 +1,302 @@
+"""
+CPU-bound image work executed on the process pool.
+
+Functions here run in worker processes, so they take and return plain bytes
+and must not depend on Django being configured.
+"""
+
+import io
+import math
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+# Pillow format name -> (file extension, content type)
+OUTPUT_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+    "AVIF": ("avif", "image/avif"),
+}
+
+# Lowest quality tried when squeezing an image under a byte budget
+MIN_TRANSCODE_QUALITY = 40
+
+# EXIF tag holding the orientation of the stored pixels
+EXIF_ORIENTATION = 0x0112
+
+# Blurhash components along x and y, and the size of the image they are
+# computed from
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+BASE83_ALPHABET = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+Encoded = Tuple[bytes, str, str]
+
+
+def process_image(
+    data: bytes,
+    widths: List[int],
+    transcode_format: Optional[str] = None,
+    quality: int = 80,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Re-encode an image and render its resized variants in one decode.
+
+    Args:
+        data (bytes): Encoded original image
+        widths (List[int]): Target widths of the variants in pixels
+        transcode_format (str, optional): ``"webp"`` or ``"avif"`` to
+            re-encode the original; AVIF falls back to WebP when Pillow was
+            built without it
+        quality (int, optional): Starting encoder quality
+        max_bytes (int, optional): Byte budget; quality is lowered step by
+            step until the output fits
+
+    Returns:
+        Dict[str, object]: ``transcoded`` holds the re-encoded original, or
+            ``None`` when it would not be smaller than ``data``; ``variants``
+            maps each rendered width to its encoding; ``metadata`` describes
+            the stored image, see ``extract_metadata``
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        output_format = None
+        transcoded = None
+        if transcode_format:
+            output_format = transcode_format.upper()
+            if output_format == "AVIF" and not features.check("avif"):
+                output_format = "WEBP"
+            transcoded = transcode(
+                original, output_format, quality, max_bytes, len(data)
+            )
+
+        # Variants follow the stored original's format.
+        variant_format = output_format if transcoded else original.format
+        variants = render_variants(original, widths, variant_format)
+        metadata = extract_metadata(original)
+        if transcoded:
+            # Re-encoding baked the orientation into the pixels.
+            metadata["content_type"] = transcoded[2]
+            metadata["orientation"] = 1
+
+    return {
+        "transcoded": transcoded,
+        "variants": variants,
+        "metadata": metadata,
+    }
+
+
+def transcode(
+    original: Image.Image,
+    output_format: str,
+    quality: int,
+    max_bytes: Optional[int],
+    original_size: int,
+) -> Optional[Encoded]:
+    """
+    Re-encode an image, keeping animation.
+
+    Returns:
+        Optional[Encoded]: Encoded image, extension and content type, or
+            ``None`` when the result is not smaller than the original
+    """
+    animated = getattr(original, "is_animated", False)
+    image = original if animated else _prepare(original, output_format)
+
+    while True:
+        buffer = io.BytesIO()
+        image.save(
+            buffer, format=output_format, quality=quality, save_all=animated
+        )
+        size = buffer.tell()
+        if max_bytes is None or size <= max_bytes:
+            break
+        if quality <= MIN_TRANSCODE_QUALITY:
+            break
+        quality = max(MIN_TRANSCODE_QUALITY, quality - 10)
+
+    if size >= original_size:
+        return None
+
+    extension, content_type = OUTPUT_FORMATS[output_format]
+    return buffer.getvalue(), extension, content_type
+
+
+def render_variants(
+    original: Image.Image, widths: List[int], output_format: Optional[str]
+) -> Dict[int, Encoded]:
+    """
+    Render downscaled copies of an image.
+
+    Widths at or above the original width are skipped; images are never
+    upscaled. Animated images only keep their first frame.
+
+    Returns:
+        Dict[int, Encoded]: Encoded variant, file extension and content
+            type for each rendered width
+    """
+    if output_format not in OUTPUT_FORMATS:
+        output_format = "PNG"
+    image = _prepare(original, output_format)
+
+    extension, content_type = OUTPUT_FORMATS[output_format]
+    variants = {}
+    for width in sorted(set(widths)):
+        if width >= image.width:
+            continue
+
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format=output_format, optimize=True)
+        variants[width] = (buffer.getvalue(), extension, content_type)
+
+    return variants
+
+
+def extract_metadata(original: Image.Image) -> Dict[str, object]:
+    """
+    Describe an image for clients that lay it out before downloading it.
+
+    ``width`` and ``height`` are the displayed size, with the EXIF
+    orientation applied; ``orientation`` is the EXIF value of the file as
+    uploaded.
+
+    Returns:
+        Dict[str, object]: ``width``, ``height``, ``content_type``,
+            ``orientation``, ``dominant_color``, ``blurhash`` and
+            ``perceptual_hash``
+    """
+    orientation = original.getexif().get(EXIF_ORIENTATION, 1)
+    width, height = original.size
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    sample = ImageOps.exif_transpose(original).convert("RGB")
+    sample.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+    return {
+        "width": width,
+        "height": height,
+        "content_type": Image.MIME.get(original.format),
+        "orientation": orientation,
+        "dominant_color": dominant_color(sample),
+        "blurhash": blurhash(sample),
+        "perceptual_hash": dhash(sample),
+    }
+
+
+def dhash(image: Image.Image) -> str:
+    """
+    Compute the 64-bit difference hash of an image as 16 hex digits.
+
+    Each bit records whether a pixel of a 9x8 greyscale thumbnail is
+    brighter than its right neighbour, so resizing and recompression barely
+    change the hash.
+    """
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    data = pixels.tobytes()
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = data[row * 9 + column]
+            value = (value << 1) | (left > data[row * 9 + column + 1])
+    return f"{value:016x}"
+
+
+def dominant_color(image: Image.Image) -> str:
+    """
+    Return the most common colour of an RGB image as ``#rrggbb``.
+    """
+    palette = image.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3 : index * 3 + 3]
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def blurhash(image: Image.Image) -> str:
+    """
+    Encode a small RGB image as a blurhash placeholder string.
+
+    See https://github.com/woltapp/blurhash for the format.
+    """
+    x_components, y_components = BLURHASH_COMPONENTS
+    width, height = image.size
+    linear = [_srgb_to_linear(value) for value in image.tobytes()]
+    pixels = list(zip(linear[0::3], linear[1::3], linear[2::3]))
+
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            total = [0.0, 0.0, 0.0]
+            for y in range(height):
+                row = pixels[y * width : (y + 1) * width]
+                for x, pixel in enumerate(row):
+                    basis = cos_x[x] * cos_y[y]
+                    for channel in range(3):
+                        total[channel] += basis * pixel[channel]
+            factors.append([value * scale for value in total])
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, math.floor(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max = 0
+        maximum = 1
+    result += _base83(quantised_max, 1)
+
+    red, green, blue = (_linear_to_srgb(value) for value in dc)
+    result += _base83((red << 16) + (green << 8) + blue, 4)
+    for factor in ac:
+        red, green, blue = (
+            max(0, min(18, math.floor(_sign_pow(value / maximum) * 9 + 9.5)))
+            for value in factor
+        )
+        result += _base83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
+
+
+def _srgb_to_linear(value: int) -> float:
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float) -> float:
+    return math.copysign(abs(value) ** 0.5, value)
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        BASE83_ALPHABET[value // 83 ** (length - i - 1) % 83]
+        for i in range(length)
+    )
+
+
+def _prepare(original: Image.Image, output_format: str) -> Image.Image:
+    # Bake the EXIF orientation in, since re-encoding drops EXIF, and
+    # convert to a mode the encoder accepts.
+    image = ImageOps.exif_transpose(original)
+    if output_format == "JPEG" and image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    if image.mode not in ("RGB", "RGBA", "L"):
+        has_alpha = "A" in image.mode or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB")
+    return image
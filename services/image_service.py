@@ -1,18 +1,22 @@
+import time
 import uuid
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
 
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
 import cloudinary.utils
+import requests
 from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
-from django.shortcuts import get_object_or_404
 
 from authentication.models import User
-from media.features.image.models import Image, generate_upload_path
+from media.features.image.models import Image
+from services.base_image_service import BaseImageService
+from services.storage_clients import get_storage_client
 
 
-class ImageService:
+class ImageService(BaseImageService):
     """
     Service class for handling image uploads,
     validations, and retrievals using Cloudinary.
@@ -20,34 +24,13 @@ class ImageService:
     responsibility and dependency inversion.
     """
 
-    def __init__(self):
-        """
-        Initialize Cloudinary configuration from Django settings.
-        """
-        cloudinary.config(
-            cloud_name=settings.CLOUDINARY_CONFIG.CLOUDINARY_CLOUD_NAME,
-            api_key=settings.CLOUDINARY_CONFIG.CLOUDINARY_API_KEY,
-            api_secret=settings.CLOUDINARY_CONFIG.CLOUDINARY_API_SECRET,
-            secure=True,
-        )
+    storage_backend = "cloudinary"
 
-    def validate_image(self, image: UploadedFile) -> bool:
+    def __init__(self):
         """
-        Validate image based on multiple criteria.
-
-        Args:
-            image (UploadedFile): Uploaded image file
-
-        Returns:
-            bool: Whether image is valid
+        Configure Cloudinary from Django settings, once per process.
         """
-        # Check file size (e.g., max 10MB)
-        if image.size > 10 * 1024 * 1024:
-            return False
-
-        # Validate image type
-        valid_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        return image.content_type in valid_types
+        get_storage_client("cloudinary")
 
     def generate_unique_filename(self, original_filename: str) -> str:
         """
@@ -62,29 +45,19 @@ class ImageService:
         # extension = original_filename.split(".")[-1].lower()
         return f"{uuid.uuid4()}"
 
-    def upload_image(
-        self,
-        image: UploadedFile,
-        folder: str,
-        uploaded_by: User,
-        collection_id: str,
-    ) -> Dict[str, str]:
+    def store_image(self, image: UploadedFile, key: str) -> Dict[str, str]:
         """
-        Upload single image to Cloudinary with validation and unique naming.
+        Validate and upload a single image to Cloudinary
+        without saving it to the database.
 
         Args:
             image (UploadedFile): Image file to upload
-            folder (str): Cloudinary folder path
-            uploaded_by (User): User who uploaded the image
-            collection_id (str): Collection ID for the image
+            key (str): Cloudinary public ID
 
         Returns:
             Dict[str, str]: Upload metadata
         """
-        if not self.validate_image(image):
-            raise ValueError("Invalid image file")
-
-        unique_filename = self.generate_unique_filename(image.name)
+        self.check_image(image)
 
         try:
             # Upload to Cloudinary
@@ -98,46 +71,17 @@ class ImageService:
 
             upload_result = cloudinary.uploader.upload(
                 image,
-                public_id=f"{folder}/{unique_filename}",
+                public_id=key,
                 resource_type="image",
-                folder=folder,
                 access_mode="public",  # Explicitly set to public
             )
-
-            # Save image details to database
-            self.save_image_to_db(
-                image_key=upload_result["public_id"],
-                collection_id=collection_id,
-                uploaded_by=uploaded_by,
-            )
-
-            return {
-                "url": upload_result["secure_url"],
-                "key": upload_result["public_id"],
-            }
-
         except Exception as e:
             raise RuntimeError(f"Cloudinary Upload Error: {str(e)}")
 
-    def batch_upload_images(
-        self, collection_id: str, images: List[UploadedFile], uploaded_by: User
-    ) -> List[Dict[str, str]]:
-        """
-        Batch upload multiple images.
-
-        Args:
-            collection_id (str): Collection ID for the images
-            images (List[UploadedFile]): List of images to upload
-            uploaded_by (User): User who uploaded the images
-
-        Returns:
-            List[Dict[str, str]]: List of upload metadata
-        """
-        upload_path = generate_upload_path(collection_id)
-        return [
-            self.upload_image(image, upload_path, uploaded_by, collection_id)
-            for image in images
-        ]
+        return {
+            "url": upload_result["secure_url"],
+            "key": upload_result["public_id"],
+        }
 
     def get_image_url(self, public_id: str, expiration: int = 3600) -> str:
         """
@@ -169,6 +113,71 @@ class ImageService:
         except Exception:
             return None
 
+    def create_presigned_upload(
+        self, key: str, content_type: str
+    ) -> Dict[str, object]:
+        """
+        Generate signed upload parameters for uploading straight to Cloudinary.
+
+        Args:
+            key (str): Cloudinary public ID the client must upload to
+            content_type (str): Declared content type of the file
+
+        Returns:
+            Dict[str, object]: ``url`` and form ``fields`` for the POST
+        """
+        params = {
+            "public_id": key,
+            "timestamp": int(time.time()),
+            "allowed_formats": "jpg,png,gif,webp",
+        }
+        params["signature"] = cloudinary.utils.api_sign_request(
+            params, settings.CLOUDINARY_CONFIG.CLOUDINARY_API_SECRET
+        )
+        params["api_key"] = settings.CLOUDINARY_CONFIG.CLOUDINARY_API_KEY
+
+        return {
+            "url": cloudinary.utils.cloudinary_api_url(
+                "upload",
+                resource_type="image",
+                cloud_name=settings.CLOUDINARY_CONFIG.CLOUDINARY_CLOUD_NAME,
+            ),
+            "fields": params,
+        }
+
+    def find_stored_keys(self, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Check which public IDs exist in Cloudinary, 100 per API call.
+
+        Args:
+            keys (Iterable[str]): Cloudinary public IDs
+
+        Returns:
+            Dict[str, int]: Size in bytes of each public ID that exists
+        """
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 100):
+            response = cloudinary.api.resources_by_ids(
+                keys[start : start + 100], resource_type="image"
+            )
+            found.update(
+                (resource["public_id"], resource["bytes"])
+                for resource in response["resources"]
+            )
+        return found
+
+    def read_stored_object(self, key: str) -> Iterator[bytes]:
+        """
+        Download an image as delivered, without transformations, a
+        megabyte at a time.
+        """
+        response = requests.get(
+            self.get_image_url(key), stream=True, timeout=30
+        )
+        response.raise_for_status()
+        return response.iter_content(1024 * 1024)
+
     def get_image(self, image_uuid):
         """Get image by UUID."""
         return Image.objects.get(uuid=image_uuid)
@@ -190,28 +199,61 @@ class ImageService:
             uploaded_by=uploaded_by,
         )
 
-    def delete_image(self, image_uuid: str, user: User) -> bool:
+    def store_object(self, key: str, data: bytes, content_type: str) -> None:
         """
-        Delete image from Cloudinary and database.
+        Upload encoded image bytes to Cloudinary.
 
         Args:
-            image_uuid (str): Image UUID
-            user (User): User requesting deletion
+            key (str): Cloudinary public ID
+            data (bytes): Encoded image
+            content_type (str): Content type of the image
+        """
+        try:
+            cloudinary.uploader.upload(
+                data,
+                public_id=key,
+                resource_type="image",
+                access_mode="public",
+            )
+        except Exception as e:
+            raise RuntimeError(f"Cloudinary Upload Error: {str(e)}")
 
-        Returns:
-            bool: Whether deletion was successful
+    def copy_stored_object(self, key: str, new_key: str) -> None:
         """
-        # Ensure that the user owns the image
-        image = get_object_or_404(
-            Image, uuid=image_uuid, uploaded_by=user.hiver.uuid
-        )
+        Rename an image in Cloudinary; there is no server-side copy.
 
+        Args:
+            key (str): Current Cloudinary public ID
+            new_key (str): New Cloudinary public ID
+        """
         try:
-            # Delete from Cloudinary
-            cloudinary.uploader.destroy(image.image_key)
-
-            # Delete the image record from the database
-            image.delete()
-            return True
+            cloudinary.uploader.rename(key, new_key, resource_type="image")
         except Exception as e:
-            raise RuntimeError(f"Cloudinary Deletion Error: {str(e)}")
+            raise RuntimeError(f"Cloudinary Rename Error: {str(e)}")
+
+    def delete_stored_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Delete images from Cloudinary, up to 100 public IDs per request.
+
+        Args:
+            keys (List[str]): Cloudinary public IDs
+
+        Returns:
+            Dict[str, str]: Error message for each key that was not deleted
+        """
+        keys = list(dict.fromkeys(keys))
+        failures = {}
+        for start in range(0, len(keys), 100):
+            chunk = keys[start : start + 100]
+            try:
+                response = cloudinary.api.delete_resources(chunk)
+            except Exception as e:
+                error = f"Cloudinary Deletion Error: {str(e)}"
+                failures.update(dict.fromkeys(chunk, error))
+                continue
+            # Keys already gone are reported as "not_found"; that is fine.
+            for key in chunk:
+                outcome = response.get("deleted", {}).get(key)
+                if outcome not in ("deleted", "not_found"):
+                    failures[key] = f"Cloudinary Deletion Error: {outcome}"
+        return failures
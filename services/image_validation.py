@@ -0,0 +1,243 @@
+"""
+Header-only image inspection.
+
+Only the bytes needed to find the format, the dimensions and the number of
+frames are read; pixel data is skipped with ``seek`` and never decoded, so
+memory use does not depend on the file size. This lets dimension limits be
+enforced before anything expands the image into a bitmap.
+"""
+
+import struct
+from typing import BinaryIO, NamedTuple, Optional
+
+# Longest prefix needed to tell the supported formats apart
+SNIFF_LENGTH = 16
+
+
+class ImageInfo(NamedTuple):
+    format: str
+    width: int
+    height: int
+    frames: int = 1
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """
+    Identify an image format from its leading bytes.
+
+    Returns:
+        Optional[str]: ``jpeg``, ``png``, ``gif`` or ``webp``, or ``None``
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def read_image_info(
+    file: BinaryIO, count_frames: bool = True
+) -> Optional[ImageInfo]:
+    """
+    Read the format, size and frame count of an image from its headers.
+
+    The file position is restored afterwards.
+
+    Args:
+        file (BinaryIO): Seekable binary file
+        count_frames (bool, optional): Walk the whole container to count
+            animation frames; otherwise only the leading header is read and
+            ``frames`` is 1
+
+    Returns:
+        Optional[ImageInfo]: Image details, or ``None`` when the file is not
+            a supported image or its header is malformed
+    """
+    position = file.tell()
+    try:
+        file.seek(0)
+        image_format = sniff_image_format(file.read(SNIFF_LENGTH))
+        if image_format is None:
+            return None
+
+        file.seek(0)
+        reader = _READERS[image_format]
+        return reader(_Reader(file), count_frames)
+    except (struct.error, ValueError, EOFError):
+        return None
+    finally:
+        file.seek(position)
+
+
+class _Reader:
+    """
+    Thin wrapper raising ``EOFError`` on short reads.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    def read(self, size: int) -> bytes:
+        data = self.file.read(size)
+        if len(data) != size:
+            raise EOFError
+        return data
+
+    def skip(self, size: int) -> None:
+        self.file.seek(size, 1)
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.read(struct.calcsize(fmt)))
+
+
+def _read_png(reader: _Reader, count_frames: bool) -> ImageInfo:
+    reader.skip(8)
+    length, chunk_type = reader.unpack(">I4s")
+    if chunk_type != b"IHDR":
+        raise ValueError
+    width, height = reader.unpack(">II")
+    reader.skip(length - 8 + 4)
+
+    frames = 1
+    # An APNG announces its frame count in acTL, which must precede IDAT.
+    while count_frames:
+        length, chunk_type = reader.unpack(">I4s")
+        if chunk_type == b"acTL":
+            (frames,) = reader.unpack(">I")
+            break
+        if chunk_type in (b"IDAT", b"IEND"):
+            break
+        reader.skip(length + 4)
+
+    return ImageInfo("png", width, height, frames)
+
+
+# Start-of-frame markers; DHT (C4), JPG (C8) and DAC (CC) share the range
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+_JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xD8)) | {0x01}
+
+
+def _read_jpeg(reader: _Reader, count_frames: bool) -> ImageInfo:
+    reader.skip(2)
+    while True:
+        if reader.read(1) != b"\xff":
+            raise ValueError
+        marker = reader.read(1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = reader.read(1)[0]
+
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan without a frame header
+            raise ValueError
+
+        (length,) = reader.unpack(">H")
+        if marker in _JPEG_SOF_MARKERS:
+            _, height, width = reader.unpack(">BHH")
+            return ImageInfo("jpeg", width, height)
+        reader.skip(length - 2)
+
+
+def _read_gif(reader: _Reader, count_frames: bool) -> ImageInfo:
+    reader.skip(6)
+    width, height, flags = reader.unpack("<HHB")
+    reader.skip(2)
+    if flags & 0x80:
+        reader.skip(3 << ((flags & 0x07) + 1))
+    if not count_frames:
+        return ImageInfo("gif", width, height)
+
+    frames = 0
+    while True:
+        introducer = reader.read(1)
+        if introducer == b"\x2c":  # image descriptor
+            _, _, frame_width, frame_height, flags = reader.unpack("<HHHHB")
+            # Frames may be larger than the logical screen.
+            width = max(width, frame_width)
+            height = max(height, frame_height)
+            if flags & 0x80:
+                reader.skip(3 << ((flags & 0x07) + 1))
+            reader.skip(1)  # LZW minimum code size
+            _skip_sub_blocks(reader)
+            frames += 1
+        elif introducer == b"\x21":  # extension
+            reader.skip(1)
+            _skip_sub_blocks(reader)
+        elif introducer == b"\x3b":  # trailer
+            break
+        else:
+            raise ValueError
+
+    if frames == 0:
+        raise ValueError
+    return ImageInfo("gif", width, height, frames)
+
+
+def _skip_sub_blocks(reader: _Reader) -> None:
+    while True:
+        size = reader.read(1)[0]
+        if size == 0:
+            return
+        reader.skip(size)
+
+
+def _read_webp(reader: _Reader, count_frames: bool) -> ImageInfo:
+    reader.skip(12)
+    chunk_type, length = reader.unpack("<4sI")
+
+    if chunk_type == b"VP8 ":
+        reader.skip(3)
+        if reader.read(3) != b"\x9d\x01\x2a":
+            raise ValueError
+        width, height = reader.unpack("<HH")
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+
+    if chunk_type == b"VP8L":
+        if reader.read(1) != b"\x2f":
+            raise ValueError
+        (bits,) = reader.unpack("<I")
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        return ImageInfo("webp", width, height)
+
+    if chunk_type != b"VP8X":
+        raise ValueError
+
+    flags = reader.read(4)[0]
+    size = reader.read(6)
+    width = int.from_bytes(size[:3], "little") + 1
+    height = int.from_bytes(size[3:], "little") + 1
+    animated = flags & 0x02
+    if not (animated and count_frames):
+        return ImageInfo("webp", width, height)
+
+    reader.skip(length - 10 + (length & 1))
+    frames = 0
+    while True:
+        try:
+            chunk_type, length = reader.unpack("<4sI")
+        except EOFError:
+            break
+        if chunk_type == b"ANMF":
+            frames += 1
+        reader.skip(length + (length & 1))
+
+    return ImageInfo("webp", width, height, max(frames, 1))
+
+
+_READERS = {
+    "png": _read_png,
+    "jpeg": _read_jpeg,
+    "gif": _read_gif,
+    "webp": _read_webp,
+}
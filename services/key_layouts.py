@@ -0,0 +1,70 @@
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from media.features.image.models import generate_upload_path
+
+
+class KeyLayout:
+    """
+    Decides the storage key of a new image.
+
+    Layouts must be deterministic: the same owner and file name always give
+    the same key, so ``migrate_image_keys`` can tell which objects are
+    already in place.
+    """
+
+    def build_key(self, owner_id: str, file_name: str) -> str:
+        """
+        Args:
+            owner_id (str): User or collection the image belongs to
+            file_name (str): Unique file name generated by the service
+
+        Returns:
+            str: Storage key
+        """
+        raise NotImplementedError
+
+
+class OwnerKeyLayout(KeyLayout):
+    """
+    ``images/<owner>/<file>``: one folder per user or collection.
+    """
+
+    def build_key(self, owner_id: str, file_name: str) -> str:
+        return generate_upload_path(owner_id) + file_name
+
+
+class ShardedKeyLayout(KeyLayout):
+    """
+    ``images/ab/cd/<file>``: fans keys out by a hash of the file name.
+
+    Spreads writes across S3 prefixes and keeps local directories small,
+    whoever uploads.
+    """
+
+    prefix = "images/"
+    levels = 2
+    width = 2
+
+    def build_key(self, owner_id: str, file_name: str) -> str:
+        digest = hashlib.md5(file_name.encode()).hexdigest()
+        shards = [
+            digest[level * self.width : (level + 1) * self.width]
+            for level in range(self.levels)
+        ]
+        return f"{self.prefix}{'/'.join(shards)}/{file_name}"
+
+
+def get_key_layout() -> KeyLayout:
+    """
+    Return the layout configured by ``IMAGE_KEY_LAYOUT``.
+    """
+    return _load_layout(settings.MEDIA_CONFIG.IMAGE_KEY_LAYOUT)
+
+
+@lru_cache(maxsize=None)
+def _load_layout(path: str) -> KeyLayout:
+    return import_string(path)()
@@ -0,0 +1,179 @@
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, Iterator, List
+
+from django.conf import settings
+from django.core.exceptions import (
+    ImproperlyConfigured,
+    SuspiciousFileOperation,
+)
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from django.utils._os import safe_join
+
+from services.base_image_service import BaseImageService
+
+# Bytes copied per read when streaming stored files
+CHUNK_SIZE = 1024 * 1024
+
+
+class ImageService(BaseImageService):
+    """
+    Image service that keeps files under MEDIA_ROOT.
+
+    Files are served to their owners by ``ImageFileView``, so image URLs
+    point there instead of at the files themselves.
+    """
+
+    storage_backend = "local"
+
+    def __init__(self):
+        """
+        Require MEDIA_ROOT, which is only set for local file storage.
+        """
+        if not getattr(settings, "MEDIA_ROOT", ""):
+            raise ImproperlyConfigured(
+                "The local image backend needs MEDIA_ROOT to be set"
+            )
+
+    def _path(self, key: str) -> str:
+        try:
+            return safe_join(settings.MEDIA_ROOT, key)
+        except SuspiciousFileOperation:
+            raise RuntimeError(f"Invalid storage key: {key}")
+
+    def _write(self, key: str, chunks: Iterable[bytes]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+    def generate_unique_filename(self, original_filename: str) -> str:
+        """
+        Generate a unique filename with UUID and original extension.
+
+        Args:
+            original_filename (str): Original uploaded filename
+
+        Returns:
+            str: Unique filename
+        """
+        extension = original_filename.split(".")[-1].lower()
+        return f"{uuid.uuid4()}.{extension}"
+
+    def store_image(self, image: UploadedFile, key: str) -> Dict[str, str]:
+        """
+        Validate and write a single image under MEDIA_ROOT without saving it
+        to the DB.
+
+        Args:
+            image (UploadedFile): Image file to store
+            key (str): Path of the file, relative to MEDIA_ROOT
+
+        Returns:
+            Dict[str, str]: Upload metadata
+        """
+        self.check_image(image)
+        image.seek(0)
+        try:
+            self._write(key, image.chunks(CHUNK_SIZE))
+        except OSError as e:
+            raise RuntimeError(f"Local Upload Error: {str(e)}")
+        return {"url": self.get_image_url(key), "key": key}
+
+    def get_image_url(self, key: str, expiration: int = 3600) -> str:
+        """
+        Return the URL ``ImageFileView`` serves a stored file from.
+
+        Access is checked on every request, so the URL does not expire.
+        """
+        return reverse("image_file", kwargs={"key": key})
+
+    def create_presigned_upload(
+        self, key: str, content_type: str
+    ) -> Dict[str, object]:
+        """
+        Local storage has no endpoint clients can upload to directly.
+        """
+        raise NotImplementedError(
+            "Direct uploads are not supported by local storage"
+        )
+
+    def find_stored_keys(self, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Check which keys exist under MEDIA_ROOT.
+
+        Args:
+            keys (Iterable[str]): Paths relative to MEDIA_ROOT
+
+        Returns:
+            Dict[str, int]: Size in bytes of each key that exists
+        """
+        sizes = {}
+        for key in keys:
+            try:
+                path = safe_join(settings.MEDIA_ROOT, key)
+            except SuspiciousFileOperation:
+                continue
+            if os.path.isfile(path):
+                sizes[key] = os.path.getsize(path)
+        return sizes
+
+    def read_stored_object(self, key: str) -> Iterator[bytes]:
+        """
+        Stream a stored file, a megabyte at a time.
+        """
+        with open(self._path(key), "rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+
+    def store_object(self, key: str, data: bytes, content_type: str) -> None:
+        """
+        Write encoded image bytes under MEDIA_ROOT.
+
+        Args:
+            key (str): Path of the file, relative to MEDIA_ROOT
+            data (bytes): Encoded image
+            content_type (str): Content type of the image
+        """
+        try:
+            self._write(key, [data])
+        except OSError as e:
+            raise RuntimeError(f"Local Upload Error: {str(e)}")
+
+    def copy_stored_object(self, key: str, new_key: str) -> None:
+        """
+        Copy a stored file to a new key.
+
+        Args:
+            key (str): Source path, relative to MEDIA_ROOT
+            new_key (str): Destination path, relative to MEDIA_ROOT
+        """
+        destination = self._path(new_key)
+        try:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(self._path(key), destination)
+        except OSError as e:
+            raise RuntimeError(f"Local Copy Error: {str(e)}")
+
+    def delete_stored_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Delete stored files; keys that no longer exist count as deleted.
+
+        Args:
+            keys (List[str]): Paths relative to MEDIA_ROOT
+
+        Returns:
+            Dict[str, str]: Error message for each key that was not deleted
+        """
+        failures = {}
+        for key in dict.fromkeys(keys):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except (OSError, RuntimeError) as e:
+                failures[key] = f"Local Deletion Error: {str(e)}"
+        return failures
@@ -1,7 +1,24 @@
+import mimetypes
 import os
+import re
+import stat
+from urllib.parse import quote
 
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
 from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def upload_file_to_local(file, file_path):
@@ -11,3 +28,126 @@ def upload_file_to_local(file, file_path):
     except Exception as e:
         print(f"Local upload failed: {e}")
         return None
+
+
+def serve_local_file(request, key):
+    """
+    Respond with the file stored under ``key`` in MEDIA_ROOT.
+
+    With ``IMAGE_SENDFILE_BACKEND`` set, the body is left to the front proxy
+    (X-Accel-Redirect for nginx, X-Sendfile for Apache), which sends it with
+    sendfile and answers Range requests itself. Otherwise the file is
+    streamed from Python, honouring a single byte range.
+
+    Callers must have checked that the requester may read ``key``.
+
+    Raises:
+        Http404: When ``key`` is outside MEDIA_ROOT or not a file
+    """
+    try:
+        path = safe_join(settings.MEDIA_ROOT, key)
+        stat_result = os.stat(path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("File not found")
+
+    size = stat_result.st_size
+    last_modified = int(stat_result.st_mtime)
+    etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        backend = settings.MEDIA_CONFIG.IMAGE_SENDFILE_BACKEND
+        if backend == "nginx":
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = (
+                settings.MEDIA_CONFIG.IMAGE_SENDFILE_PREFIX + quote(key)
+            )
+        elif backend == "apache":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = path
+        else:
+            response = _stream_file(
+                request, path, size, etag, last_modified, content_type
+            )
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    patch_cache_control(
+        response,
+        private=True,
+        max_age=settings.MEDIA_CONFIG.IMAGE_MEDIA_MAX_AGE,
+    )
+    return response
+
+
+def _stream_file(request, path, size, etag, last_modified, content_type):
+    byte_range = _requested_range(request, size, etag, last_modified)
+    if byte_range is None:
+        return FileResponse(open(path, "rb"), content_type=content_type)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        _read_range(path, start, end), status=206, content_type=content_type
+    )
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def _requested_range(request, size, etag, last_modified):
+    """
+    Parse a single-range ``Range`` header.
+
+    Returns:
+        tuple | None | bool: Inclusive ``(start, end)``, None to send the
+            whole file, or False when the range cannot be satisfied
+    """
+    header = request.headers.get("Range")
+    if not header:
+        return None
+    # A stale If-Range validator means the client's copy changed: send all.
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != last_modified:
+            return None
+
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Multiple or malformed ranges: ignore them, as RFC 9110 allows.
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes.
+        if int(last) == 0:
+            return False
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,103 @@
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from media.features.image.models import Image
+from utils.bktree import BKTree
+
+
+class NearDuplicateIndex:
+    """
+    In-process index of image perceptual hashes for Hamming-distance lookups.
+
+    Each uploader has a tree of their own, so a lookup only walks the
+    hashes it could match and costs the same however many other users
+    there are. The index is loaded from the database on first use and then
+    kept up to date incrementally: images uploaded in this process are
+    added directly, and ``sync`` picks up rows written by other processes
+    since the last sync. Images deleted through ``delete_image_records``
+    are removed once the delete commits, but ones deleted by other
+    processes linger, so callers must confirm matches against the database.
+    """
+
+    # Rows committed this long after their ``created`` timestamp are still
+    # picked up by the next sync.
+    sync_overlap = timedelta(minutes=5)
+
+    def __init__(self):
+        self._trees: Dict[object, BKTree] = defaultdict(BKTree)
+        self._lock = threading.Lock()
+        self._synced_at = None
+
+    def sync(self) -> None:
+        """
+        Load images created since the last sync.
+        """
+        started_at = timezone.now()
+        rows = Image.objects.filter(perceptual_hash__isnull=False)
+        if self._synced_at is not None:
+            rows = rows.filter(
+                created__gte=self._synced_at - self.sync_overlap
+            )
+        rows = rows.values_list("uuid", "perceptual_hash", "uploaded_by_id")
+
+        with self._lock:
+            for uuid, perceptual_hash, uploaded_by_id in rows.iterator():
+                self._trees[uploaded_by_id].add(int(perceptual_hash, 16), uuid)
+            self._synced_at = started_at
+
+    def add(self, image: Image) -> None:
+        if image.perceptual_hash:
+            with self._lock:
+                self._trees[image.uploaded_by_id].add(
+                    int(image.perceptual_hash, 16), image.uuid
+                )
+
+    def remove(self, perceptual_hash: str, uploaded_by_id, uuid) -> None:
+        with self._lock:
+            tree = self._trees.get(uploaded_by_id)
+            if tree is not None:
+                tree.remove(int(perceptual_hash, 16), uuid)
+
+    def find(
+        self, perceptual_hash: str, uploaded_by_id, max_distance: int
+    ) -> List[Tuple[int, str, object]]:
+        """
+        Find a user's images whose hash is within ``max_distance``.
+
+        Returns:
+            List[Tuple[int, str, object]]: ``(distance, hash, uuid)``,
+                nearest first
+        """
+        with self._lock:
+            tree = self._trees.get(uploaded_by_id)
+            if tree is None:
+                return []
+            matches = tree.search(int(perceptual_hash, 16), max_distance)
+        return [
+            (distance, f"{key:016x}", uuid) for distance, key, uuid in matches
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(tree) for tree in self._trees.values())
+
+
+_lock = threading.Lock()
+_index: Optional[NearDuplicateIndex] = None
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """
+    Return the process-wide near-duplicate index, loading it on first use.
+    """
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                index = NearDuplicateIndex()
+                index.sync()
+                _index = index
+    return _index
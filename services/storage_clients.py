@@ -0,0 +1,91 @@
+import os
+import threading
+from typing import Any, Callable, Dict
+
+import boto3
+import cloudinary
+import cloudinary.api_client.call_api
+import cloudinary.uploader
+import cloudinary.utils
+from botocore.config import Config
+from django.conf import settings
+
+_lock = threading.Lock()
+_clients: Dict[str, Any] = {}
+
+
+def _create_s3_client():
+    # boto3 clients are thread-safe once built; the session is not, so each
+    # client gets its own and is only ever created under the lock.
+    session = boto3.session.Session()
+    max_connections = settings.MEDIA_CONFIG.IMAGE_STORAGE_MAX_CONNECTIONS
+    return session.client(
+        "s3",
+        aws_access_key_id=settings.AWS_CONFIG.AWS_S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_CONFIG.AWS_S3_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_CONFIG.AWS_S3_REGION_NAME,
+        endpoint_url="https://s3.af-south-1.amazonaws.com",
+        config=Config(
+            max_pool_connections=max_connections,
+            tcp_keepalive=True,
+        ),
+    )
+
+
+def _configure_cloudinary():
+    config = cloudinary.config(
+        cloud_name=settings.CLOUDINARY_CONFIG.CLOUDINARY_CLOUD_NAME,
+        api_key=settings.CLOUDINARY_CONFIG.CLOUDINARY_API_KEY,
+        api_secret=settings.CLOUDINARY_CONFIG.CLOUDINARY_API_SECRET,
+        secure=True,
+    )
+    # The SDK's module-level pools keep a single connection per host, so
+    # concurrent uploads would keep reopening them.
+    connector = cloudinary.utils.get_http_connector(
+        config,
+        {
+            **cloudinary.CERT_KWARGS,
+            "maxsize": settings.MEDIA_CONFIG.IMAGE_STORAGE_MAX_CONNECTIONS,
+        },
+    )
+    cloudinary.uploader._http = connector
+    cloudinary.api_client.call_api._http = connector
+    return config
+
+
+STORAGE_CLIENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "s3": _create_s3_client,
+    "cloudinary": _configure_cloudinary,
+}
+
+
+def get_storage_client(backend: str) -> Any:
+    """
+    Return the process-wide client for a storage backend.
+
+    Clients are created on first use and shared by every service instance
+    and thread, so constructing a service per request costs nothing. Each
+    gunicorn worker builds its own after forking.
+
+    Args:
+        backend (str): Key of ``STORAGE_CLIENT_FACTORIES``
+    """
+    client = _clients.get(backend)
+    if client is None:
+        with _lock:
+            client = _clients.get(backend)
+            if client is None:
+                client = STORAGE_CLIENT_FACTORIES[backend]()
+                _clients[backend] = client
+    return client
+
+
+def _reset_after_fork():
+    # Pooled sockets would be shared with the parent, so the child starts
+    # from an empty registry.
+    global _lock
+    _clients.clear()
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
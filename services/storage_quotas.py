@@ -0,0 +1,224 @@
+from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from authentication.models import Membership, User
+from media.features.image.models import Image, StorageUsage
+
+QUOTA_EXCEEDED = "Storage quota exceeded"
+
+
+def _limits(usage: StorageUsage):
+    config = settings.MEDIA_CONFIG
+    if usage.user_id is not None:
+        defaults = (
+            config.IMAGE_USER_BYTE_QUOTA,
+            config.IMAGE_USER_IMAGE_QUOTA,
+        )
+    else:
+        defaults = (
+            config.IMAGE_ORGANIZATION_BYTE_QUOTA,
+            config.IMAGE_ORGANIZATION_IMAGE_QUOTA,
+        )
+    byte_quota, image_quota = defaults
+    if usage.byte_quota is not None:
+        byte_quota = usage.byte_quota
+    if usage.image_quota is not None:
+        image_quota = usage.image_quota
+    return byte_quota, image_quota
+
+
+def _usage_filter(user_id) -> Q:
+    return Q(user_id=user_id) | Q(organization__memberships__user_id=user_id)
+
+
+def get_usage(user: User) -> List[StorageUsage]:
+    """
+    Return the counters an upload by ``user`` draws on: the user's own and
+    one per organization they belong to, creating any that are missing.
+
+    New counters are seeded from the images that already exist, so data
+    from before the counters, or a new organization's members, count.
+    """
+    rows = list(StorageUsage.objects.filter(_usage_filter(user.pk)))
+    organization_ids = set(
+        Membership.objects.filter(user=user).values_list(
+            "organization_id", flat=True
+        )
+    )
+    missing = organization_ids - {row.organization_id for row in rows}
+    if any(row.user_id == user.pk for row in rows) and not missing:
+        return rows
+
+    StorageUsage.objects.bulk_create(
+        [StorageUsage(user=user)]
+        + [StorageUsage(organization_id=pk) for pk in missing],
+        ignore_conflicts=True,
+    )
+    recompute_storage_usage([user.pk])
+    return list(StorageUsage.objects.filter(_usage_filter(user.pk)))
+
+
+def check_quota(user: User, sizes: List[int]) -> List[bool]:
+    """
+    Decide which of a batch of uploads fit within every quota that applies
+    to ``user``, taking them in order.
+
+    Uploads running at the same time may each pass before the other is
+    counted, so a quota can be overshot by at most one concurrent batch.
+
+    Args:
+        user (User): Uploader
+        sizes (List[int]): Size of each upload in bytes
+
+    Returns:
+        List[bool]: Whether each upload is allowed
+    """
+    limits = [(usage, *_limits(usage)) for usage in get_usage(user)]
+    added_bytes = added_images = 0
+    allowed = []
+    for size in sizes:
+        fits = all(
+            (
+                byte_quota is None
+                or usage.byte_count + added_bytes + size <= byte_quota
+            )
+            and (
+                image_quota is None
+                or usage.image_count + added_images + 1 <= image_quota
+            )
+            for usage, byte_quota, image_quota in limits
+        )
+        if fits:
+            added_bytes += size
+            added_images += 1
+        allowed.append(fits)
+    return allowed
+
+
+def remaining_quota(user: User) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Return how many more bytes and images ``user`` may upload under every
+    quota that applies to them; ``None`` means unlimited.
+    """
+    bytes_left = images_left = None
+    for usage in get_usage(user):
+        byte_quota, image_quota = _limits(usage)
+        if byte_quota is not None:
+            left = max(byte_quota - usage.byte_count, 0)
+            bytes_left = left if bytes_left is None else min(bytes_left, left)
+        if image_quota is not None:
+            left = max(image_quota - usage.image_count, 0)
+            images_left = (
+                left if images_left is None else min(images_left, left)
+            )
+    return bytes_left, images_left
+
+
+def record_usage(user_id, byte_count: int, image_count: int) -> None:
+    """
+    Add to, or with negative amounts subtract from, the counters of a user
+    and their organizations in a single UPDATE.
+
+    Should run in the transaction that writes the Image rows.
+    """
+    if not byte_count and not image_count:
+        return
+    StorageUsage.objects.filter(_usage_filter(user_id)).update(
+        byte_count=Greatest(F("byte_count") + byte_count, Value(0)),
+        image_count=Greatest(F("image_count") + image_count, Value(0)),
+    )
+
+
+def release_usage(images: Iterable[Image]) -> None:
+    """
+    Take deleted images off their uploaders' counters.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for image in images:
+        totals[image.uploaded_by_id][0] += image.byte_size or 0
+        totals[image.uploaded_by_id][1] += 1
+    for user_id, (byte_count, image_count) in totals.items():
+        record_usage(user_id, -byte_count, -image_count)
+
+
+def recompute_storage_usage(user_ids: Optional[List] = None) -> int:
+    """
+    Recount usage from the Image rows and fix counters that drifted.
+
+    The counters are locked before counting, so uploads and deletes that
+    commit meanwhile wait and are applied on top of the fresh totals.
+
+    Args:
+        user_ids (List, optional): Only recompute these users and their
+            organizations, defaults to everyone
+
+    Returns:
+        int: Number of counters corrected
+    """
+    usage = StorageUsage.objects.all()
+    images = Image.objects.all()
+    memberships = Membership.objects.all()
+    if user_ids is not None:
+        organization_ids = Membership.objects.filter(
+            user_id__in=user_ids
+        ).values("organization_id")
+        usage = usage.filter(
+            Q(user_id__in=user_ids) | Q(organization_id__in=organization_ids)
+        )
+        images = images.filter(uploaded_by_id__in=user_ids)
+        memberships = memberships.filter(organization_id__in=organization_ids)
+
+    with transaction.atomic():
+        rows = list(usage.select_for_update())
+        totals = {
+            ("user", row["uploaded_by"]): (row["bytes"], row["images"])
+            for row in images.values("uploaded_by").annotate(
+                bytes=Coalesce(Sum("byte_size"), 0), images=Count("pk")
+            )
+        }
+        totals.update(
+            {
+                ("organization", row["organization"]): (
+                    row["bytes"],
+                    row["images"],
+                )
+                for row in memberships.values("organization").annotate(
+                    bytes=Coalesce(Sum("user__image__byte_size"), 0),
+                    images=Count("user__image"),
+                )
+            }
+        )
+
+        changed = []
+        for row in rows:
+            owner = (
+                ("user", row.user_id)
+                if row.user_id is not None
+                else ("organization", row.organization_id)
+            )
+            byte_count, image_count = totals.pop(owner, (0, 0))
+            if (row.byte_count, row.image_count) != (byte_count, image_count):
+                row.byte_count, row.image_count = byte_count, image_count
+                changed.append(row)
+        StorageUsage.objects.bulk_update(
+            changed, ["byte_count", "image_count"]
+        )
+
+        created = StorageUsage.objects.bulk_create(
+            [
+                StorageUsage(
+                    **{f"{kind}_id": pk},
+                    byte_count=byte_count,
+                    image_count=image_count,
+                )
+                for (kind, pk), (byte_count, image_count) in totals.items()
+                if image_count
+            ],
+            ignore_conflicts=True,
+        )
+    return len(changed) + len(created)
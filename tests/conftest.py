@@ -5,3 +5,18 @@ from rest_framework.test import APIClient
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """
+    Use a cache that every process would share, so users and roles are
+    cached like they are with Redis or Memcached.
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    return settings.CACHES["default"]["LOCATION"]
@@ -0,0 +1,168 @@
+import threading
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+# Objects without a LastModified entry look long settled.
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeS3Client:
+    """
+    Minimal in-memory stand-in for the boto3 S3 client used in tests.
+    """
+
+    def __init__(self, fail_keys=None):
+        self.objects = {}
+        self.multipart_uploads = {}
+        self.aborted_uploads = []
+        self.delete_requests = []
+        self.fail_keys = set(fail_keys or [])
+        self._lock = threading.Lock()
+        self._upload_ids = 0
+
+    def _error(self, code, operation):
+        return ClientError({"Error": {"Code": code}}, operation)
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        if any(key.endswith(suffix) for suffix in self.fail_keys):
+            raise self._error("500", "PutObject")
+        body = fileobj.read()
+        with self._lock:
+            self.objects[key] = {
+                "Body": body,
+                "ContentType": (ExtraArgs or {}).get("ContentType"),
+            }
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.fake/{Params['Key']}?e={ExpiresIn}"
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
+        if isinstance(Body, (bytes, bytearray)):
+            Body = bytes(Body)
+        else:
+            Body = Body.read()
+        with self._lock:
+            self.objects[Key] = {"Body": Body, "ContentType": ContentType}
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, **kw):
+        with self._lock:
+            self._upload_ids += 1
+            upload_id = str(self._upload_ids)
+            self.multipart_uploads[upload_id] = {
+                "Key": Key,
+                "ContentType": ContentType,
+                "Parts": {},
+            }
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        upload = self.multipart_uploads[UploadId]
+        with self._lock:
+            upload["Parts"][PartNumber] = bytes(Body)
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(
+        self, Bucket, Key, UploadId, MultipartUpload
+    ):
+        upload = self.multipart_uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        body = b"".join(upload["Parts"][number] for number in numbers)
+        with self._lock:
+            self.objects[Key] = {
+                "Body": body,
+                "ContentType": upload["ContentType"],
+            }
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.multipart_uploads.pop(UploadId, None)
+        self.aborted_uploads.append(UploadId)
+
+    def generate_presigned_post(
+        self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600
+    ):
+        return {
+            "url": f"https://{Bucket}.fake/",
+            "fields": {**(Fields or {}), "key": Key},
+        }
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._error("404", "HeadObject")
+        body = self.objects[Key]["Body"]
+        return {"ContentLength": len(body)}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._error("NoSuchKey", "GetObject")
+        return {"Body": FakeStreamingBody(self.objects[Key]["Body"])}
+
+    def delete_object(self, Bucket, Key):
+        with self._lock:
+            self.objects.pop(Key, None)
+        return {"ResponseMetadata": {"HTTPStatusCode": 204}}
+
+    def copy_object(self, Bucket, Key, CopySource, **kwargs):
+        with self._lock:
+            if CopySource["Key"] not in self.objects:
+                raise self._error("NoSuchKey", "CopyObject")
+            self.objects[Key] = dict(self.objects[CopySource["Key"]])
+        return {"CopyObjectResult": {}}
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        return FakeListObjectsPaginator(self)
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [item["Key"] for item in Delete["Objects"]]
+        if len(keys) > 1000:
+            raise self._error("MalformedXML", "DeleteObjects")
+        self.delete_requests.append(keys)
+        errors = []
+        with self._lock:
+            for key in keys:
+                if any(key.endswith(suffix) for suffix in self.fail_keys):
+                    errors.append(
+                        {
+                            "Key": key,
+                            "Code": "AccessDenied",
+                            "Message": "Denied",
+                        }
+                    )
+                else:
+                    self.objects.pop(key, None)
+        return {"Errors": errors} if errors else {}
+
+
+class FakeListObjectsPaginator:
+    page_size = 2
+
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix=""):
+        with self.client._lock:
+            keys = sorted(
+                key for key in self.client.objects if key.startswith(Prefix)
+            )
+            items = [
+                {
+                    "Key": key,
+                    "LastModified": self.client.objects[key].get(
+                        "LastModified", EPOCH
+                    ),
+                }
+                for key in keys
+            ]
+        for start in range(0, len(items), self.page_size):
+            yield {"Contents": items[start : start + self.page_size]}
+
+
+class FakeStreamingBody:
+    def __init__(self, body):
+        self.body = body
+
+    def iter_chunks(self, chunk_size=1024):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start : start + chunk_size]
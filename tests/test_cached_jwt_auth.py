@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+
+from authentication.models import Membership, Organization, User
+
+ME_URL = "/api/v1/auth/me/"
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user("reader@example.com", "password123")
+
+
+def login(api_client):
+    response = api_client.post(
+        "/api/v1/auth/login/",
+        {"email": "reader@example.com", "password": "password123"},
+        format="json",
+    )
+    assert response.status_code == 200, response.data
+    api_client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {response.data['access']}"
+    )
+    return api_client
+
+
+@pytest.fixture
+def authenticated_client(api_client, user, shared_cache):
+    return login(api_client)
+
+
+def test_cached_user_skips_the_user_query(
+    authenticated_client, django_assert_num_queries
+):
+    # Savepoint pair, the token's user and the user's memberships
+    with django_assert_num_queries(4):
+        assert authenticated_client.get(ME_URL).status_code == 200
+    with django_assert_num_queries(3):
+        assert authenticated_client.get(ME_URL).status_code == 200
+
+
+def test_saving_the_user_drops_the_cached_copy(authenticated_client, user):
+    assert authenticated_client.get(ME_URL).status_code == 200
+
+    user.is_active = False
+    user.save()
+
+    response = authenticated_client.get(ME_URL)
+    assert response.status_code == 401
+    assert response.data["code"] == "user_inactive"
+
+
+def test_membership_changes_drop_the_cached_copy(authenticated_client, user):
+    assert authenticated_client.get(ME_URL).status_code == 200
+
+    organization = Organization.objects.create(name="Shop", created_by=user)
+    Membership.objects.create(
+        user=user, organization=organization, role="owner"
+    )
+
+    # The version is bumped with an UPDATE, which sends no User signal;
+    # a stale cached copy would make outdated token claims look current.
+    response = authenticated_client.get(ME_URL)
+    assert response.wsgi_request.user.membership_version == 1
+
+
+def test_invalidation_reaches_other_processes(
+    authenticated_client, user, shared_cache, monkeypatch
+):
+    assert authenticated_client.get(ME_URL).status_code == 200
+
+    # Another worker deactivates the user through its own cache client.
+    other_worker = FileBasedCache(shared_cache, {})
+    monkeypatch.setattr(
+        "authentication.backends.shared_cache", lambda: other_worker
+    )
+    user.is_active = False
+    user.save()
+    monkeypatch.undo()
+
+    response = authenticated_client.get(ME_URL)
+    assert response.status_code == 401
+    assert response.data["code"] == "user_inactive"
+
+
+def test_process_local_cache_is_not_used(
+    api_client, user, django_assert_num_queries
+):
+    login(api_client)
+
+    # Savepoint pair, the token's user and the user's memberships
+    for _ in range(2):
+        with django_assert_num_queries(4):
+            assert api_client.get(ME_URL).status_code == 200
@@ -0,0 +1,140 @@
+import io
+import os
+
+import pytest
+from django.conf import settings
+from PIL import Image as PILImage
+
+from authentication.models import User
+from media.features.image.models import Image, StoredImage
+
+KEY = "images/ab/cd/photo.png"
+VARIANT_KEY = "images/ab/cd/photo_480w.webp"
+URL = "/api/v1/media/images/files/"
+
+
+@pytest.fixture
+def owner(db, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_STORAGE_BACKEND", "local"
+    )
+    for key, body in ((KEY, b"0123456789"), (VARIANT_KEY, b"variant")):
+        path = tmp_path / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+    user = User.objects.create_user("owner@example.com", "password123")
+    Image.objects.create(
+        image_key=KEY, variants={"480": VARIANT_KEY}, uploaded_by=user
+    )
+    return user
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_streams_owned_file_with_validators(api_client, owner):
+    api_client.force_authenticate(owner)
+
+    response = api_client.get(URL + KEY)
+
+    assert response.status_code == 200
+    assert read(response) == b"0123456789"
+    assert response["Content-Type"] == "image/png"
+    assert response["Accept-Ranges"] == "bytes"
+    assert "private" in response["Cache-Control"]
+
+    cached = api_client.get(URL + KEY, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert cached.status_code == 304
+
+
+def test_serves_variants_and_byte_ranges(api_client, owner):
+    api_client.force_authenticate(owner)
+
+    assert read(api_client.get(URL + VARIANT_KEY)) == b"variant"
+
+    partial = api_client.get(URL + KEY, HTTP_RANGE="bytes=2-4")
+    assert partial.status_code == 206
+    assert read(partial) == b"234"
+    assert partial["Content-Range"] == "bytes 2-4/10"
+
+    suffix = api_client.get(URL + KEY, HTTP_RANGE="bytes=-3")
+    assert read(suffix) == b"789"
+
+    stale = api_client.get(
+        URL + KEY, HTTP_RANGE="bytes=2-4", HTTP_IF_RANGE='"stale"'
+    )
+    assert stale.status_code == 200
+
+    assert api_client.get(URL + KEY, HTTP_RANGE="bytes=10-").status_code == 416
+
+
+def test_hands_file_to_the_proxy(api_client, owner, monkeypatch):
+    api_client.force_authenticate(owner)
+
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_SENDFILE_BACKEND", "nginx"
+    )
+    response = api_client.get(URL + KEY)
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response["X-Accel-Redirect"] == "/protected-media/" + KEY
+    assert response["ETag"]
+
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_SENDFILE_BACKEND", "apache"
+    )
+    response = api_client.get(URL + KEY)
+    assert response["X-Sendfile"] == f"{settings.MEDIA_ROOT}/{KEY}"
+
+
+def test_rejects_other_users_and_unknown_keys(api_client, owner):
+    other = User.objects.create_user("other@example.com", "password123")
+    api_client.force_authenticate(other)
+    assert api_client.get(URL + KEY).status_code == 404
+
+    api_client.force_authenticate(owner)
+    assert api_client.get(URL + "images/../../etc/passwd").status_code == 404
+    assert api_client.get(URL + "images/ab/cd/other.png").status_code == 404
+
+
+def test_local_backend_uploads_serves_and_deletes(api_client, owner):
+    api_client.force_authenticate(owner)
+    buffer = io.BytesIO()
+    PILImage.effect_noise((8, 8), 64).save(buffer, format="PNG")
+
+    response = api_client.post(
+        "/api/v1/media/images/upload/",
+        {"images": [io.BytesIO(buffer.getvalue())]},
+        format="multipart",
+    )
+    assert response.status_code == 201, response.data
+    key = response.data[0]["key"]
+
+    listed = api_client.get("/api/v1/media/images/").data["results"]
+    [uploaded] = [image for image in listed if image["image_key"] == key]
+    assert uploaded["image_url"] == URL + key
+    assert read(api_client.get(uploaded["image_url"])) == buffer.getvalue()
+
+    response = api_client.post(
+        "/api/v1/media/images/delete/",
+        {"image_uuids": [uploaded["uuid"]]},
+        format="json",
+    )
+    assert response.status_code == 200, response.data
+    assert not os.path.exists(os.path.join(settings.MEDIA_ROOT, key))
+    assert not StoredImage.objects.filter(image_key=key).exists()
+    assert api_client.get(URL + key).status_code == 404
+
+
+def test_local_backend_rejects_presigned_uploads(api_client, owner):
+    api_client.force_authenticate(owner)
+
+    response = api_client.post(
+        "/api/v1/media/images/upload/presign/",
+        {"files": [{"file_name": "a.png", "content_type": "image/png"}]},
+        format="json",
+    )
+    assert response.status_code == 400
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from authentication.models import Membership, Organization, User
+from media.features.image.models import Image
+
+URL = "/api/v1/media/images/"
+
+
+@pytest.fixture
+def user(api_client, db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    api_client.force_authenticate(user)
+    return user
+
+
+def make_images(user, count, start=None):
+    start = start or timezone.now()
+    images = Image.objects.bulk_create(
+        [
+            Image(image_key=f"images/{user.uuid}/{i}.png", uploaded_by=user)
+            for i in range(count)
+        ]
+    )
+    # Pairs share a timestamp so the uuid tie-break is exercised.
+    for i, image in enumerate(images):
+        image.created = start - timedelta(seconds=i // 2)
+    Image.objects.bulk_update(images, ["created"])
+    return sorted(
+        images, key=lambda image: (image.created, image.uuid), reverse=True
+    )
+
+
+def fetch_all(api_client, url, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = api_client.get(url, params)
+        assert response.status_code == 200, response.data
+        pages.append([item["uuid"] for item in response.data["results"]])
+        cursor = response.data["next"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_image_once_newest_first(api_client, user):
+    images = make_images(user, 7)
+    make_images(User.objects.create_user("x@example.com", "password123"), 3)
+
+    pages = fetch_all(api_client, URL, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == [str(image.uuid) for image in images]
+
+
+def test_deep_pages_cost_the_same_queries(
+    api_client, user, django_assert_num_queries
+):
+    make_images(user, 6)
+    first = api_client.get(URL, {"limit": 2})
+
+    # The request's savepoint pair and the page itself; URLs are signed
+    # without touching the database.
+    with django_assert_num_queries(3):
+        api_client.get(URL, {"limit": 2})
+    with django_assert_num_queries(3):
+        api_client.get(URL, {"limit": 2, "cursor": first.data["next"]})
+
+
+def test_organization_listing_merges_members(api_client, user):
+    colleague = User.objects.create_user("colleague@example.com", "pass1234")
+    outsider = User.objects.create_user("outsider@example.com", "pass1234")
+    organization = Organization.objects.create(name="Shop", created_by=user)
+    Membership.objects.create(user=user, organization=organization)
+    Membership.objects.create(user=colleague, organization=organization)
+    now = timezone.now()
+    images = make_images(user, 3, start=now) + make_images(
+        colleague, 3, start=now - timedelta(milliseconds=500)
+    )
+    make_images(outsider, 2)
+    expected = sorted(
+        images, key=lambda image: (image.created, image.uuid), reverse=True
+    )
+
+    url = f"{URL}organizations/{organization.uuid}/"
+    pages = fetch_all(api_client, url, limit=4)
+
+    assert sum(pages, []) == [str(image.uuid) for image in expected]
+
+    api_client.force_authenticate(outsider)
+    assert api_client.get(url).status_code == 404
+
+
+def test_malformed_cursor_is_rejected(api_client, user):
+    response = api_client.get(URL, {"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.data["error"] == "Invalid cursor"
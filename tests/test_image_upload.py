@@ -0,0 +1,388 @@
+import hashlib
+import io
+import threading
+import time
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from fake_s3 import FakeS3Client
+from PIL import Image as PILImage
+
+from authentication.models import User
+from media.features.image.models import Image, StoredImage
+from services.aws_image_service import ImageService
+from services.executors import run_bounded
+from services.image_processing import process_image
+
+
+def make_png(name="photo.png", size=(4, 4), color=(200, 10, 10)):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user("vendor@example.com", "password123")
+
+
+def test_run_bounded_keeps_order_and_isolates_errors():
+    def work(value):
+        time.sleep(0.01 * (5 - value))
+        if value == 2:
+            raise ValueError("bad item")
+        return value * 10
+
+    results = run_bounded(work, range(5), limit=3)
+
+    assert [result for result, _ in results] == [0, 10, None, 30, 40]
+    assert isinstance(results[2][1], ValueError)
+
+
+def test_run_bounded_respects_limit():
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def work(_):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    run_bounded(work, range(8), limit=2)
+
+    assert max(peak) <= 2
+
+
+def test_batch_upload_reports_each_image(user):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    images = [
+        make_png("a.png", color=(1, 2, 3)),
+        SimpleUploadedFile("b.png", b"not an image", "image/png"),
+        make_png("c.png", color=(4, 5, 6)),
+    ]
+
+    results = service.batch_upload_images(images, uploaded_by=user)
+
+    assert results[1] == {"file_name": "b.png", "error": "Invalid image file"}
+    assert results[0]["key"] in s3.objects
+    assert results[2]["key"] in s3.objects
+    names = Image.objects.values_list("original_file_name", flat=True)
+    assert set(names) == {"a.png", "c.png"}
+
+
+def test_batch_upload_query_count_does_not_grow(
+    user, django_assert_max_num_queries
+):
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    images = [make_png(f"{i}.png", color=(i, i, i)) for i in range(10)]
+
+    # Includes creating the uploader's usage counter on first upload and
+    # seeding it from their existing images (five queries).
+    with django_assert_max_num_queries(18):
+        service.batch_upload_images(images, uploaded_by=user)
+
+    assert Image.objects.count() == 10
+
+
+def test_identical_content_is_stored_once(user):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+
+    first = service.batch_upload_images(
+        [make_png("a.png"), make_png("b.png")], uploaded_by=user
+    )
+    second = service.batch_upload_images([make_png("c.png")], uploaded_by=user)
+
+    assert len(s3.objects) == 1
+    assert first[0]["key"] == first[1]["key"] == second[0]["key"]
+    assert StoredImage.objects.get().reference_count == 3
+
+
+def test_object_is_deleted_with_last_reference(user):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    results = service.batch_upload_images(
+        [make_png("a.png"), make_png("b.png")], uploaded_by=user
+    )
+
+    service.delete_image(results[0]["uuid"], user)
+    assert len(s3.objects) == 1
+    assert StoredImage.objects.get().reference_count == 1
+
+    service.delete_image(results[1]["uuid"], user)
+    assert not s3.objects
+    assert not StoredImage.objects.exists()
+
+
+def test_presigned_upload_flow(user, db):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    files = [
+        {"file_name": "a.png", "content_type": "image/png"},
+        {"file_name": "b.txt", "content_type": "text/plain"},
+        {"file_name": "c.jpg", "content_type": "image/jpeg"},
+    ]
+
+    presigned = service.presign_uploads(files, uploaded_by=user)
+
+    assert presigned[1]["error"] == "Invalid image type"
+    assert presigned[0]["upload"]["fields"]["Content-Type"] == "image/png"
+
+    # Only the first file actually reaches the bucket.
+    data = make_png(size=(6, 5)).read()
+    s3.put_object(Bucket="bucket", Key=presigned[0]["key"], Body=data)
+    tokens = [presigned[0]["token"], presigned[2]["token"], "forged"]
+
+    confirmed = service.confirm_uploads(tokens, uploaded_by=user)
+
+    assert confirmed[0]["key"] == presigned[0]["key"]
+    assert confirmed[1]["error"] == "File has not been uploaded"
+    assert confirmed[2]["error"] == "Invalid or expired upload token"
+    assert service.confirm_uploads(tokens[:1], uploaded_by=user) == [
+        confirmed[0]
+    ]
+    image = Image.objects.get()
+    assert image.original_file_name == "a.png"
+    assert image.content_hash == hashlib.sha256(data).hexdigest()
+    assert (image.width, image.height, image.byte_size) == (6, 5, len(data))
+
+
+def test_confirmed_uploads_are_validated_and_deduplicated(user, db):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    [existing] = service.batch_upload_images([make_png()], uploaded_by=user)
+    presigned = service.presign_uploads(
+        [
+            {"file_name": "copy.png", "content_type": "image/png"},
+            {"file_name": "fake.png", "content_type": "image/png"},
+        ],
+        uploaded_by=user,
+    )
+    bodies = [make_png().read(), b"not an image"]
+    for upload, body in zip(presigned, bodies):
+        s3.put_object(Bucket="bucket", Key=upload["key"], Body=body)
+    tokens = [upload["token"] for upload in presigned]
+
+    confirmed = service.confirm_uploads(tokens, uploaded_by=user)
+
+    assert confirmed[0]["key"] == existing["key"]
+    assert confirmed[1] == {
+        "key": presigned[1]["key"],
+        "error": "Invalid image file",
+    }
+    assert set(s3.objects) == {existing["key"]}
+    assert StoredImage.objects.get().reference_count == 2
+    # The duplicate's object is gone, but confirming it again still works.
+    again = service.confirm_uploads(tokens[:1], uploaded_by=user)
+    assert again == confirmed[:1]
+
+
+def test_confirm_rejects_other_users_tokens(user, db):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    other = User.objects.create_user("other@example.com", "password123")
+    presigned = service.presign_uploads(
+        [{"file_name": "a.png", "content_type": "image/png"}], uploaded_by=user
+    )
+    s3.put_object(Bucket="bucket", Key=presigned[0]["key"], Body=b"png")
+
+    confirmed = service.confirm_uploads(
+        [presigned[0]["token"]], uploaded_by=other
+    )
+
+    assert "error" in confirmed[0]
+    assert not Image.objects.exists()
+
+
+def test_resized_variants_are_stored_next_to_original(user):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+
+    [result] = service.batch_upload_images(
+        [make_png("wide.png", size=(600, 300))], uploaded_by=user
+    )
+
+    image = Image.objects.get()
+    assert set(image.variants) == {"160", "480"}
+    stem = result["key"].rsplit(".", 1)[0]
+    assert image.variants["160"] == f"{stem}_160w.png"
+    variant = s3.objects[image.variants["480"]]["Body"]
+    with PILImage.open(io.BytesIO(variant)) as rendered:
+        assert rendered.size == (480, 240)
+
+    service.delete_image(image.uuid, user)
+    assert not s3.objects
+
+
+def make_gradient(name="screenshot.png", size=(600, 300)):
+    buffer = io.BytesIO()
+    gradient = PILImage.linear_gradient("L").resize(size).convert("RGB")
+    gradient.save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+def test_uploads_are_reencoded_when_smaller(user, monkeypatch):
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_TRANSCODE_FORMAT", "webp"
+    )
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    upload = make_gradient()
+
+    [result] = service.batch_upload_images([upload], uploaded_by=user)
+
+    image = Image.objects.get()
+    assert result["key"].endswith(".webp")
+    assert s3.objects[result["key"]]["ContentType"] == "image/webp"
+    assert image.original_byte_size == upload.size
+    assert image.byte_size == len(s3.objects[result["key"]]["Body"])
+    assert image.bytes_saved > 0
+    assert image.variants["480"].endswith("_480w.webp")
+
+
+def test_original_is_kept_when_reencoding_does_not_shrink_it(
+    user, monkeypatch
+):
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_TRANSCODE_FORMAT", "avif"
+    )
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+
+    [result] = service.batch_upload_images([make_png()], uploaded_by=user)
+
+    image = Image.objects.get()
+    assert result["key"].endswith(".png")
+    assert image.byte_size == image.original_byte_size
+    assert image.bytes_saved == 0
+
+
+def test_animated_gif_is_reencoded_as_animated_webp():
+    frames = [
+        PILImage.new("RGB", (200, 200), (i * 40, 0, 0)) for i in range(5)
+    ]
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer, format="GIF", save_all=True, append_images=frames[1:]
+    )
+
+    processed = process_image(buffer.getvalue(), [], "webp")
+
+    data, extension, content_type = processed["transcoded"]
+    assert (extension, content_type) == ("webp", "image/webp")
+    with PILImage.open(io.BytesIO(data)) as transcoded:
+        assert transcoded.n_frames == 5
+
+
+def test_metadata_is_extracted_on_upload(user):
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    exif = PILImage.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees clockwise
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (60, 40), (10, 120, 200)).save(
+        buffer, format="JPEG", exif=exif
+    )
+    upload = SimpleUploadedFile("phone.jpg", buffer.getvalue(), "image/jpeg")
+
+    service.batch_upload_images([upload], uploaded_by=user)
+
+    image = Image.objects.get()
+    assert (image.width, image.height) == (40, 60)
+    assert image.orientation == 6
+    assert image.content_type == "image/jpeg"
+    assert image.byte_size == upload.size
+    assert image.dominant_color.startswith("#")
+    assert len(image.blurhash) == 28
+
+
+def test_bulk_delete_batches_storage_calls(user, db, monkeypatch):
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    other = User.objects.create_user("other@example.com", "password123")
+    uploads = service.batch_upload_images(
+        [make_png(f"{i}.png", color=(i, 0, 0)) for i in range(5)],
+        uploaded_by=user,
+    )
+    [foreign] = service.batch_upload_images([make_png()], uploaded_by=other)
+    monkeypatch.setattr("services.aws_image_service.S3_DELETE_BATCH_SIZE", 2)
+    s3.fail_keys = {uploads[4]["key"]}
+
+    results = service.delete_images(
+        [upload["uuid"] for upload in uploads] + [foreign["uuid"]], user
+    )
+
+    assert [len(request) for request in s3.delete_requests] == [2, 2, 1]
+    assert results[-1] == {"uuid": foreign["uuid"], "error": "Image not found"}
+    assert all(result["deleted"] for result in results[:5])
+    assert results[4]["failed_keys"][0]["key"] == uploads[4]["key"]
+    assert "failed_keys" not in results[0]
+    assert set(s3.objects) == {uploads[4]["key"], foreign["key"]}
+    assert list(Image.objects.all()) == [Image.objects.get(uploaded_by=other)]
+
+
+def test_bulk_delete_endpoint(api_client, user, monkeypatch):
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    [upload] = service.batch_upload_images([make_png()], uploaded_by=user)
+    api_client.force_authenticate(user)
+    monkeypatch.setattr("media.api.image.get_image_service", lambda: service)
+
+    response = api_client.post(
+        "/api/v1/media/images/delete/",
+        {"image_uuids": [upload["uuid"]]},
+        format="json",
+    )
+
+    assert response.status_code == 200, response.data
+    assert response.data == [{"uuid": upload["uuid"], "deleted": True}]
+    assert not Image.objects.exists()
+
+
+def test_bulk_update_endpoint(
+    api_client, user, monkeypatch, django_assert_num_queries
+):
+    images = Image.objects.bulk_create(
+        [
+            Image(image_key=f"{i}.png", description="old", uploaded_by=user)
+            for i in range(5)
+        ]
+    )
+    other = User.objects.create_user("other@example.com", "password123")
+    foreign = Image.objects.create(image_key="x.png", uploaded_by=other)
+    api_client.force_authenticate(user)
+    monkeypatch.setattr(
+        "services.base_image_service.IMAGE_UPDATE_BATCH_SIZE", 2
+    )
+    changes = [
+        {"uuid": str(image.uuid), "description": f"Item {i}"}
+        for i, image in enumerate(images)
+    ]
+    changes[0]["original_file_name"] = "renamed.png"
+    changes.append({"uuid": str(foreign.uuid), "description": "mine now"})
+
+    # The request's savepoint pair, the ownership check and one UPDATE per
+    # batch of two.
+    with django_assert_num_queries(6):
+        response = api_client.post(
+            "/api/v1/media/images/update/", {"images": changes}, format="json"
+        )
+
+    assert response.status_code == 207, response.data
+    assert response.data[-1] == {
+        "uuid": str(foreign.uuid),
+        "error": "Image not found",
+    }
+    assert all(result["updated"] for result in response.data[:5])
+    descriptions = dict(Image.objects.values_list("uuid", "description"))
+    assert [descriptions[image.uuid] for image in images] == [
+        f"Item {i}" for i in range(5)
+    ]
+    assert descriptions[foreign.uuid] is None
+    images[0].refresh_from_db()
+    assert images[0].original_file_name == "renamed.png"
+    assert images[0].last_updated > images[0].created
@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+
+from authentication.models import User
+from media.features.image.models import Image
+from services import base_image_service
+from services.aws_image_service import ImageService
+from utils.cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def clear_url_cache():
+    base_image_service._url_cache.clear()
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache()
+    with mock.patch("utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1, ttl=10)
+    with mock.patch("utils.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+
+
+def test_cached_url_reuses_signature():
+    s3 = mock.Mock()
+    s3.generate_presigned_url.side_effect = lambda *a, **kw: "signed"
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+
+    urls = service.get_image_urls(["k1", "k2", "k1"])
+    service.get_cached_image_url("k1")
+
+    assert urls == {"k1": "signed", "k2": "signed"}
+    assert s3.generate_presigned_url.call_count == 2
+
+
+def test_batch_url_endpoint_only_signs_owned_images(api_client, db):
+    owner = User.objects.create_user("owner@example.com", "password123")
+    other = User.objects.create_user("other@example.com", "password123")
+    Image.objects.create(image_key="images/a.png", uploaded_by=owner)
+    Image.objects.create(image_key="images/b.png", uploaded_by=other)
+    api_client.force_authenticate(owner)
+
+    response = api_client.post(
+        "/api/v1/media/images/urls/",
+        {"image_keys": ["images/a.png", "images/b.png"]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["urls"]["images/a.png"]
+    assert response.data["urls"]["images/b.png"] is None
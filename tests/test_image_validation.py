@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from fake_s3 import FakeS3Client
+from PIL import Image as PILImage
+
+from authentication.models import User
+from media.features.image.models import Image
+from services.aws_image_service import ImageService
+from services.image_validation import ImageInfo, read_image_info
+
+
+def encode(image, image_format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "JPEG", "GIF", "WEBP"])
+def test_dimensions_are_read_from_the_header(image_format):
+    image = PILImage.new("RGB", (321, 123), (1, 2, 3))
+
+    info = read_image_info(encode(image, image_format))
+
+    assert info == ImageInfo(image_format.lower(), 321, 123, 1)
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "GIF", "WEBP"])
+def test_animation_frames_are_counted(image_format):
+    frames = [PILImage.new("RGB", (50, 40), (i * 40, 0, 0)) for i in range(5)]
+    file = encode(
+        frames[0], image_format, save_all=True, append_images=frames[1:]
+    )
+    file.seek(7)
+
+    assert read_image_info(file).frames == 5
+    assert file.tell() == 7
+
+
+def test_non_images_and_truncated_headers_are_rejected():
+    png = encode(PILImage.new("RGB", (8, 8)), "PNG").getvalue()
+
+    assert read_image_info(io.BytesIO(b"GIF89a but not really")) is None
+    assert read_image_info(io.BytesIO(png[:20])) is None
+
+
+def test_upload_over_pixel_limit_is_rejected(db, monkeypatch):
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_MAX_PIXELS", 100 * 100)
+    user = User.objects.create_user("vendor@example.com", "password123")
+    s3 = FakeS3Client()
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    upload = SimpleUploadedFile(
+        "huge.png",
+        encode(PILImage.new("RGB", (101, 100)), "PNG").getvalue(),
+        "image/png",
+    )
+
+    [result] = service.batch_upload_images([upload], uploaded_by=user)
+
+    assert result["error"] == "Image dimensions too large"
+    assert not s3.objects
+    assert not Image.objects.exists()
@@ -0,0 +1,105 @@
+import pytest
+
+from authentication.models import Membership, Organization, User
+
+
+@pytest.fixture
+def owner(api_client, db):
+    owner = User.objects.create_user("owner@example.com", "password123")
+    api_client.force_authenticate(owner)
+    return owner
+
+
+def make_organization(owner, members, other_organizations):
+    organization = Organization.objects.create(name="Shop", created_by=owner)
+    Membership.objects.create(
+        user=owner, organization=organization, role="owner"
+    )
+    others = Organization.objects.bulk_create(
+        [Organization(name=f"Other {i}") for i in range(other_organizations)]
+    )
+    users = User.objects.bulk_create(
+        [User(email=f"member{i}@example.com") for i in range(members)]
+    )
+    Membership.objects.bulk_create(
+        [Membership(user=user, organization=organization) for user in users]
+        + [
+            Membership(user=user, organization=other)
+            for user in [owner, *users]
+            for other in others
+        ]
+    )
+    return organization
+
+
+@pytest.mark.parametrize("members,other_organizations", [(1, 1), (30, 5)])
+def test_member_listing_query_count_is_constant(
+    api_client, owner, members, other_organizations, django_assert_num_queries
+):
+    organization = make_organization(owner, members, other_organizations)
+    url = f"/api/v1/auth/organizations/{organization.uuid}/members/"
+
+    api_client.get(url)
+    # With the caller's role cached: the savepoint pair, the caller's
+    # membership with its organization, members with their users, and
+    # their memberships with organizations.
+    with django_assert_num_queries(5):
+        response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert len(response.data) == members + 1
+    listed = response.data[0]["user"]["organizations"]
+    assert len(listed) == 1 + other_organizations
+    assert {"uuid", "name", "role"} <= set(listed[0])
+
+
+@pytest.mark.parametrize("other_organizations", [1, 10])
+def test_user_detail_query_count_is_constant(
+    api_client, owner, other_organizations, django_assert_num_queries
+):
+    make_organization(owner, 0, other_organizations)
+
+    with django_assert_num_queries(3):
+        response = api_client.get("/api/v1/auth/me/")
+
+    assert response.status_code == 200
+    assert len(response.data["organizations"]) == 1 + other_organizations
+
+
+def test_member_detail_resolves_organization_once(
+    api_client, owner, django_assert_num_queries
+):
+    organization = make_organization(owner, 1, 0)
+    member = Membership.objects.get(organization=organization, role="member")
+    url = (
+        f"/api/v1/auth/organizations/{organization.uuid}/members/"
+        f"{member.uuid}/"
+    )
+
+    api_client.get(url)
+    with django_assert_num_queries(5):
+        response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert response.data["uuid"] == str(member.uuid)
+
+    # Plain members and outsiders are refused before anything is listed.
+    api_client.force_authenticate(member.user)
+    assert api_client.get(url).status_code == 403
+    outsider = User.objects.create_user("outsider@example.com", "pass1234")
+    api_client.force_authenticate(outsider)
+    assert api_client.get(url).status_code == 403
+
+
+def test_adding_a_member_uses_the_resolved_organization(api_client, owner):
+    organization = make_organization(owner, 0, 0)
+    user = User.objects.create_user("new@example.com", "password123")
+
+    response = api_client.post(
+        f"/api/v1/auth/organizations/{organization.uuid}/members/",
+        {"user_id": str(user.uuid), "role": "admin"},
+        format="json",
+    )
+
+    assert response.status_code == 201, response.data
+    assert Membership.objects.get(user=user).organization == organization
@@ -0,0 +1,81 @@
+import pytest
+
+from authentication.models import Membership, Organization, User
+from authentication.roles import _local_roles, get_role
+
+
+@pytest.fixture
+def membership(db):
+    user = User.objects.create_user("member@example.com", "password123")
+    organization = Organization.objects.create(name="Shop", created_by=user)
+    return Membership.objects.create(user=user, organization=organization)
+
+
+def test_roles_are_cached_until_the_membership_changes(
+    membership, django_assert_num_queries
+):
+    args = (membership.user_id, membership.organization_id)
+    with django_assert_num_queries(1):
+        assert get_role(*args) == "member"
+    with django_assert_num_queries(0):
+        assert get_role(*args) == "member"
+
+    membership.role = "admin"
+    membership.save()
+    with django_assert_num_queries(1):
+        assert get_role(*args) == "admin"
+
+    membership.delete()
+    with django_assert_num_queries(1):
+        assert get_role(*args) is None
+    with django_assert_num_queries(0):
+        assert get_role(*args) is None
+
+
+def test_joining_replaces_a_cached_non_member(membership):
+    outsider = User.objects.create_user("outsider@example.com", "pass1234")
+    assert get_role(outsider.pk, membership.organization_id) is None
+
+    Membership.objects.create(
+        user=outsider, organization=membership.organization, role="owner"
+    )
+
+    assert get_role(outsider.pk, membership.organization_id) == "owner"
+
+
+def test_demoted_admins_lose_access_at_once(api_client, membership):
+    membership.role = "admin"
+    membership.save()
+    api_client.force_authenticate(membership.user)
+    url = f"/api/v1/auth/organizations/{membership.organization_id}/members/"
+    assert api_client.get(url).status_code == 200
+
+    membership.role = "member"
+    membership.save()
+
+    assert api_client.get(url).status_code == 403
+
+
+def test_roles_are_shared_between_processes_through_a_shared_cache(
+    membership, shared_cache, django_assert_num_queries
+):
+    args = (membership.user_id, membership.organization_id)
+    _local_roles.clear()
+    get_role(*args)
+
+    # Another process has only the shared cache.
+    _local_roles.clear()
+    with django_assert_num_queries(0):
+        assert get_role(*args) == "member"
+
+
+def test_process_local_cache_is_not_used_for_roles(
+    membership, django_assert_num_queries
+):
+    args = (membership.user_id, membership.organization_id)
+    _local_roles.clear()
+    get_role(*args)
+
+    _local_roles.clear()
+    with django_assert_num_queries(1):
+        assert get_role(*args) == "member"
@@ -0,0 +1,138 @@
+import re
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from fake_s3 import FakeS3Client
+from test_image_upload import make_png
+
+from authentication.models import User
+from media.features.image.models import Image, StoredImage
+from services.aws_image_service import ImageService
+
+SHARDED_KEY = re.compile(r"images/[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$")
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = FakeS3Client()
+    s3.backends = []
+
+    def get_image_service(backend):
+        s3.backends.append(backend)
+        return ImageService(s3_client=s3, bucket_name="bucket")
+
+    monkeypatch.setattr(
+        "media.management.commands.migrate_image_keys.get_image_service",
+        get_image_service,
+    )
+    return s3
+
+
+@pytest.fixture
+def uploads(s3, db, monkeypatch):
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG,
+        "IMAGE_KEY_LAYOUT",
+        "services.key_layouts.OwnerKeyLayout",
+    )
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    first = User.objects.create_user("a@example.com", "password123")
+    second = User.objects.create_user("b@example.com", "password123")
+    results = service.batch_upload_images(
+        [make_png("wide.png", size=(600, 300)), make_png("a.png")],
+        uploaded_by=first,
+    )
+    # Same content as "a.png", so it shares the stored object.
+    results += service.batch_upload_images(
+        [make_png("again.png")], uploaded_by=second
+    )
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG,
+        "IMAGE_KEY_LAYOUT",
+        "services.key_layouts.ShardedKeyLayout",
+    )
+    return results
+
+
+def migrate(*args):
+    out = StringIO()
+    call_command("migrate_image_keys", *args, stdout=out)
+    return out.getvalue()
+
+
+def test_moves_objects_and_rewrites_keys(s3, uploads):
+    old_keys = set(s3.objects)
+
+    output = migrate("--batch-size=1")
+
+    assert "Moved 2 images; 0 failed" in output
+    images = list(Image.objects.all())
+    assert len({image.image_key for image in images}) == 2
+    for image in images:
+        assert SHARDED_KEY.match(image.image_key)
+        assert image.image_key in s3.objects
+        for key in image.variants.values():
+            assert SHARDED_KEY.match(key)
+            assert key in s3.objects
+    for stored_image in StoredImage.objects.all():
+        assert SHARDED_KEY.match(stored_image.image_key)
+    assert not old_keys & set(s3.objects)
+
+    assert "Moved 0 images" in migrate()
+
+
+def test_dry_run_changes_nothing(s3, uploads):
+    keys = dict(s3.objects)
+
+    output = migrate("--dry-run")
+
+    assert "Would move 2 images" in output
+    assert f"{uploads[0]['key']} -> images/" in output
+    assert s3.objects == keys
+    assert Image.objects.filter(image_key=uploads[0]["key"]).exists()
+
+
+def test_failed_copy_leaves_row_in_place(s3, uploads, monkeypatch):
+    copy_object = s3.copy_object
+
+    def flaky_copy_object(Bucket, Key, CopySource, **kwargs):
+        if CopySource["Key"] == uploads[0]["key"]:
+            raise s3._error("InternalError", "CopyObject")
+        return copy_object(Bucket, Key, CopySource, **kwargs)
+
+    monkeypatch.setattr(s3, "copy_object", flaky_copy_object)
+
+    output = migrate()
+
+    assert "Moved 1 images; 1 failed" in output
+    image = Image.objects.get(image_key=uploads[0]["key"])
+    assert uploads[0]["key"] in s3.objects
+    for key in image.variants.values():
+        assert key in s3.objects
+    # Copies made for the failed image are cleaned up again.
+    moved = Image.objects.exclude(pk=image.pk).first()
+    sharded = {key for key in s3.objects if SHARDED_KEY.match(key)}
+    assert sharded == {moved.image_key, *moved.variants.values()}
+
+
+def test_only_images_stored_in_the_backend_move(s3, uploads):
+    user = User.objects.get(email="a@example.com")
+    s3.objects["images/legacy.png"] = {"Body": b"png"}
+    legacy = Image.objects.create(
+        image_key="images/legacy.png", uploaded_by=user
+    )
+    # Stored by another backend, so this bucket has no object for it.
+    elsewhere = Image.objects.create(
+        image_key="images/elsewhere.png", uploaded_by=user
+    )
+
+    output = migrate()
+
+    assert s3.backends == [settings.MEDIA_CONFIG.IMAGE_STORAGE_BACKEND]
+    assert "Moved 3 images; 0 failed" in output
+    legacy.refresh_from_db()
+    assert SHARDED_KEY.match(legacy.image_key)
+    elsewhere.refresh_from_db()
+    assert elsewhere.image_key == "images/elsewhere.png"
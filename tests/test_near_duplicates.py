@@ -0,0 +1,116 @@
+import io
+import random
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from fake_s3 import FakeS3Client
+from PIL import Image as PILImage
+from PIL import ImageDraw
+
+from authentication.models import User
+from media.features.image.models import Image
+from services.aws_image_service import ImageService
+from services.near_duplicates import get_near_duplicate_index
+from utils.bktree import BKTree, hamming_distance
+
+
+def make_photo(name, size, image_format="PNG", seed=0):
+    # Same drawing at any size, so only the encoding differs.
+    image = PILImage.new("RGB", (400, 300), (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    shapes = random.Random(seed)
+    for _ in range(12):
+        x, y = shapes.randrange(360), shapes.randrange(260)
+        color = tuple(shapes.randrange(256) for _ in range(3))
+        draw.ellipse((x, y, x + 40, y + 40), fill=color)
+    buffer = io.BytesIO()
+    image.resize(size).save(buffer, format=image_format)
+    content_type = f"image/{image_format.lower()}"
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type)
+
+
+def test_bktree_radius_search_matches_linear_scan():
+    values = random.Random(1)
+    keys = [values.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for position, key in enumerate(keys):
+        tree.add(key, position)
+    query = keys[7] ^ 0b1011
+
+    found = {position for _, _, position in tree.search(query, 10)}
+
+    expected = {
+        position
+        for position, key in enumerate(keys)
+        if hamming_distance(query, key) <= 10
+    }
+    assert found == expected
+    assert tree.remove(keys[7], 7)
+    assert 7 not in {position for _, _, position in tree.search(query, 10)}
+    assert len(tree) == 499
+
+
+def test_resized_reupload_is_flagged_as_near_duplicate(db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    other = User.objects.create_user("other@example.com", "password123")
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    [original] = service.batch_upload_images(
+        [make_photo("shoe.png", (400, 300))], uploaded_by=user
+    )
+
+    [resized, unrelated] = service.batch_upload_images(
+        [
+            make_photo("shoe-small.jpg", (200, 150), "JPEG"),
+            make_photo("hat.png", (400, 300), seed=99),
+        ],
+        uploaded_by=user,
+    )
+    [elsewhere] = service.batch_upload_images(
+        [make_photo("copy.png", (300, 225))], uploaded_by=other
+    )
+
+    assert resized["near_duplicate_of"] == original["uuid"]
+    assert unrelated["near_duplicate_of"] is None
+    assert elsewhere["near_duplicate_of"] is None
+    flagged = Image.objects.get(uuid=resized["uuid"])
+    assert str(flagged.near_duplicate_of_id) == original["uuid"]
+
+
+def test_deleted_images_are_not_matched(db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    [first] = service.batch_upload_images(
+        [make_photo("shoe.png", (400, 300))], uploaded_by=user
+    )
+    service.delete_image(first["uuid"], user)
+
+    [second] = service.batch_upload_images(
+        [make_photo("shoe-small.png", (200, 150))], uploaded_by=user
+    )
+
+    assert second["near_duplicate_of"] is None
+
+
+def test_index_leaves_images_in_until_the_delete_commits(
+    db, monkeypatch, django_capture_on_commit_callbacks
+):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    service = ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+    [upload] = service.batch_upload_images(
+        [make_photo("shoe.png", (400, 300))], uploaded_by=user
+    )
+    image = Image.objects.get(uuid=upload["uuid"])
+    index = get_near_duplicate_index()
+
+    def fail(images):
+        raise RuntimeError("Counter update failed")
+
+    monkeypatch.setattr("services.base_image_service.release_usage", fail)
+    with pytest.raises(RuntimeError):
+        service.delete_image(upload["uuid"], user)
+    assert index.find(image.perceptual_hash, user.pk, 0)
+
+    monkeypatch.undo()
+    with django_capture_on_commit_callbacks(execute=True):
+        service.delete_image(upload["uuid"], user)
+    assert not index.find(image.perceptual_hash, user.pk, 0)
@@ -0,0 +1,105 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import Membership, Organization, User
+from authentication.roles import ROLES_CLAIM, ROLES_VERSION_CLAIM
+
+
+@pytest.fixture
+def claims_enabled(monkeypatch):
+    monkeypatch.setattr(settings.AUTH_CONFIG, "JWT_ORGANIZATION_CLAIMS", True)
+
+
+@pytest.fixture
+def membership(db):
+    user = User.objects.create_user("owner@example.com", "password123")
+    organization = Organization.objects.create(name="Shop", created_by=user)
+    return Membership.objects.create(
+        user=user, organization=organization, role="owner"
+    )
+
+
+def login(api_client):
+    response = api_client.post(
+        "/api/v1/auth/login/",
+        {"email": "owner@example.com", "password": "password123"},
+        format="json",
+    )
+    assert response.status_code == 200, response.data
+    return response.data["access"]
+
+
+def test_access_token_carries_versioned_roles(
+    api_client, membership, claims_enabled
+):
+    token = AccessToken(login(api_client))
+
+    assert token[ROLES_CLAIM] == {str(membership.organization_id): "o"}
+    membership.user.refresh_from_db()
+    assert token[ROLES_VERSION_CLAIM] == membership.user.membership_version
+
+
+def test_current_claims_skip_the_role_lookup(
+    api_client,
+    membership,
+    claims_enabled,
+    shared_cache,
+    django_assert_num_queries,
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login(api_client)}")
+    url = f"/api/v1/auth/organizations/{membership.organization_id}/members/"
+    # The first request caches the user, the second its membership_version.
+    for _ in range(2):
+        assert api_client.get(url).status_code == 200
+
+    # Savepoint pair, the caller's membership with its organization,
+    # members and their memberships. The user and membership_version come
+    # from the cache, and there is no role lookup.
+    with django_assert_num_queries(5):
+        response = api_client.get(url)
+    assert response.status_code == 200
+
+    # Demoting the owner outdates the token, which falls back to the DB.
+    membership.role = "member"
+    membership.save()
+    assert api_client.get(url).status_code == 403
+
+
+def test_freshly_loaded_users_need_no_version_lookup(
+    api_client, membership, claims_enabled, django_assert_num_queries
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login(api_client)}")
+    url = f"/api/v1/auth/organizations/{membership.organization_id}/members/"
+
+    # Without a shared cache: savepoint pair, the token's user, the
+    # caller's membership with its organization, members and their
+    # memberships; the version comes with the user.
+    for _ in range(2):
+        with django_assert_num_queries(6):
+            assert api_client.get(url).status_code == 200
+
+
+def test_tokens_without_claims_use_the_database(api_client, membership):
+    token = login(api_client)
+    assert ROLES_CLAIM not in AccessToken(token)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    url = f"/api/v1/auth/organizations/{membership.organization_id}/members/"
+    assert api_client.get(url).status_code == 200
+
+
+def test_claims_are_checked_against_the_current_version(
+    api_client, membership, claims_enabled, shared_cache
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login(api_client)}")
+    url = f"/api/v1/auth/organizations/{membership.organization_id}/members/"
+    stale_user = api_client.get(url).wsgi_request.user
+
+    membership.role = "member"
+    membership.save()
+    # A request that loaded the user before the change caches it again.
+    caches["default"].set(f"jwt-user:{stale_user.pk}", stale_user, 300)
+
+    assert api_client.get(url).status_code == 403
@@ -0,0 +1,116 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from fake_s3 import FakeS3Client
+from test_image_upload import make_png
+
+from authentication.models import User
+from media.features.image.models import Image, StorageUsage, StoredImage
+from services.aws_image_service import ImageService
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = FakeS3Client()
+    monkeypatch.setattr(
+        "media.management.commands.reconcile_images.ImageService",
+        lambda s3_client, bucket_name: ImageService(
+            s3_client=s3, bucket_name="bucket"
+        ),
+    )
+    return s3
+
+
+@pytest.fixture
+def uploads(s3, db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    return service.batch_upload_images(
+        [
+            make_png("a.png", color=(1, 0, 0)),
+            make_png("wide.png", size=(600, 300)),
+            make_png("c.png", color=(3, 0, 0)),
+        ],
+        uploaded_by=user,
+    )
+
+
+def reconcile(*args):
+    out = StringIO()
+    call_command("reconcile_images", "--min-age=0", *args, stdout=out)
+    return out.getvalue()
+
+
+def test_reports_orphans_on_both_sides(s3, uploads):
+    s3.objects["images/stray/left-over.png"] = {"Body": b"x"}
+    s3.objects["images/stray/in-flight.png"] = {
+        "Body": b"x",
+        "LastModified": timezone.now(),
+    }
+    del s3.objects[uploads[0]["key"]]
+
+    output = reconcile("--min-age=60")
+
+    assert "Orphaned object: images/stray/left-over.png" in output
+    assert "in-flight" not in output
+    assert f"Missing object: {uploads[0]['key']}" in output
+    assert "Found 1 objects without an image and 1 images" in output
+    assert "images/stray/left-over.png" in s3.objects
+    assert Image.objects.count() == 3
+
+
+def test_delete_cleans_orphans_in_batches(s3, uploads):
+    stray = [f"images/stray/{i}.png" for i in range(5)]
+    for key in stray:
+        s3.objects[key] = {"Body": b"x"}
+    wide = Image.objects.get(original_file_name="wide.png")
+    del s3.objects[wide.image_key]
+
+    output = reconcile("--delete", "--batch-size=2")
+
+    assert "Removed 5 objects without an image and 1 images" in output
+    assert [len(request) for request in s3.delete_requests[:3]] == [2, 2, 1]
+    assert not set(stray) & set(s3.objects)
+    # The variants of the missing original went with it.
+    assert not set(wide.variants.values()) & set(s3.objects)
+    assert not Image.objects.filter(pk=wide.pk).exists()
+    assert StoredImage.objects.count() == 2
+    assert uploads[0]["key"] in s3.objects
+    # The user's counters no longer include the removed image.
+    usage = StorageUsage.objects.get(user=wide.uploaded_by)
+    assert usage.image_count == 2
+    assert usage.byte_count == sum(
+        image.byte_size for image in Image.objects.all()
+    )
+
+
+def test_variants_are_not_reported_as_orphans(s3, uploads):
+    assert any("_160w" in key for key in s3.objects)
+    assert "Found 0 objects without an image and 0 images" in reconcile()
+
+
+def test_endpoint_url_builds_a_client_for_it(db, monkeypatch):
+    s3 = FakeS3Client()
+    s3.objects["images/stray/left-over.png"] = {"Body": b"x"}
+    clients = []
+
+    def client(service_name, **kwargs):
+        clients.append((service_name, kwargs))
+        return s3
+
+    monkeypatch.setattr(
+        "media.management.commands.reconcile_images.boto3.client", client
+    )
+
+    output = reconcile("--endpoint-url=http://127.0.0.1:9000")
+
+    assert "Orphaned object: images/stray/left-over.png" in output
+    [(service_name, kwargs)] = clients
+    assert service_name == "s3"
+    assert kwargs["endpoint_url"] == "http://127.0.0.1:9000"
+    assert kwargs["aws_access_key_id"] == (
+        settings.AWS_CONFIG.AWS_S3_ACCESS_KEY_ID
+    )
@@ -0,0 +1,287 @@
+import hashlib
+import io
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from fake_s3 import FakeS3Client
+from PIL import Image as PILImage
+from test_image_upload import make_png
+
+from authentication.models import User
+from media.features.image.models import Image, ResumableUpload
+from services.aws_image_service import ImageService
+from services.base_image_service import BaseImageService
+from services.local_image_service import ImageService as LocalImageService
+
+URL = "/api/v1/media/images/uploads/"
+
+
+class StagingImageService(ImageService):
+    """
+    Stages chunks on disk like the Cloudinary service, but stores the
+    result in the fake bucket.
+    """
+
+    begin_chunked_object = BaseImageService.begin_chunked_object
+    write_chunk = BaseImageService.write_chunk
+    finish_chunked_object = BaseImageService.finish_chunked_object
+    abort_chunked_object = BaseImageService.abort_chunked_object
+
+
+@pytest.fixture
+def s3():
+    return FakeS3Client()
+
+
+@pytest.fixture
+def user(api_client, db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    api_client.force_authenticate(user)
+    return user
+
+
+@pytest.fixture
+def staging_dir(s3, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_RESUMABLE_UPLOAD_DIR", str(tmp_path)
+    )
+    monkeypatch.setattr(
+        "media.api.image.get_image_service",
+        lambda: StagingImageService(s3_client=s3, bucket_name="bucket"),
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def multipart(s3, monkeypatch):
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_STREAMING_UPLOADS", True)
+    monkeypatch.setattr("services.aws_image_service.S3_MIN_PART_SIZE", 100)
+    monkeypatch.setattr(
+        "media.api.image.get_image_service",
+        lambda: ImageService(s3_client=s3, bucket_name="bucket"),
+    )
+
+
+def png_bytes(size=(64, 64)):
+    return make_png(size=size).read()
+
+
+def create(api_client, data, name="photo.png"):
+    response = api_client.post(
+        URL,
+        {"file_name": name, "content_type": "image/png", "length": len(data)},
+        format="json",
+    )
+    assert response.status_code == 201, response.data
+    return response["Location"]
+
+
+def send(api_client, location, offset, chunk):
+    return api_client.generic(
+        "PATCH",
+        location,
+        chunk,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def test_staged_upload_resumes_from_reported_offset(
+    api_client, user, s3, staging_dir
+):
+    data = png_bytes()
+    location = create(api_client, data)
+
+    response = send(api_client, location, 0, data[:100])
+    assert response.status_code == 204
+    assert response["Upload-Offset"] == "100"
+
+    # A retry of the first chunk after its response was lost.
+    assert send(api_client, location, 0, data[:100]).status_code == 409
+    head = api_client.head(location)
+    assert head["Upload-Offset"] == "100"
+    assert head["Upload-Length"] == str(len(data))
+
+    assert send(api_client, location, 100, data[100:]).status_code == 204
+    response = api_client.post(location + "complete/")
+
+    assert response.status_code == 201, response.data
+    image = Image.objects.get(uuid=response.data["uuid"])
+    assert image.uploaded_by == user
+    assert image.content_hash == hashlib.sha256(data).hexdigest()
+    assert s3.objects[image.image_key]["Body"] == data
+    assert not list(staging_dir.iterdir())
+    assert not ResumableUpload.objects.exists()
+
+
+def test_s3_upload_sends_each_chunk_as_a_part(api_client, user, s3, multipart):
+    data = png_bytes((128, 128))
+    location = create(api_client, data)
+
+    response = send(api_client, location, 0, data[:50])
+    assert response.status_code == 400
+    assert "at least 5 MiB" in response.data["error"]
+
+    for offset in range(0, len(data), 150):
+        chunk = data[offset : offset + 150]
+        assert send(api_client, location, offset, chunk).status_code == 204
+    response = api_client.post(location + "complete/")
+
+    assert response.status_code == 201, response.data
+    image = Image.objects.get(uuid=response.data["uuid"])
+    assert image.content_hash == hashlib.sha256(data).hexdigest()
+    assert (image.width, image.height) == (128, 128)
+    assert s3.objects[image.image_key]["Body"] == data
+    assert not s3.multipart_uploads
+
+
+def test_s3_upload_is_checked_once_assembled(
+    api_client, user, s3, multipart, monkeypatch
+):
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_MAX_FRAMES", 3)
+    frames = [PILImage.new("RGB", (8, 8), (i, 0, 0)) for i in range(4)]
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer, format="GIF", save_all=True, append_images=frames[1:]
+    )
+    data = buffer.getvalue()
+    response = api_client.post(
+        URL,
+        {
+            "file_name": "a.gif",
+            "content_type": "image/gif",
+            "length": len(data),
+        },
+        format="json",
+    )
+    location = response["Location"]
+
+    assert send(api_client, location, 0, data).status_code == 204
+    response = api_client.post(location + "complete/")
+
+    assert response.status_code == 400
+    assert response.data["error"] == "Too many animation frames"
+    assert not s3.objects
+    assert not Image.objects.exists()
+
+
+def test_incomplete_and_invalid_uploads_are_rejected(
+    api_client, user, staging_dir
+):
+    data = png_bytes()
+    location = create(api_client, data)
+
+    response = send(api_client, location, 0, b"not an image" * 10)
+    assert response.status_code == 400
+    assert response.data["error"] == "Invalid image file"
+    assert api_client.head(location)["Upload-Offset"] == "0"
+
+    send(api_client, location, 0, data[:100])
+    response = api_client.post(location + "complete/")
+    assert response.status_code == 400
+    assert response.data["error"] == "Upload is incomplete"
+
+    too_long = send(api_client, location, 100, data[100:] + b"extra")
+    assert too_long.status_code == 400
+
+
+def test_uploads_belong_to_their_creator(api_client, user, staging_dir):
+    location = create(api_client, png_bytes())
+
+    other = User.objects.create_user("other@example.com", "password123")
+    api_client.force_authenticate(other)
+
+    assert api_client.head(location).status_code == 404
+    assert api_client.delete(location).status_code == 404
+
+
+def test_cancelled_and_expired_uploads_free_their_storage(
+    api_client, user, s3, staging_dir, multipart
+):
+    data = png_bytes((128, 128))
+    location = create(api_client, data)
+    send(api_client, location, 0, data[:150])
+
+    assert api_client.delete(location).status_code == 204
+    assert api_client.head(location).status_code == 404
+    assert s3.aborted_uploads and not s3.multipart_uploads
+
+    location = create(api_client, data)
+    send(api_client, location, 0, data[:150])
+    ResumableUpload.objects.update(
+        created=ResumableUpload.objects.get().created - timedelta(days=2)
+    )
+    assert api_client.head(location).status_code == 404
+
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    assert service.purge_expired_uploads() == 1
+    assert not s3.multipart_uploads
+    assert not ResumableUpload.objects.exists()
+    # The management command runs the same purge for every backend.
+    out = StringIO()
+    call_command("purge_resumable_uploads", stdout=out)
+    assert "Removed 0 expired uploads" in out.getvalue()
+
+
+def test_failed_completion_keeps_the_upload_for_a_retry(
+    api_client, user, s3, multipart, monkeypatch
+):
+    data = png_bytes()
+    location = create(api_client, data)
+    assert send(api_client, location, 0, data).status_code == 204
+
+    def unavailable(**kwargs):
+        raise s3._error("SlowDown", "GetObject")
+
+    get_object = s3.get_object
+    monkeypatch.setattr(s3, "get_object", unavailable)
+    response = api_client.post(location + "complete/")
+    assert response.status_code == 400
+    assert response.data["error"] == "Upload failed"
+    upload = ResumableUpload.objects.get()
+    assert upload.completing_since is None
+    assert not Image.objects.exists()
+
+    upload.completing_since = timezone.now()
+    upload.save()
+    response = api_client.post(location + "complete/")
+    assert response.data["error"] == "Upload is already being completed"
+    assert api_client.delete(location).status_code == 409
+
+    ResumableUpload.objects.update(completing_since=None)
+    monkeypatch.setattr(s3, "get_object", get_object)
+    response = api_client.post(location + "complete/")
+    assert response.status_code == 201, response.data
+    image = Image.objects.get()
+    assert image.uuid == upload.uuid
+    assert s3.objects[image.image_key]["Body"] == data
+    assert not ResumableUpload.objects.exists()
+
+
+def test_expired_local_uploads_are_purged(
+    user, settings, tmp_path, monkeypatch
+):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG,
+        "IMAGE_RESUMABLE_UPLOAD_DIR",
+        str(tmp_path / "parts"),
+    )
+    service = LocalImageService()
+    data = png_bytes()
+    upload = service.create_resumable_upload(
+        "photo.png", "image/png", len(data), user
+    )
+    service.append_resumable_upload(upload.uuid, user, 0, data[:100])
+    ResumableUpload.objects.update(created=upload.created - timedelta(days=2))
+
+    out = StringIO()
+    call_command("purge_resumable_uploads", stdout=out)
+
+    assert "Removed 1 expired uploads" in out.getvalue()
+    assert not ResumableUpload.objects.exists()
+    assert not list((tmp_path / "parts").iterdir())
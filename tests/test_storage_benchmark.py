@@ -0,0 +1,42 @@
+import json
+
+from django.core.management import call_command
+
+from benchmarks.storage import OPERATIONS, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_benchmark_reports_every_backend_operation(tmp_path):
+    output = tmp_path / "report.json"
+
+    call_command(
+        "benchmark_storage",
+        sizes="2kb",
+        concurrency="1,4",
+        operations=4,
+        output=str(output),
+    )
+
+    report = json.loads(output.read_text())
+    results = report["results"]
+    assert {
+        (result["backend"], result["operation"], result["concurrency"])
+        for result in results
+    } == {
+        (backend, operation, concurrency)
+        for backend in ("s3", "cloudinary", "local")
+        for operation in OPERATIONS
+        for concurrency in (1, 4)
+    }
+    for result in results:
+        assert result["errors"] == 0, result
+        assert result["p50_ms"] <= result["p99_ms"]
+        assert result["peak_rss_bytes"] > 0
@@ -0,0 +1,53 @@
+import threading
+
+import cloudinary.api_client.call_api
+import cloudinary.uploader
+import pytest
+
+from services import storage_clients
+from services.aws_image_service import ImageService as S3ImageService
+from services.image_service import ImageService
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    storage_clients._clients.clear()
+    yield
+    storage_clients._clients.clear()
+
+
+def test_services_share_one_pooled_s3_client():
+    clients = []
+    threads = [
+        threading.Thread(
+            target=lambda: clients.append(S3ImageService().s3_client)
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    config = clients[0].meta.config
+    assert config.max_pool_connections == 32
+    assert config.tcp_keepalive
+
+
+def test_cloudinary_is_configured_once_with_a_wider_pool():
+    ImageService()
+    connector = cloudinary.uploader._http
+    ImageService()
+
+    assert cloudinary.uploader._http is connector
+    assert cloudinary.api_client.call_api._http is connector
+    assert connector.connection_pool_kw["maxsize"] == 32
+
+
+def test_registry_is_rebuilt_after_fork():
+    client = storage_clients.get_storage_client("s3")
+
+    storage_clients._reset_after_fork()
+
+    assert storage_clients.get_storage_client("s3") is not client
@@ -0,0 +1,163 @@
+import pytest
+from django.conf import settings
+from fake_s3 import FakeS3Client
+from test_image_upload import make_png
+
+from authentication.models import Membership, Organization, User
+from config.admin import admin_site
+from media.admin import ImagesAdmin
+from media.features.image.models import Image, StorageUsage, StoredImage
+from services.aws_image_service import ImageService
+from services.storage_quotas import check_quota, recompute_storage_usage
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user("vendor@example.com", "password123")
+
+
+@pytest.fixture
+def organization(user):
+    organization = Organization.objects.create(name="Shop", created_by=user)
+    Membership.objects.create(user=user, organization=organization)
+    return organization
+
+
+@pytest.fixture
+def service():
+    return ImageService(s3_client=FakeS3Client(), bucket_name="bucket")
+
+
+def usage_of(**owner):
+    usage = StorageUsage.objects.get(**owner)
+    return usage.byte_count, usage.image_count
+
+
+def test_counters_follow_uploads_and_deletes(user, organization, service):
+    images = [
+        make_png("a.png", color=(1, 2, 3)),
+        make_png("b.png", color=(4, 5, 6)),
+    ]
+    results = service.batch_upload_images(images, uploaded_by=user)
+    total = sum(image.size for image in images)
+
+    assert usage_of(user=user) == (total, 2)
+    assert usage_of(organization=organization) == (total, 2)
+
+    service.delete_image(results[0]["uuid"], user)
+
+    assert usage_of(user=user) == (images[1].size, 1)
+    assert usage_of(organization=organization) == (images[1].size, 1)
+
+
+def test_uploads_over_quota_fail_before_storing(
+    user, organization, service, monkeypatch
+):
+    service.batch_upload_images([make_png("a.png")], uploaded_by=user)
+    StorageUsage.objects.filter(organization=organization).update(
+        image_quota=2
+    )
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_USER_BYTE_QUOTA", 10_000_000
+    )
+
+    images = [
+        make_png("b.png", color=(4, 5, 6)),
+        make_png("c.png", color=(7, 8, 9)),
+    ]
+    results = service.batch_upload_images(images, uploaded_by=user)
+
+    assert "error" not in results[0]
+    assert results[1] == {
+        "file_name": "c.png",
+        "error": "Storage quota exceeded",
+    }
+    stored = set()
+    for image in Image.objects.all():
+        stored |= {image.image_key, *image.variants.values()}
+    assert Image.objects.count() == 2
+    assert set(service.s3_client.objects) == stored
+    assert usage_of(organization=organization)[1] == 2
+
+
+def test_confirmed_uploads_count_their_stored_size(
+    user, organization, service, monkeypatch
+):
+    small = make_png("small.png", color=(1, 2, 3)).read()
+    large = make_png("large.png", size=(64, 64), color=(4, 5, 6)).read()
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_USER_BYTE_QUOTA", len(small) + 10
+    )
+    presigned = service.presign_uploads(
+        [
+            {"file_name": "small.png", "content_type": "image/png"},
+            {"file_name": "large.png", "content_type": "image/png"},
+        ],
+        uploaded_by=user,
+    )
+    for upload, body in zip(presigned, [small, large]):
+        service.s3_client.put_object(
+            Bucket="bucket", Key=upload["key"], Body=body
+        )
+
+    confirmed = service.confirm_uploads(
+        [upload["token"] for upload in presigned], uploaded_by=user
+    )
+
+    assert "error" not in confirmed[0]
+    assert confirmed[1] == {
+        "key": presigned[1]["key"],
+        "error": "Storage quota exceeded",
+    }
+    assert presigned[1]["key"] not in service.s3_client.objects
+    assert usage_of(user=user) == (len(small), 1)
+
+
+def test_recompute_corrects_drift(user, organization, service):
+    other = User.objects.create_user("other@example.com", "password123")
+    service.batch_upload_images([make_png("a.png")], uploaded_by=user)
+    expected = usage_of(user=user)
+    StorageUsage.objects.update(byte_count=999, image_count=7)
+    Image.objects.create(image_key="legacy.png", uploaded_by=other)
+
+    assert recompute_storage_usage() == 3
+    assert usage_of(user=user) == expected
+    assert usage_of(organization=organization) == expected
+    assert usage_of(user=other) == (0, 1)
+    assert recompute_storage_usage() == 0
+
+
+def test_admin_deletes_release_content_and_usage(
+    user, organization, service, monkeypatch
+):
+    images = [
+        make_png("a.png", color=(1, 2, 3)),
+        make_png("b.png", color=(4, 5, 6)),
+        make_png("c.png", color=(7, 8, 9)),
+    ]
+    results = service.batch_upload_images(images, uploaded_by=user)
+    monkeypatch.setattr("media.admin.get_image_service", lambda: service)
+    model_admin = ImagesAdmin(Image, admin_site)
+
+    model_admin.delete_model(None, Image.objects.get(uuid=results[0]["uuid"]))
+    model_admin.delete_queryset(
+        None, Image.objects.filter(uuid=results[1]["uuid"])
+    )
+
+    assert usage_of(user=user) == (images[2].size, 1)
+    assert usage_of(organization=organization) == (images[2].size, 1)
+    assert list(StoredImage.objects.values_list("image_key", flat=True)) == [
+        results[2]["key"]
+    ]
+    assert set(service.s3_client.objects) == {results[2]["key"]}
+
+
+def test_new_counters_start_from_existing_images(user, organization):
+    # Images recorded before the counters existed.
+    Image.objects.create(image_key="a.png", uploaded_by=user, byte_size=400)
+    Image.objects.create(image_key="b.png", uploaded_by=user, byte_size=600)
+
+    assert check_quota(user, [0]) == [True]
+
+    assert usage_of(user=user) == (1000, 2)
+    assert usage_of(organization=organization) == (1000, 2)
@@ -0,0 +1,212 @@
+import hashlib
+import io
+import re
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from fake_s3 import FakeS3Client
+from PIL import Image as PILImage
+
+from authentication.models import User
+from media.features.image.models import Image, StoredImage
+from media.features.image.upload_handlers import (
+    S3MultipartUploadHandler,
+    S3UploadedFile,
+)
+from services import storage_clients
+from services.aws_image_service import ImageService
+
+
+def png_bytes(size=(64, 64)):
+    buffer = io.BytesIO()
+    PILImage.effect_noise(size, 64).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def stream(handler, name, content_type, data, chunk_size=1024):
+    handler.new_file("images", name, content_type, len(data))
+    for start in range(0, len(data), chunk_size):
+        handler.receive_data_chunk(data[start : start + chunk_size], start)
+    return handler.file_complete(len(data))
+
+
+@pytest.fixture
+def s3():
+    return FakeS3Client()
+
+
+@pytest.fixture
+def handler(s3):
+    service = ImageService(s3_client=s3, bucket_name="bucket")
+    handler = S3MultipartUploadHandler(image_service=service, owner_id="u")
+    handler.part_size = 4096
+    return handler
+
+
+def test_large_file_is_sent_as_multipart_parts(handler, s3):
+    data = png_bytes((256, 256))
+    assert len(data) > 3 * handler.part_size
+
+    uploaded = stream(handler, "big.png", "image/png", data)
+
+    assert isinstance(uploaded, S3UploadedFile)
+    assert re.match(
+        r"images/[0-9a-f]{2}/[0-9a-f]{2}/[^/]+\.png$", uploaded.key
+    )
+    assert uploaded.size == len(data)
+    assert uploaded.content_hash == hashlib.sha256(data).hexdigest()
+    assert s3.objects[uploaded.key]["Body"] == data
+    assert not s3.multipart_uploads
+
+
+def test_small_file_uses_single_put(handler, s3):
+    data = png_bytes((4, 4))
+
+    uploaded = stream(handler, "small.png", "image/png", data)
+
+    assert s3.objects[uploaded.key]["Body"] == data
+    assert s3._upload_ids == 0
+
+
+def test_non_image_is_passed_to_next_handler(handler, s3):
+    handler.new_file("images", "notes.png", "image/png", 10)
+
+    assert handler.receive_data_chunk(b"plain text", 0) == b"plain text"
+    assert handler.file_complete(10) is None
+    assert not s3.objects
+
+
+def test_oversized_file_is_aborted(handler, s3, monkeypatch):
+    monkeypatch.setattr(
+        "media.features.image.upload_handlers.MAX_IMAGE_SIZE", 10_000
+    )
+    data = png_bytes((256, 256))
+
+    uploaded = stream(handler, "big.png", "image/png", data)
+
+    assert uploaded.key is None
+    assert s3.aborted_uploads
+    assert not s3.objects
+
+
+def gif_bytes(frames):
+    images = [PILImage.new("RGB", (8, 8), (i, 0, 0)) for i in range(frames)]
+    buffer = io.BytesIO()
+    images[0].save(
+        buffer, format="GIF", save_all=True, append_images=images[1:]
+    )
+    return buffer.getvalue()
+
+
+def test_streamed_uploads_share_the_image_limits(handler, s3, monkeypatch, db):
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_MAX_FRAMES", 3)
+    user = User.objects.create_user("vendor@example.com", "password123")
+    uploads = [
+        stream(handler, "ok.gif", "image/gif", gif_bytes(3), chunk_size=64),
+        stream(handler, "long.gif", "image/gif", gif_bytes(4), chunk_size=64),
+    ]
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_MAX_PIXELS", 100)
+    uploads.append(stream(handler, "wide.png", "image/png", png_bytes()))
+
+    assert uploads[1].key is None and uploads[2].key is None
+    assert list(s3.objects) == [uploads[0].key]
+    results = handler.image_service.batch_upload_images(uploads, user)
+
+    assert results[0]["key"] == uploads[0].key
+    assert results[1]["error"] == "Too many animation frames"
+    assert results[2]["error"] == "Image dimensions too large"
+
+
+def test_upload_view_streams_to_s3(api_client, s3, monkeypatch, db):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    api_client.force_authenticate(user)
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_STREAMING_UPLOADS", True)
+    monkeypatch.setattr(
+        "media.api.image.get_image_service",
+        lambda: ImageService(s3_client=s3, bucket_name="bucket"),
+    )
+    data = png_bytes((8, 8))
+
+    response = api_client.post(
+        "/api/v1/media/images/upload/",
+        {"images": [io.BytesIO(data)]},
+        format="multipart",
+    )
+
+    assert response.status_code == 201, response.data
+    key = response.data[0]["key"]
+    assert s3.objects[key]["Body"] == data
+    image = Image.objects.get(image_key=key)
+    assert image.uploaded_by == user
+    assert (image.width, image.height) == (8, 8)
+
+
+def test_streaming_stops_once_the_quota_is_used_up(
+    api_client, s3, monkeypatch, db
+):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    api_client.force_authenticate(user)
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_STREAMING_UPLOADS", True)
+    monkeypatch.setattr(
+        "media.api.image.get_image_service",
+        lambda: ImageService(s3_client=s3, bucket_name="bucket"),
+    )
+    first, second = png_bytes((8, 8)), png_bytes((16, 16))
+    monkeypatch.setattr(
+        settings.MEDIA_CONFIG, "IMAGE_USER_BYTE_QUOTA", len(first) + 10
+    )
+
+    response = api_client.post(
+        "/api/v1/media/images/upload/",
+        {
+            "images": [
+                SimpleUploadedFile("a.png", first, content_type="image/png"),
+                SimpleUploadedFile("b.png", second, content_type="image/png"),
+            ]
+        },
+        format="multipart",
+    )
+
+    assert response.status_code == 207, response.data
+    assert response.data[1]["error"] == "Storage quota exceeded"
+    # The second file was never written, rather than stored and removed.
+    assert list(s3.objects) == [response.data[0]["key"]]
+    assert not s3.delete_requests
+
+
+def test_streamed_uploads_are_listed_and_deleted_through_s3(
+    api_client, s3, monkeypatch, db
+):
+    user = User.objects.create_user("vendor@example.com", "password123")
+    api_client.force_authenticate(user)
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(settings.MEDIA_CONFIG, "IMAGE_STREAMING_UPLOADS", True)
+    monkeypatch.setitem(storage_clients._clients, "s3", s3)
+
+    response = api_client.post(
+        "/api/v1/media/images/upload/",
+        {"images": [io.BytesIO(png_bytes((8, 8)))]},
+        format="multipart",
+    )
+    assert response.status_code == 201, response.data
+    key = response.data[0]["key"]
+
+    [listed] = api_client.get("/api/v1/media/images/").data["results"]
+    assert listed["image_url"] == s3.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": settings.AWS_CONFIG.AWS_STORAGE_BUCKET_NAME,
+            "Key": key,
+        },
+        ExpiresIn=3600,
+    )
+
+    response = api_client.post(
+        "/api/v1/media/images/delete/",
+        {"image_uuids": [listed["uuid"]]},
+        format="json",
+    )
+    assert response.status_code == 200, response.data
+    assert key not in s3.objects
+    assert not StoredImage.objects.exists()
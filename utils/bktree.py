@@ -0,0 +1,99 @@
+from typing import Any, List, Optional, Tuple
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes, keyed by Hamming distance.
+
+    Radius queries only visit subtrees whose edge distance lies within
+    ``max_distance`` of the query's distance to the parent, so small radii
+    touch a small fraction of the tree. Several values may share a hash.
+
+    Not thread-safe; callers serialise access.
+    """
+
+    def __init__(self):
+        # Nodes are [hash, values, {distance: child}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def add(self, key: int, value: Any) -> bool:
+        """
+        Insert ``value`` under ``key``.
+
+        Returns:
+            bool: False when the pair was already present
+        """
+        if self._root is None:
+            self._root = [key, [value], {}]
+            self._size += 1
+            return True
+
+        node = self._root
+        while True:
+            distance = hamming_distance(key, node[0])
+            if distance == 0:
+                if value in node[1]:
+                    return False
+                node[1].append(value)
+                self._size += 1
+                return True
+
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [value], {}]
+                self._size += 1
+                return True
+            node = child
+
+    def remove(self, key: int, value: Any) -> bool:
+        """
+        Remove ``value`` from ``key``. The node stays in place to keep
+        routing its subtree.
+
+        Returns:
+            bool: Whether the pair was present
+        """
+        node = self._root
+        while node is not None:
+            distance = hamming_distance(key, node[0])
+            if distance == 0:
+                if value not in node[1]:
+                    return False
+                node[1].remove(value)
+                self._size -= 1
+                return True
+            node = node[2].get(distance)
+        return False
+
+    def search(
+        self, key: int, max_distance: int
+    ) -> List[Tuple[int, int, Any]]:
+        """
+        Find every value whose hash is within ``max_distance`` of ``key``.
+
+        Returns:
+            List[Tuple[int, int, Any]]: ``(distance, hash, value)`` triples,
+                nearest first
+        """
+        matches = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(key, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, node[0], value) for value in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(
+                child for edge, child in node[2].items() if low <= edge <= high
+            )
+
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+# Cache backends whose entries only the current process sees
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def shared_cache() -> Optional[BaseCache]:
+    """
+    Return Django's default cache when all processes share it, or None.
+
+    An entry dropped from a process-local cache is only dropped in the
+    worker that changed the data, so other workers would keep serving the
+    stale copy; callers then read from the database instead.
+    """
+    cache = caches["default"]
+    if isinstance(cache, PROCESS_LOCAL_CACHES):
+        return None
+    return cache
+
+
+class TTLCache:
+    """
+    Thread-safe, in-process LRU cache whose entries expire individually.
+
+    Entries are evicted least-recently-used first once ``maxsize`` is
+    reached, and are dropped on read once their time-to-live has passed.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        """
+        Store ``value`` for ``ttl`` seconds, or forever when ``ttl`` is None.
+        """
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,28 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created: datetime, pk: uuid.UUID) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+    """
+    raw = f"{created.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: When the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, pk = raw.decode().split("|")
+        return datetime.fromisoformat(created), uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e